@@ -0,0 +1,229 @@
+"""
+DOCX extraction benchmark
+Checks the streaming DOCX reader against python-docx on random documents, then
+compares time and peak memory of both on large manuscripts with big tables
+
+Each extractor runs in a fresh process, so its peak RSS is its own.
+
+Usage (from the repository root):
+    python scripts/benchmarks/docx_extraction.py --paragraphs 200000 --rows 50000
+    python scripts/benchmarks/docx_extraction.py --cases 2000 --paragraphs 0
+"""
+
+import argparse
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.text_cleaning import clean_extracted_text  # noqa: E402
+from src.services.text_extractor import extract_docx_file  # noqa: E402
+
+try:
+    from docx import Document as DocxDocument
+except ImportError:
+    DocxDocument = None
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+VOCABULARY = "INT. EXT. STUDIO NIGHT MAYA JONAH the a canvas brush palette warmer harbour  spaced".split(" ")
+
+
+def reference_extract(path: str) -> str:
+    """The DOCX extraction as it was with python-docx"""
+    doc = DocxDocument(path)
+    extracted_text = ""
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            extracted_text += paragraph.text + "\n"
+    for table in doc.tables:
+        for row in table.rows:
+            row_text = " | ".join([cell.text.strip() for cell in row.cells])
+            if row_text.strip():
+                extracted_text += row_text + "\n"
+    return clean_extracted_text(extracted_text)
+
+
+class DocumentWriter:
+    """Writes WordprocessingML body content for random or bulk test documents"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def words(self, low: int = 1, high: int = 8) -> str:
+        return " ".join(self.rng.choice(VOCABULARY) for _ in range(self.rng.randint(low, high)))
+
+    def run(self) -> str:
+        choice = self.rng.random()
+        if choice < 0.7:
+            return f'<w:r><w:t xml:space="preserve">{escape(self.words())}</w:t></w:r>'
+        special = self.rng.choice([
+            "<w:tab/>", "<w:br/>", '<w:br w:type="page"/>', '<w:br w:type="textWrapping"/>',
+            "<w:cr/>", "<w:noBreakHyphen/>", "<w:ptab/>", "<w:t/>",
+        ])
+        return f"<w:r>{special}<w:t>{escape(self.words(1, 3))}</w:t></w:r>"
+
+    def paragraph(self) -> str:
+        content = []
+        for _ in range(self.rng.randint(0, 4)):
+            roll = self.rng.random()
+            if roll < 0.1:
+                content.append(f'<w:hyperlink r:id="rId9">{self.run()}</w:hyperlink>')
+            elif roll < 0.15:
+                # Tracked insertion: python-docx does not read into it
+                content.append(f"<w:ins>{self.run()}</w:ins>")
+            else:
+                content.append(self.run())
+        return "<w:p><w:pPr/>" + "".join(content) + "</w:p>"
+
+    def table(self, rows: int, columns: int, depth: int = 0) -> str:
+        out = ["<w:tbl><w:tblGrid>" + "<w:gridCol/>" * columns + "</w:tblGrid>"]
+        merging = {}  # grid offset -> span of a vertical merge in progress
+        for row_index in range(rows):
+            out.append("<w:tr>")
+            offset = 0
+            while offset < columns:
+                if offset in merging and self.rng.random() < 0.6:
+                    # A continuation covers exactly the columns of the cell above it
+                    span = merging[offset]
+                    properties = "<w:vMerge/>"
+                else:
+                    span = min(self.rng.choice([1, 1, 1, 2]), columns - offset)
+                    properties = ""
+                    for covered in range(offset, offset + span):
+                        merging.pop(covered, None)
+                    if self.rng.random() < 0.15:
+                        properties = '<w:vMerge w:val="restart"/>'
+                        merging[offset] = span
+                if span > 1:
+                    properties = f'<w:gridSpan w:val="{span}"/>' + properties
+                body = "".join(self.paragraph() for _ in range(self.rng.randint(1, 2)))
+                if depth == 0 and self.rng.random() < 0.05:
+                    body += self.table(2, 2, depth + 1) + "<w:p/>"
+                out.append(f"<w:tc><w:tcPr>{properties}</w:tcPr>{body}</w:tc>")
+                offset += span
+            out.append("</w:tr>")
+        out.append("</w:tbl>")
+        return "".join(out)
+
+
+def write_docx(path: Path, body_parts) -> None:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELATIONSHIPS)
+        with archive.open("word/document.xml", "w") as xml:
+            xml.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document xmlns:w="{W_NS}" '
+                      'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><w:body>'.encode())
+            for part in body_parts:
+                xml.write(part.encode())
+            xml.write(b"<w:sectPr/></w:body></w:document>")
+
+
+def check_equivalence(directory: Path, cases: int, seed: int):
+    rng = random.Random(seed)
+    writer = DocumentWriter(rng)
+    path = directory / "case.docx"
+    for case in range(cases):
+        parts = []
+        for _ in range(rng.randint(0, 8)):
+            roll = rng.random()
+            if roll < 0.6:
+                parts.append(writer.paragraph())
+            elif roll < 0.85:
+                parts.append(writer.table(rng.randint(1, 5), rng.randint(1, 4)))
+            else:
+                parts.append(f"<w:sdt><w:sdtContent>{writer.paragraph()}</w:sdtContent></w:sdt>")
+        write_docx(path, parts)
+        expected = reference_extract(str(path))
+        actual = extract_docx_file(str(path))["text"]
+        assert actual == expected, f"case {case} differs:\n{expected!r}\n{actual!r}"
+    print(f"{cases} random documents identical to python-docx")
+
+
+def build_manuscript(path: Path, paragraphs: int, rows: int, seed: int):
+    """A long manuscript: many paragraphs, then one wide table of scene notes"""
+    writer = DocumentWriter(random.Random(seed))
+
+    def parts():
+        for _ in range(paragraphs):
+            yield f'<w:p><w:r><w:t xml:space="preserve">{escape(writer.words(8, 40))}</w:t></w:r></w:p>'
+        yield "<w:tbl><w:tblGrid>" + "<w:gridCol/>" * 6 + "</w:tblGrid>"
+        for _ in range(rows):
+            yield "<w:tr>" + "".join(
+                f"<w:tc><w:p><w:r><w:t>{escape(writer.words(1, 6))}</w:t></w:r></w:p></w:tc>" for _ in range(6)
+            ) + "</w:tr>"
+        yield "</w:tbl>"
+
+    write_docx(path, parts())
+
+
+def run_extractor(name: str, path: str) -> dict:
+    """Extract one file with one extractor (runs in a fresh process)"""
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    text = extract_docx_file(path)["text"] if name == "streaming" else reference_extract(path)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"seconds": elapsed, "characters": len(text), "growth_mb": (peak_kb - baseline_kb) / 1024,
+            "text": text}
+
+
+def main(cases: int, paragraphs: int, rows: int, seed: int):
+    if DocxDocument is None:
+        print("python-docx is not installed; nothing to compare against")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_equivalence(Path(tmp), cases, seed)
+        if not paragraphs and not rows:
+            return
+
+        path = Path(tmp) / "manuscript.docx"
+        build_manuscript(path, paragraphs, rows, seed)
+        with zipfile.ZipFile(path) as archive:
+            xml_mb = archive.getinfo("word/document.xml").file_size / (1024 * 1024)
+        print(f"{paragraphs} paragraphs + {rows} table rows: {path.stat().st_size / (1024 * 1024):.1f} MB docx, "
+              f"{xml_mb:.1f} MB document.xml")
+        print(f"{'extractor':12s} {'seconds':>8s} {'characters':>11s} {'peak growth MB':>15s}")
+
+        context = multiprocessing.get_context("spawn")
+        texts = []
+        for name in ("python-docx", "streaming"):
+            with context.Pool(1) as pool:
+                result = pool.apply(run_extractor, (name, str(path)))
+            texts.append(result.pop("text"))
+            print(f"{name:12s} {result['seconds']:8.2f} {result['characters']:11d} {result['growth_mb']:15.1f}")
+        assert texts[0] == texts[1], "manuscript text differs between extractors"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=500, help="random documents compared with python-docx")
+    parser.add_argument("--paragraphs", type=int, default=100000, help="paragraphs in the large manuscript")
+    parser.add_argument("--rows", type=int, default=20000, help="table rows in the large manuscript")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args.cases, args.paragraphs, args.rows, args.seed)
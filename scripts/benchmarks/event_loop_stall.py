@@ -0,0 +1,84 @@
+"""
+Event-loop stall benchmark
+Measures how long the event loop freezes while a large document_text row is read,
+once with a blocking sqlite3 call on the loop and once through ConnectionPool.fetchone
+
+Usage (from the repository root):
+    python scripts/benchmarks/event_loop_stall.py --megabytes 40
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.database import ConnectionPool  # noqa: E402
+
+QUERY = "SELECT extracted_text FROM document_text WHERE document_id = ?"
+
+
+def build_database(db_path: str, megabytes: int):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE document_text (document_id TEXT PRIMARY KEY, extracted_text TEXT NOT NULL)")
+    line = "INT. STUDIO - NIGHT. The artist stares at the canvas. "
+    text = (line * (megabytes * 1024 * 1024 // len(line) + 1))[: megabytes * 1024 * 1024]
+    conn.execute("INSERT INTO document_text VALUES (?, ?)", ("big", text))
+    conn.commit()
+    conn.close()
+
+
+async def measure_stall(read, tick_ms: float = 1.0) -> float:
+    """Run read() while a ticker records the worst gap between its wake-ups"""
+    worst = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(tick_ms / 1000)
+            now = time.perf_counter()
+            worst = max(worst, now - last - tick_ms / 1000)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await read()
+    done.set()
+    await task
+    return worst * 1000
+
+
+async def main(megabytes: int, rounds: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        build_database(db_path, megabytes)
+        pool = ConnectionPool(db_path)
+
+        blocking_conn = sqlite3.connect(db_path)
+
+        async def blocking_read():
+            blocking_conn.execute(QUERY, ("big",)).fetchone()
+
+        async def pooled_read():
+            await pool.fetchone(QUERY, ("big",))
+
+        for label, read in (("blocking sqlite3 on loop", blocking_read), ("ConnectionPool.fetchone", pooled_read)):
+            stalls = [await measure_stall(read) for _ in range(rounds)]
+            print(f"{label:28s} worst stall {max(stalls):8.2f} ms   median {sorted(stalls)[len(stalls) // 2]:8.2f} ms")
+
+        blocking_conn.close()
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megabytes", type=int, default=40, help="size of the document_text row")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.megabytes, args.rounds))
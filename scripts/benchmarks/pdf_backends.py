@@ -0,0 +1,125 @@
+"""
+PDF backend benchmark
+Compares pages per second and peak memory of each installed PDF backend on a
+synthetic multi-hundred-page corpus (or a directory of real PDFs)
+
+Each backend runs in a fresh process, so its peak RSS is its own.
+
+Usage (from the repository root):
+    python scripts/benchmarks/pdf_backends.py --pages 400 --documents 3
+    python scripts/benchmarks/pdf_backends.py --corpus ~/scripts/pdf
+"""
+
+import argparse
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services import pdf_backends  # noqa: E402
+from src.services.text_cleaning import clean_and_count  # noqa: E402
+
+VOCABULARY = ("INT. EXT. STUDIO HARBOUR NIGHT DAY MAYA JONAH the a canvas brush palette "
+              "circles looks walks into warmer light act two reference photos").split()
+
+
+def pdf_string(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: int, seed: int) -> bytes:
+    """A plain PDF of screenplay-like pages, ~45 lines of Helvetica each"""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * i} 0 R' for i in range(pages))}] /Count {pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for index in range(pages):
+        lines = [f"SCENE {index + 1}"] + [
+            " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(4, 12))) for _ in range(44)
+        ]
+        stream = "BT /F1 11 Tf 50 760 Td 15 TL " + " ".join(f"({pdf_string(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def run_backend(name: str, paths: list) -> dict:
+    """Extract every page of every file with one backend (runs in a fresh process)"""
+    backend = pdf_backends.get_backend(name)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pages = words = 0
+    started = time.perf_counter()
+    for path in paths:
+        with backend.open(Path(path)) as document:
+            for index in range(backend.page_count(document)):
+                _, page_words, _ = clean_and_count(backend.page_text(document, index))
+                pages += 1
+                words += page_words
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"pages": pages, "words": words, "seconds": elapsed, "peak_mb": peak_kb / 1024,
+            "growth_mb": (peak_kb - baseline_kb) / 1024}
+
+
+def main(corpus: str, pages: int, documents: int, rounds: int):
+    backends = pdf_backends.available_backends()
+    if not backends:
+        print("No PDF backend installed (pip install pymupdf PyPDF2)")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if corpus:
+            paths = sorted(str(path) for path in Path(corpus).glob("*.pdf"))
+        else:
+            paths = []
+            for index in range(documents):
+                path = Path(tmp) / f"script_{index}.pdf"
+                path.write_bytes(build_pdf(pages, seed=index))
+                paths.append(str(path))
+        if not paths:
+            print("No PDFs found")
+            return
+        size_mb = sum(Path(path).stat().st_size for path in paths) / (1024 * 1024)
+        print(f"{len(paths)} PDFs, {size_mb:.1f} MB")
+        print(f"{'backend':10s} {'version':>10s} {'pages':>7s} {'words':>9s} {'pages/s':>9s} "
+              f"{'peak MB':>8s} {'growth MB':>10s}")
+
+        context = multiprocessing.get_context("spawn")
+        for backend in backends:
+            results = []
+            for _ in range(rounds):
+                with context.Pool(1) as pool:
+                    results.append(pool.apply(run_backend, (backend.name, paths)))
+            best = min(results, key=lambda result: result["seconds"])
+            print(f"{backend.name:10s} {backend.version:>10s} {best['pages']:7d} {best['words']:9d} "
+                  f"{best['pages'] / best['seconds']:9.1f} {best['peak_mb']:8.1f} {best['growth_mb']:10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="directory of PDFs to use instead of a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=400, help="pages per synthetic PDF")
+    parser.add_argument("--documents", type=int, default=3, help="synthetic PDFs to generate")
+    parser.add_argument("--rounds", type=int, default=2)
+    args = parser.parse_args()
+    main(args.corpus, args.pages, args.documents, args.rounds)
@@ -0,0 +1,142 @@
+"""
+PDF boilerplate benchmark
+Compares the text and embedding chunk counts of script PDFs assembled the old way
+(every page with its running heads, behind a --- Page N --- marker) and with
+repeated headers and footers removed and pages joined without markers
+
+Chunks are what the embedding model encodes one by one, so the chunk ratio is
+the ratio of encoder work. The synthetic scripts carry a title, a draft notice
+and page numbers on every page; a second set of pages without running heads
+checks that nothing is removed where nothing repeats. Pass --corpus to use
+real files.
+
+Usage (from the repository root):
+    python scripts/benchmarks/pdf_boilerplate.py
+    python scripts/benchmarks/pdf_boilerplate.py --corpus ~/Scripts --backend pymupdf
+"""
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.api.embeddings_api import SimpleEmbeddingService  # noqa: E402
+from src.services import boilerplate, pdf_backends  # noqa: E402
+from src.services.text_cleaning import clean_and_count  # noqa: E402
+from src.services.text_extractor import PAGE_SEPARATOR, extract_pdf_pages  # noqa: E402
+
+VOCABULARY = ("MAYA JONAH canvas brush palette harbour gallery light dawn night studio the a of "
+              "paint crate photograph wall nail window turns waits").split()
+HEADS = ["MIDNIGHT PALETTE", "Blue Revision 03/14/24", "DRAFT - NOT FOR DISTRIBUTION"]
+RUNNING_HEAD = re.compile("|".join(map(re.escape, HEADS)) + r"|\d+\.|Page \d+ of \d+|\(c\) Harbour Films")
+
+
+def pdf_string(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_script(pages: int, seed: int, running_heads: bool) -> bytes:
+    """A screenplay-like PDF, optionally with a title block on top and a page footer on every page"""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * i} 0 R' for i in range(pages))}] /Count {pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for index in range(pages):
+        lines = [f"{index + 1}. INT. {rng.choice(VOCABULARY).upper()} - {rng.choice(['DAY', 'NIGHT'])}"] + [
+            " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(3, 10))) for _ in range(rng.randint(8, 30))
+        ]
+        if running_heads:
+            lines = HEADS + [f"{index + 1}."] + lines + [f"Page {index + 1} of {pages}", "(c) Harbour Films"]
+        stream = "BT /F1 11 Tf 50 760 Td 15 TL " + " ".join(f"({pdf_string(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def assemble(pages: list) -> tuple:
+    """Old and new document text of extracted pages, plus the lines removed"""
+    filled = [(number, text) for number, text, _ in pages if text]
+    before = "\n".join(f"--- Page {number} ---\n{text}" for number, text in filled)
+
+    headers, footers = boilerplate.find_repeated(boilerplate.edge_keys(text) for _, text in filled)
+    kept, lines_removed = [], 0
+    for _, text in filled:
+        text, removed = boilerplate.strip_repeated(text, headers, footers)
+        lines_removed += removed
+        kept.append(clean_and_count(text)[0] if removed else text)
+    return before, PAGE_SEPARATOR.join(kept), lines_removed
+
+
+def main(corpus: str, pages: int, backend: str):
+    chunker = SimpleEmbeddingService()
+    with tempfile.TemporaryDirectory() as tmp:
+        if corpus:
+            paths = sorted(Path(corpus).glob("*.pdf"))
+        else:
+            paths = []
+            for name, heads in (("script_with_heads.pdf", True), ("script_plain.pdf", False)):
+                path = Path(tmp) / name
+                path.write_bytes(build_script(pages, 7, heads))
+                paths.append(path)
+        if not paths:
+            print("No .pdf files found")
+            return
+
+        print(f"{'file':22s} {'pages':>6s} {'lines removed':>14s} {'chars before':>13s} {'after':>9s} "
+              f"{'chunks before':>14s} {'after':>7s} {'strip s':>8s}")
+        totals = [0, 0]
+        for path in paths:
+            extracted = extract_pdf_pages(str(path), 0, 2 ** 31, backend)
+            started = time.perf_counter()
+            before, after, removed = assemble(extracted["pages"])
+            elapsed = time.perf_counter() - started
+
+            chunks_before = len(chunker.chunk_text(before))
+            chunks_after = len(chunker.chunk_text(after))
+            totals[0] += chunks_before
+            totals[1] += chunks_after
+            print(f"{path.name[:22]:22s} {extracted['page_count']:6d} {removed:14d} {len(before):13d} "
+                  f"{len(after):9d} {chunks_before:14d} {chunks_after:7d} {elapsed:8.3f}")
+
+            if not corpus:
+                body = [line for _, text, _ in extracted["pages"] for line in text.split("\n")
+                        if not RUNNING_HEAD.fullmatch(line)]
+                assert all(line in after for line in body), f"{path.name}: body text was removed"
+                if "heads" in path.name:
+                    assert not any(RUNNING_HEAD.fullmatch(line) for line in after.split("\n")), \
+                        f"{path.name}: running heads left in the text"
+                else:
+                    assert removed == 0, f"{path.name}: lines removed without running heads"
+
+        print(f"Chunks to embed: {totals[0]} before, {totals[1]} after "
+              f"({(1 - totals[1] / totals[0]) * 100:.0f}% fewer encoder calls per document)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="directory of .pdf files to use instead of the synthetic scripts")
+    parser.add_argument("--pages", type=int, default=120, help="pages in each synthetic script")
+    parser.add_argument("--backend", default=pdf_backends.BACKEND_AUTO,
+                        help="PDF backend: auto, " + ", ".join(backend.name for backend in pdf_backends.available_backends()))
+    args = parser.parse_args()
+    main(args.corpus, args.pages, args.backend)
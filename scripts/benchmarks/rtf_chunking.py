@@ -0,0 +1,189 @@
+"""
+RTF extraction benchmark
+Compares the text, embedding chunk counts and leftover control words of RTF files
+extracted as plain text (the old route) and through the streaming RTF decoder
+
+The samples imitate what WordPad, Word and TextEdit write: font, colour and
+style tables, document info, theme data, embedded pictures, fields, tables,
+unicode escapes and non-Latin code pages. Pass --corpus to use real files.
+
+Usage (from the repository root):
+    python scripts/benchmarks/rtf_chunking.py
+    python scripts/benchmarks/rtf_chunking.py --corpus ~/Documents/rtf --megabytes 0
+"""
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.api.embeddings_api import SimpleEmbeddingService  # noqa: E402
+from src.services.text_extractor import extract_rtf_file, extract_txt_file  # noqa: E402
+
+CONTROL_WORD = re.compile(r"\\[a-z]{2,}-?\d*")
+
+SCENES = [
+    ("INT. STUDIO - NIGHT", "MAYA (30s) circles the canvas, brush in her teeth.",
+     "It's not finished. It's never finished."),
+    ("EXT. HARBOUR - DAWN", "JONAH hauls a crate of photographs up the slipway.",
+     "Try a warmer palette for act two."),
+    ("INT. GALLERY - DAY", "Empty walls. A single nail where the painting should hang.",
+     "They'll come. They always come late."),
+]
+
+
+def rtf_escape(text: str) -> str:
+    """Text as an RTF body: \\uN escapes with a ? fallback for anything outside ASCII"""
+    out = []
+    for char in text.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}"):
+        code = ord(char)
+        if code < 128:
+            out.append(char)
+        elif code < 0x10000:
+            out.append(f"\\u{code if code < 0x8000 else code - 0x10000}?")
+        else:
+            code -= 0x10000
+            for unit in (0xD800 + (code >> 10), 0xDC00 + (code & 0x3FF)):
+                out.append(f"\\u{unit - 0x10000}?")
+    return "".join(out)
+
+
+def screenplay(rng: random.Random, scenes: int) -> list:
+    lines = []
+    for index in range(scenes):
+        heading, action, dialogue = rng.choice(SCENES)
+        lines += [f"{index + 1}. {heading}", action, "MAYA", f"\u201c{dialogue}\u201d \u2014 caf\u00e9 notes"]
+    return lines
+
+
+def wordpad(lines: list) -> str:
+    body = "\\par\n".join(rtf_escape(line) for line in lines)
+    return ("{\\rtf1\\ansi\\ansicpg1252\\deff0\\nouicompat\\deflang1033{\\fonttbl{\\f0\\fnil\\fcharset0 Calibri;}"
+            "{\\f1\\fnil\\fcharset0 Courier New;}}\n{\\colortbl ;\\red0\\green0\\blue255;}\n"
+            "{\\*\\generator Riched20 10.0.19041}\\viewkind4\\uc1 \n"
+            f"\\pard\\sa200\\sl276\\slmult1\\f0\\fs22\\lang9 {body}\\par\n}}\n")
+
+
+def word(lines: list, rng: random.Random) -> str:
+    styles = "".join(f"{{\\s{i}\\ql \\li0\\ri0\\widctlpar\\wrapdefault\\aspalpha\\aspnum\\faauto\\adjustright"
+                     f"\\rin0\\lin0\\itap0 \\rtlch\\fcs1 \\af0\\afs22\\alang1025 \\ltrch\\fcs0 "
+                     f"\\f0\\fs22\\lang1033\\langfe1033\\cgrid\\langnp1033\\langfenp1033 Style {i};}}\n"
+                     for i in range(40))
+    latent = "".join(f"\\lsdpriority{i} \\lsdlocked0 Latent Style {i};" for i in range(200))
+    theme = "".join(f"{rng.getrandbits(32):08x}" for _ in range(4000))
+    rsids = "".join(f"\\rsid{rng.getrandbits(24)}" for _ in range(60))
+    paragraphs = []
+    for number, line in enumerate(lines):
+        text = rtf_escape(line)
+        if number % 25 == 0:
+            text = (f"{{\\field{{\\*\\fldinst {{\\rtlch\\fcs1 \\af0 \\ltrch\\fcs0 \\insrsid1 HYPERLINK "
+                    f"\"https://example.com/scene{number}\" }}}}{{\\fldrslt {{\\cs15\\ul\\cf2 {text}}}}}}}")
+        paragraphs.append(f"\\pard\\plain \\ltrpar\\s0\\ql \\li0\\ri0\\sa160\\sl259\\slmult1 "
+                          f"\\rtlch\\fcs1 \\af0\\afs22 \\ltrch\\fcs0 \\fs22\\insrsid{number} {text}\\par\n")
+        if number % 40 == 39:
+            paragraphs.append("\\trowd \\irow0\\irowband0\\ltrrow\\ts11\\trgaph108\\trleft-108\\cellx4680\\cellx9360"
+                              "\\pard\\intbl Scene\\cell Location\\cell\\row\n")
+    return ("{\\rtf1\\adeflang1025\\ansi\\ansicpg1252\\uc1\\adeff31507\\deff0\\stshfdbch31505\\deflang1033"
+            "{\\fonttbl{\\f0\\fbidi \\froman\\fcharset0\\fprq2{\\*\\panose 02020603050405020304}Times New Roman;}"
+            "{\\f1\\fbidi \\fswiss\\fcharset0\\fprq2{\\*\\panose 020b0604020202020204}Arial;}}\n"
+            "{\\colortbl;\\red0\\green0\\blue0;\\red0\\green0\\blue255;}\n"
+            f"{{\\*\\defchp \\fs22\\loch\\af31506}}{{\\stylesheet{styles}}}\n"
+            f"{{\\*\\rsidtbl {rsids}}}{{\\*\\generator Microsoft Word 16.0;}}"
+            "{\\info{\\title Draft}{\\author Maya}{\\operator Maya}{\\creatim\\yr2024\\mo3\\dy1\\hr9\\min5}"
+            "{\\version2}{\\edmins3}{\\nofpages4}{\\nofwords900}}\n"
+            "\\paperw12240\\paperh15840\\margl1440\\margr1440\\margt1440\\margb1440\n"
+            "{\\header \\pard\\plain \\qr DRAFT - CONFIDENTIAL\\par}\n"
+            + "".join(paragraphs)
+            + "{\\*\\shppict{\\pict\\picw100\\pich100\\pngblip\n" + theme[:8000] + "}}\n"
+            + f"{{\\*\\themedata {theme}}}\n{{\\*\\latentstyles\\lsdstimax376\\lsdlockeddef0 {latent}}}\n"
+            + "{\\*\\datastore 01050000020000001800000}\n}\n")
+
+
+def textedit(lines: list) -> str:
+    body = "\\\n".join(rtf_escape(line) for line in lines)
+    return ("{\\rtf1\\ansi\\ansicpg1252\\cocoartf2639\n\\cocoatextscaling0\\cocoaplatform0"
+            "{\\fonttbl\\f0\\fswiss\\fcharset0 Helvetica;}\n{\\colortbl;\\red255\\green255\\blue255;}\n"
+            "{\\*\\expandedcolortbl;;}\n\\paperw11900\\paperh16840\\margl1440\\margr1440\\vieww11520"
+            "\\viewh8400\\viewkind0\n\\pard\\tx566\\tx1133\\tx1700\\pardirnatural\\partightenfactor0\n\n"
+            f"\\f0\\fs24 \\cf0 {body}}}\n")
+
+
+def cyrillic(lines: list) -> str:
+    """Russian text as \\'hh bytes in a cp1251 font, as older editors write it"""
+    body = "\\par\n".join(
+        "".join(f"\\'{byte:02x}" if byte > 127 else chr(byte) for byte in line.encode("cp1251", "replace"))
+        for line in lines
+    )
+    return ("{\\rtf1\\ansi\\ansicpg1251\\deff0{\\fonttbl{\\f0\\fnil\\fcharset204 Arial;}}\n"
+            f"\\pard\\f0\\fs20 {body}\\par\n}}\n")
+
+
+def build_samples(directory: Path, megabytes: int) -> list:
+    rng = random.Random(3)
+    russian = ["\u0421\u0446\u0435\u043d\u0430 %d. \u0421\u0442\u0443\u0434\u0438\u044f, \u043d\u043e\u0447\u044c." % i
+               for i in range(200)]
+    samples = {
+        "wordpad.rtf": wordpad(screenplay(rng, 60)),
+        "word.rtf": word(screenplay(rng, 120), rng),
+        "textedit.rtf": textedit(screenplay(rng, 60)),
+        "cyrillic.rtf": cyrillic(russian),
+    }
+    if megabytes:
+        scenes, size = 500, 0
+        while size < megabytes * 1024 * 1024:
+            scenes *= 2
+            size = len(word(screenplay(rng, scenes), rng))
+        samples[f"large_{megabytes}mb.rtf"] = word(screenplay(rng, scenes), rng)
+
+    paths = []
+    for name, content in samples.items():
+        path = directory / name
+        path.write_bytes(content.encode("ascii"))
+        paths.append(path)
+    return paths
+
+
+def main(corpus: str, megabytes: int):
+    chunker = SimpleEmbeddingService()
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = sorted(Path(corpus).glob("*.rtf")) if corpus else build_samples(Path(tmp), megabytes)
+        if not paths:
+            print("No .rtf files found")
+            return
+
+        print(f"{'file':18s} {'KB':>7s} {'words before':>13s} {'after':>7s} {'chunks before':>14s} {'after':>7s} "
+              f"{'control words left':>19s} {'decode s':>9s}")
+        totals = [0, 0]
+        for path in paths:
+            before = extract_txt_file(str(path))["text"]
+            started = time.perf_counter()
+            result = extract_rtf_file(str(path))
+            elapsed = time.perf_counter() - started
+            after = result["text"]
+
+            chunks_before = len(chunker.chunk_text(before))
+            chunks_after = len(chunker.chunk_text(after))
+            totals[0] += chunks_before
+            totals[1] += chunks_after
+            leftover = len(CONTROL_WORD.findall(after))
+            print(f"{path.name[:18]:18s} {path.stat().st_size / 1024:7.0f} {len(before.split()):13d} "
+                  f"{result['word_count']:7d} {chunks_before:14d} {chunks_after:7d} {leftover:19d} {elapsed:9.3f}")
+            if not corpus:
+                assert leftover == 0, f"{path.name}: control words left in the decoded text"
+                assert "DRAFT - CONFIDENTIAL" not in after and "Times New Roman" not in after
+
+        print(f"Chunks to embed: {totals[0]} before, {totals[1]} after "
+              f"({(1 - totals[1] / totals[0]) * 100:.0f}% fewer)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="directory of .rtf files to use instead of the synthetic samples")
+    parser.add_argument("--megabytes", type=int, default=8, help="size of an extra large synthetic sample (0 for none)")
+    args = parser.parse_args()
+    main(args.corpus, args.megabytes)
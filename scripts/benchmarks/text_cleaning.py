@@ -0,0 +1,83 @@
+"""
+Text cleaning benchmark
+Times the text cleaner against the original four-pass implementation
+(cleaning plus word counting) on multi-MB scripts. Equivalence on random
+inputs is covered by tests/modules/test_text_cleaning.py.
+
+Usage (from the repository root):
+    python scripts/benchmarks/text_cleaning.py --megabytes 20
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.text_cleaning import clean_and_count  # noqa: E402
+
+
+def reference_clean(text: str) -> str:
+    """The cleaner as it was before the fast path: four regex passes and a strip"""
+    if not text:
+        return ""
+    text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
+    text = re.sub(r'\t+', ' ', text)
+    text = re.sub(r' +', ' ', text)
+    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x84\x86-\x9f]', '', text)
+    return text.strip()
+
+
+def reference_clean_and_count(text: str):
+    cleaned = reference_clean(text)
+    return cleaned, len(cleaned.split()), len(cleaned)
+
+
+def build_script(megabytes: int, with_controls: bool) -> str:
+    """Screenplay-like text: indented dialogue, blank lines, tabbed transitions"""
+    rng = random.Random(7)
+    vocabulary = "the a INT. EXT. DAY NIGHT MAYA JONAH walks into room looks at canvas brush".split()
+    parts, size = [], 0
+    while size < megabytes * 1024 * 1024:
+        line = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(3, 15)))
+        part = "\n\n" + " " * rng.choice([0, 10, 25]) + line + "\n"
+        if rng.random() < 0.1:
+            part += "\n\n\n"
+        if rng.random() < 0.1:
+            part += "\t\tCUT TO:\n"
+        if with_controls and rng.random() < 0.01:
+            part += "\x0c"  # form feed between pages, as PDF extraction leaves them
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def timed(function, text: str, rounds: int):
+    best, result = None, None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = function(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(megabytes: int, rounds: int):
+    print(f"{'input':22s} {'original s':>11s} {'current s':>10s} {'speedup':>8s}")
+    for label, with_controls in (("script", False), ("script + form feeds", True)):
+        text = build_script(megabytes, with_controls)
+        reference_time, expected = timed(reference_clean_and_count, text, rounds)
+        current_time, result = timed(clean_and_count, text, rounds)
+        assert result == expected, f"{label}: output differs from the original cleaner"
+        print(f"{label:22s} {reference_time:11.3f} {current_time:10.3f} {reference_time / current_time:7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megabytes", type=int, default=20, help="size of the synthetic script")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    main(args.megabytes, args.rounds)
@@ -1,47 +1,207 @@
 """
 Document Upload API - Fixed version
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import Dict, List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+import json
 import logging
 
+from ..services.storage_manager import StorageManager, DocumentTooLargeError
+from ..services.orphan_reconciler import OrphanReconciler
+from ..services.archive_import import ArchiveImporter, TAR_SUFFIXES
+from .file_responses import build_file_response
+from .multipart_upload import FRAMING_ALLOWANCE, UPLOAD_OPENAPI, MultipartUpload, declared_body_size
+
 logger = logging.getLogger(__name__)
 
 # Create router
 router = APIRouter()
 
+# Initialize storage manager
+storage_manager = StorageManager()
+
+# Background sweep for orphaned files and rows, started with the app
+orphan_reconciler = OrphanReconciler(storage_manager)
+router.add_event_handler("startup", orphan_reconciler.start)
+router.add_event_handler("shutdown", orphan_reconciler.stop)
+
+archive_importer = ArchiveImporter(storage_manager)
+
+class BulkDeleteRequest(BaseModel):
+    document_ids: List[str]
+
 @router.get("/documents/list")
-async def list_documents() -> Dict:
-    """List uploaded documents"""
-    # Sample data for now
+async def list_documents(
+    limit: int = Query(default=50, ge=1, le=500, description="Documents per page"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    file_type: Optional[str] = Query(default=None, description="Only this file type, e.g. pdf"),
+    text_extracted: Optional[bool] = Query(default=None, description="Filter on extraction status"),
+    include_file_status: bool = Query(default=False, description="Include cached file presence")
+) -> Dict:
+    """List uploaded documents, newest first"""
+    try:
+        page = await storage_manager.list_documents_page(
+            limit=limit,
+            cursor=cursor,
+            file_type=file_type,
+            text_extracted=text_extracted,
+            include_file_status=include_file_status
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     return {
         "success": True,
         "message": "Documents retrieved",
-        "documents": [
-            {"id": "1", "name": "sample.pdf", "size": "2.1MB"},
-            {"id": "2", "name": "notes.txt", "size": "0.5MB"}
-        ],
-        "count": 2
+        "documents": page["documents"],
+        "count": len(page["documents"]),
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"],
+        "total_documents": await storage_manager.get_document_count()
     }
 
-@router.post("/documents/upload")
-async def upload_document(file: UploadFile = File(...)) -> Dict:
-    """Upload a document"""
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
+@router.post("/documents/upload", openapi_extra=UPLOAD_OPENAPI)
+async def upload_document(request: Request) -> Dict:
+    """
+    Upload a document
+    
+    The multipart body is parsed as it arrives instead of through UploadFile,
+    which would spool the whole body first. A Content-Length beyond the size
+    limit (plus room for multipart framing) is refused before anything is
+    read, and the file's type is checked as soon as its part headers arrive,
+    before any of its bytes are written. The size limit is enforced again
+    while the bytes stream to disk.
+    """
+    declared = declared_body_size(request)
+    if declared is not None and declared > storage_manager.MAX_FILE_SIZE + FRAMING_ALLOWANCE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large ({declared / (1024*1024):.1f}MB). "
+                   f"Maximum size: {storage_manager.MAX_FILE_SIZE // (1024*1024)}MB"
+        )
+    
+    filename = None
+    try:
+        upload = MultipartUpload(request)
+        filename = await upload.open()
+        if not filename:
+            raise HTTPException(status_code=400, detail="No file provided")
+        document_id = await storage_manager.store_document(upload)
+    except HTTPException:
+        raise
+    except DocumentTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Upload failed for {filename or 'request'}: {e}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
     
     return {
         "success": True,
-        "message": f"Document '{file.filename}' uploaded successfully!",
-        "filename": file.filename,
-        "document_id": f"doc-{hash(file.filename) % 10000}"
+        "message": f"Document '{filename}' uploaded successfully!",
+        "filename": filename,
+        "document_id": document_id
+    }
+
+@router.post("/documents/import")
+async def import_archive(file: UploadFile = File(...)) -> StreamingResponse:
+    """
+    Import every supported document in a zip or tar archive
+    
+    Members are streamed into storage one at a time. Progress is returned as
+    newline-delimited JSON: one event per member, then a "done" summary.
+    """
+    if not file.filename or not ArchiveImporter.archive_kind(file.filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported archive. Use .zip or {', '.join(TAR_SUFFIXES)}"
+        )
+    
+    async def events():
+        try:
+            async for event in archive_importer.import_archive(file.file, file.filename):
+                yield json.dumps(event) + "\n"
+        finally:
+            await file.close()
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.api_route("/documents/{document_id}/download", methods=["GET", "HEAD"])
+async def download_document(
+    document_id: str,
+    request: Request,
+    inline: bool = Query(default=True, description="Display in the browser instead of saving")
+) -> Response:
+    """
+    Download an original upload
+    
+    Supports Range requests for seeking into large PDFs, plus ETag and
+    Last-Modified revalidation. Files are streamed, never read into memory.
+    """
+    file_info = await storage_manager.get_document_file(document_id)
+    if not file_info:
+        raise HTTPException(status_code=404, detail=f"Document '{document_id}' not found")
+    
+    return build_file_response(
+        request.headers,
+        path=file_info['path'],
+        file_size=file_info['file_size'],
+        last_modified=file_info['last_modified'],
+        etag=file_info['etag'],
+        media_type=file_info['mime_type'],
+        filename=file_info['filename'],
+        inline=inline,
+        compressed=file_info['compressed']
+    )
+
+@router.post("/documents/delete")
+async def delete_documents(request: BulkDeleteRequest) -> Dict:
+    """Delete documents with their files, extracted text and vector chunks"""
+    if not request.document_ids:
+        raise HTTPException(status_code=400, detail="No document IDs provided")
+    
+    try:
+        result = await storage_manager.delete_documents(request.document_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Bulk delete failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
+    
+    return {
+        "success": True,
+        "message": f"🗑️ Deleted {len(result['deleted'])} documents, "
+                   f"reclaimed {result['bytes_reclaimed'] / (1024 * 1024):.2f}MB and {result['vectors_removed']} vectors",
+        **result
     }
 
 @router.get("/documents/stats")
 async def document_stats() -> Dict:
     """Document statistics"""
+    stats = await storage_manager.get_storage_stats()
+    stats['orphan_reconciler'] = orphan_reconciler.get_metrics()
+    return stats
+
+@router.post("/documents/stats/reconcile")
+async def reconcile_document_stats() -> Dict:
+    """Rebuild the library counters from scratch"""
+    counters = await storage_manager.reconcile_stats()
+    return {
+        "success": True,
+        "message": f"Library statistics rebuilt ({len(counters)} counters)",
+        "statistics": await storage_manager.get_storage_stats()
+    }
+
+@router.post("/documents/files/reconcile")
+async def reconcile_document_files() -> Dict:
+    """Sweep uploads and documents for orphans now instead of waiting for the schedule"""
+    totals = await orphan_reconciler.run_once()
     return {
-        "total_documents": 2,
-        "total_size_mb": 2.6,
-        "file_types": {"pdf": 1, "txt": 1}
+        "success": True,
+        "message": f"{totals['files_quarantined']} orphan files quarantined, "
+                   f"{totals['rows_missing_file']} documents missing their file",
+        "totals": totals
     }
@@ -7,10 +7,13 @@ from fastapi import APIRouter, HTTPException, Form
 from typing import List, Dict, Any
 import logging
 from datetime import datetime
-import sqlite3
-import os
 import numpy as np
 
+from ..services import library_stats, vector_store
+from ..services.database import get_pool
+from ..services.text_extractor import FAILED_METHOD
+from ..services.write_queue import get_writer
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -35,23 +38,15 @@ class SimpleEmbeddingService:
             
             # Import here to avoid startup delays
             from sentence_transformers import SentenceTransformer
-            import chromadb
+            import chromadb  # noqa: F401 - fail early when the vector store is unavailable
             
             # Initialize sentence transformer
             self.model = SentenceTransformer(self.model_name)
             logger.info(f"✅ Loaded embedding model: {self.model_name}")
             
-            # Initialize ChromaDB
-            chroma_path = "./data/chroma_db"
-            os.makedirs(chroma_path, exist_ok=True)
-            
-            self.chroma_client = chromadb.PersistentClient(path=chroma_path)
-            
-            # Get or create collection
-            self.collection = self.chroma_client.get_or_create_collection(
-                name="creative_documents",
-                metadata={"description": "Creative RAG document embeddings"}
-            )
+            # Initialize ChromaDB through the shared client
+            self.chroma_client = vector_store.get_client(vector_store.DEFAULT_CHROMA_PATH)
+            self.collection = vector_store.get_collection(vector_store.DEFAULT_CHROMA_PATH)
             
             self.initialized = True
             logger.info("✅ ChromaDB initialized successfully")
@@ -122,7 +117,8 @@ class SimpleEmbeddingService:
                 chunk_metadata.append(meta)
             
             # Store in ChromaDB
-            self.collection.add(
+            replaced = self._store_chunks(
+                document_id,
                 embeddings=embeddings.tolist(),
                 documents=chunks,
                 metadatas=chunk_metadata,
@@ -133,12 +129,65 @@ class SimpleEmbeddingService:
                 "success": True,
                 "message": f"✅ Embedded {len(chunks)} chunks",
                 "chunks_created": len(chunks),
+                "chunks_replaced": replaced,
                 "total_tokens": sum(len(chunk.split()) for chunk in chunks)
             }
             
         except Exception as e:
             return {"success": False, "error": f"Embedding failed: {str(e)}"}
     
+    def copy_document_embeddings(self, source_id: str, document_id: str, metadata: Dict = None) -> Dict:
+        """Reuse the chunk vectors of a document with identical content"""
+        if not self.initialized and not self.initialize():
+            return {"success": False, "error": "Embedding service not available"}
+        
+        try:
+            existing = self.collection.get(
+                where={"document_id": source_id},
+                include=["embeddings", "documents", "metadatas"]
+            )
+            if not existing["ids"]:
+                return {"success": False, "error": f"No embeddings found for {source_id}"}
+            
+            chunk_metadata = []
+            for meta in existing["metadatas"]:
+                meta = dict(meta)
+                meta["document_id"] = document_id
+                if metadata:
+                    meta.update(metadata)
+                chunk_metadata.append(meta)
+            
+            replaced = self._store_chunks(
+                document_id,
+                embeddings=existing["embeddings"],
+                documents=existing["documents"],
+                metadatas=chunk_metadata,
+                ids=[f"{document_id}_chunk_{meta['chunk_index']}" for meta in chunk_metadata]
+            )
+            
+            return {
+                "success": True,
+                "message": f"♻️ Reused {len(chunk_metadata)} chunks from {source_id}",
+                "chunks_created": len(chunk_metadata),
+                "chunks_replaced": replaced,
+                "total_tokens": sum(meta.get("word_count", 0) for meta in chunk_metadata),
+                "reused_from": source_id
+            }
+            
+        except Exception as e:
+            return {"success": False, "error": f"Embedding reuse failed: {str(e)}"}
+    
+    def _store_chunks(self, document_id: str, ids: List[str], **chunks) -> int:
+        """Write a document's chunks, replacing any it already had; returns how many it had"""
+        previous = self.collection.get(where={"document_id": document_id}, include=[])["ids"]
+        self.collection.upsert(ids=ids, **chunks)
+        
+        # A shorter re-embed leaves chunks past the new end behind
+        stale = sorted(set(previous) - set(ids))
+        if stale:
+            self.collection.delete(ids=stale)
+        return len(previous)
+    
     def search_similar(self, query: str, limit: int = 5) -> Dict:
         """Search for similar text chunks"""
         if not self.initialized and not self.initialize():
@@ -194,21 +243,51 @@ async def embed_document(document_id: str):
     """Create embeddings for a document - Stage 5"""
     try:
         # Get document text from database
-        conn = sqlite3.connect("data/documents.db")
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        def read_document(conn):
+            cursor = conn.cursor()
+            
+            # Get document info
+            cursor.execute("SELECT * FROM documents WHERE id = ?", (document_id,))
+            doc = cursor.fetchone()
+            if not doc:
+                return None, None, None, []
+            
+            # Get extracted text; a stopped extraction leaves only a failure row
+            cursor.execute(
+                "SELECT extracted_text FROM document_text WHERE document_id = ? AND extraction_method != ?",
+                (document_id, FAILED_METHOD)
+            )
+            text_row = cursor.fetchone()
+            failure = None
+            if not text_row:
+                cursor.execute(
+                    "SELECT processing_notes FROM document_text WHERE document_id = ? AND extraction_method = ?",
+                    (document_id, FAILED_METHOD)
+                )
+                failure = cursor.fetchone()
+            
+            # Documents sharing this content may already have vectors
+            duplicate_ids = []
+            if doc["content_hash"]:
+                cursor.execute(
+                    "SELECT id FROM documents WHERE content_hash = ? AND id != ?",
+                    (doc["content_hash"], document_id)
+                )
+                duplicate_ids = [row["id"] for row in cursor.fetchall()]
+            
+            return doc, text_row, failure, duplicate_ids
         
-        # Get document info
-        cursor.execute("SELECT * FROM documents WHERE id = ?", (document_id,))
-        doc = cursor.fetchone()
+        doc, text_row, failure, duplicate_ids = await get_pool().run(read_document)
         
         if not doc:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # Get extracted text
-        cursor.execute("SELECT extracted_text FROM document_text WHERE document_id = ?", (document_id,))
-        text_row = cursor.fetchone()
-        conn.close()
+        if failure:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Text extraction failed for document {document_id}: "
+                       f"{failure['processing_notes']}. Retry extraction first!"
+            )
         
         if not text_row or not text_row["extracted_text"]:
             raise HTTPException(
@@ -224,13 +303,25 @@ async def embed_document(document_id: str):
             "upload_date": doc["upload_date"]
         }
         
-        result = service.embed_document(
-            document_id=document_id,
-            text=text_row["extracted_text"],
-            metadata=metadata
-        )
+        result = None
+        for source_id in duplicate_ids:
+            result = service.copy_document_embeddings(source_id, document_id, metadata=metadata)
+            if result["success"]:
+                break
+        
+        if not result or not result["success"]:
+            result = service.embed_document(
+                document_id=document_id,
+                text=text_row["extracted_text"],
+                metadata=metadata
+            )
         
         if result["success"]:
+            # Re-embedding replaces the document's chunks, so count only the net change
+            chunk_delta = result["chunks_created"] - result["chunks_replaced"]
+            await get_writer().submit(
+                lambda conn: library_stats.adjust_stat(conn, library_stats.EMBEDDED_CHUNKS, chunk_delta)
+            )
             return {
                 "success": True,
                 "message": f"🧠 Created embeddings for '{doc['original_filename']}'",
@@ -290,27 +381,24 @@ async def embedding_stats():
                 "initialized": True,
                 "model_name": service.model_name,
                 "total_chunks": collection_count,
-                "database_path": "./data/chroma_db"
+                "database_path": vector_store.DEFAULT_CHROMA_PATH
             }
         else:
             stats = {"initialized": False, "status": "Not initialized yet"}
         
         # Get document count from main database
-        conn = sqlite3.connect("data/documents.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM documents")
-        total_docs = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM document_text WHERE extracted_text IS NOT NULL")
-        docs_with_text = cursor.fetchone()[0]
-        conn.close()
+        counters = await get_pool().run(library_stats.read_stats)
+        total_docs = counters.get(library_stats.DOCUMENTS, 0)
+        docs_with_text = (counters.get(library_stats.TEXT_DOCUMENTS, 0)
+                          - counters.get(library_stats.METHOD_COUNT_PREFIX + FAILED_METHOD, 0))
         
         return {
             "embedding_service": stats,
             "document_stats": {
                 "total_documents": total_docs,
                 "documents_with_text": docs_with_text,
-                "ready_for_embedding": docs_with_text
+                "ready_for_embedding": docs_with_text,
+                "embedded_chunks": counters.get(library_stats.EMBEDDED_CHUNKS, 0)
             },
             "features": {
                 "semantic_search": stats.get("initialized", False),
@@ -0,0 +1,211 @@
+"""
+File Responses for Stored Documents
+Conditional, byte-range file serving without loading files into Python memory
+Part of knowNothing Creative RAG
+"""
+
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from ..services import blob_codec
+
+CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    """Requested byte range lies outside the file"""
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=" range into inclusive (start, end)
+
+    Returns None when the whole file should be sent: no header, an unknown
+    unit, or a multi-range request (which we answer with the full file).
+
+    Raises:
+        RangeNotSatisfiable: If the range starts beyond the end of the file
+    """
+    if not range_header:
+        return None
+
+    unit, _, spec = range_header.strip().partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text == "":
+            # Suffix range: the last N bytes
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, file_size - suffix), file_size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else file_size - 1
+    except ValueError:
+        return None
+
+    if start >= file_size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, file_size - 1)
+
+
+def validators_match(headers: Headers, etag: str, last_modified: float) -> bool:
+    """True if If-None-Match / If-Modified-Since say the client copy is current"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+def if_range_allows(headers: Headers, etag: str, last_modified: float) -> bool:
+    """Honour Range only if If-Range (when sent) still matches the file"""
+    if_range = headers.get("if-range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return not etag.startswith("W/") and if_range == etag
+    try:
+        return int(last_modified) <= parsedate_to_datetime(if_range).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class FileRangeResponse(Response):
+    """
+    Send all or part of a file
+    - Uses the ASGI zero-copy send extension (sendfile) when the server offers it
+    - Otherwise streams fixed-size chunks read in a worker thread
+    - Compressed blobs are inflated while streaming; ranges skip decoded bytes
+    """
+
+    def __init__(
+        self,
+        path: str,
+        file_size: int,
+        start: int = 0,
+        end: Optional[int] = None,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        compressed: bool = False
+    ):
+        self.path = path
+        self.compressed = compressed
+        self.start = start
+        self.end = file_size - 1 if end is None else end
+        self.count = max(0, self.end - self.start + 1)
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(self.count)
+        self.headers.setdefault("accept-ranges", "bytes")
+        if status_code == 206:
+            self.headers["content-range"] = f"bytes {self.start}-{self.end}/{file_size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope.get("method", "GET").upper() == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if self.compressed:
+            # Offsets refer to the inflated bytes, so decode up to the range start
+            file = anyio.wrap_file(await anyio.to_thread.run_sync(blob_codec.open_blob, self.path))
+            to_skip = self.start
+            while to_skip > 0:
+                skipped = len(await file.read(min(CHUNK_SIZE, to_skip)))
+                if not skipped:
+                    break
+                to_skip -= skipped
+        else:
+            if "http.response.zerocopysend" in extensions:
+                with open(self.path, "rb") as raw_file:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": raw_file,
+                        "offset": self.start,
+                        "count": self.count,
+                        "more_body": False
+                    })
+                return
+
+            if "http.response.pathsend" in extensions and self.status_code == 200:
+                await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+                return
+
+            file = await anyio.open_file(self.path, "rb")
+            await file.seek(self.start)
+
+        async with file:
+            remaining = self.count
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def build_file_response(
+    request_headers: Headers,
+    path: str,
+    file_size: int,
+    last_modified: float,
+    etag: str,
+    media_type: str,
+    filename: str,
+    inline: bool = True,
+    compressed: bool = False
+) -> Response:
+    """Pick 304, 416, 206 or 200 for a stored file and build the response"""
+    disposition = "inline" if inline else "attachment"
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(last_modified, usegmt=True),
+        "accept-ranges": "bytes",
+        "cache-control": "private, max-age=0, must-revalidate",
+        "content-disposition": f"{disposition}; filename*=utf-8''{quote(filename)}"
+    }
+
+    if validators_match(request_headers, etag, last_modified):
+        return Response(status_code=304, headers={k: headers[k] for k in ("etag", "last-modified", "cache-control")})
+
+    byte_range = None
+    if if_range_allows(request_headers, etag, last_modified):
+        try:
+            byte_range = parse_range_header(request_headers.get("range"), file_size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={"content-range": f"bytes */{file_size}", "etag": etag})
+
+    if byte_range is None:
+        return FileRangeResponse(path, file_size, headers=headers, media_type=media_type, compressed=compressed)
+
+    start, end = byte_range
+    return FileRangeResponse(
+        path, file_size, start, end, status_code=206, headers=headers, media_type=media_type, compressed=compressed
+    )
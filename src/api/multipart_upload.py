@@ -0,0 +1,158 @@
+"""
+Streaming Multipart Uploads
+Reads the file part of a multipart/form-data request as the body arrives
+Part of knowNothing Creative RAG
+
+FastAPI's UploadFile parameters are only filled in after Starlette has read
+and spooled the whole request body, so checks made in the handler come too
+late to spare the server an oversized or unsupported upload. This reader
+parses request.stream() itself: the file part's name and type are known as
+soon as its headers arrive, before any of its bytes are stored, and the
+bytes are then handed out through read() as the client sends them.
+"""
+
+from typing import Dict, Optional
+
+from starlette.requests import Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart before 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Bytes of boundaries, part headers and small form fields allowed on top of
+# the file itself when judging a request by its Content-Length
+FRAMING_ALLOWANCE = 64 * 1024
+
+
+class MultipartError(ValueError):
+    """Raised when the request is not a usable multipart/form-data upload"""
+
+
+class MultipartUpload:
+    """
+    The first file part of a multipart/form-data request, read incrementally
+    - open() reads just far enough to parse the file part's headers
+    - read(size) returns the part's bytes as they arrive; b"" at its end
+    - filename and content_type mirror UploadFile, so StorageManager accepts it
+    """
+
+    def __init__(self, request: Request, field_name: str = "file"):
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+            raise MultipartError("Expected a multipart/form-data upload")
+
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+
+        self._chunks = request.stream().__aiter__()
+        self._buffer = bytearray()
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._in_file = False
+        self._file_done = False
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    async def open(self) -> str:
+        """
+        Read until the file part's headers have been parsed
+
+        Returns:
+            str: The uploaded file's name
+
+        Raises:
+            MultipartError: If the body ends without a file part
+        """
+        while self.filename is None:
+            if not await self._pump():
+                raise MultipartError("No file provided")
+        return self.filename
+
+    async def read(self, size: int = -1) -> bytes:
+        """Up to size bytes of the file part (all that is left for size < 0)"""
+        while (size < 0 or len(self._buffer) < size) and not self._file_done:
+            if not await self._pump():
+                raise MultipartError("Upload ended before the file was complete")
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def _pump(self) -> bool:
+        """Feed the next body chunk to the parser; False once the body is exhausted"""
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._parser.finalize()
+            return False
+        if chunk:
+            self._parser.write(chunk)
+        return True
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self):
+        if self.filename is not None:
+            return  # only the first file part is read
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        filename = options.get(b"filename")
+        if name == self.field_name and filename is not None:
+            self.filename = filename.decode("utf-8", "replace")
+            self.content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
+            self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._buffer += data[start:end]
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._file_done = True
+
+
+def declared_body_size(request: Request) -> Optional[int]:
+    """The request's Content-Length, if it sent a valid one"""
+    value = request.headers.get("content-length", "")
+    return int(value) if value.isdigit() else None
+
+
+# Request body schema for the docs, since the handler reads the body itself
+UPLOAD_OPENAPI: Dict = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
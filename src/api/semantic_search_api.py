@@ -7,9 +7,12 @@ from fastapi import APIRouter, HTTPException, Query, Body
 from fastapi.responses import JSONResponse
 from typing import Dict, Any, Optional
 import logging
+import sqlite3
 from datetime import datetime
 
 from ..services.creative_embedding_service import CreativeEmbeddingService
+from ..services.database import get_pool
+from ..services.text_extractor import FAILED_METHOD
 
 logger = logging.getLogger(__name__)
 
@@ -188,32 +191,31 @@ async def generate_document_embeddings(document_id: str) -> Dict[str, Any]:
             }
         
         # Get document text from the text extraction service
-        import sqlite3
         try:
-            conn = sqlite3.connect("data/documents.db")
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Get extracted text
-            cursor.execute("""
+            pool = get_pool()
+            text_row = await pool.fetchone("""
                 SELECT extracted_text, word_count, character_count
                 FROM document_text 
-                WHERE document_id = ?
-            """, (document_id,))
-            
-            text_row = cursor.fetchone()
+                WHERE document_id = ? AND extraction_method != ?
+            """, (document_id, FAILED_METHOD))
             
-            # Get document metadata
-            cursor.execute("""
+            doc_row = await pool.fetchone("""
                 SELECT original_filename, file_type
                 FROM documents 
                 WHERE id = ?
             """, (document_id,))
             
-            doc_row = cursor.fetchone()
-            conn.close()
-            
             if not text_row:
+                failed = await pool.fetchone(
+                    "SELECT processing_notes FROM document_text WHERE document_id = ? AND extraction_method = ?",
+                    (document_id, FAILED_METHOD)
+                )
+                if failed:
+                    raise HTTPException(
+                        status_code=409,
+                        detail=f"📄 Text extraction failed for document {document_id}: "
+                               f"{failed['processing_notes']}. Retry extraction first!"
+                    )
                 raise HTTPException(
                     status_code=404,
                     detail=f"📄 No extracted text found for document {document_id}. Extract text first!"
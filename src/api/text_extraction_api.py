@@ -7,19 +7,31 @@ Part of knowNothing Creative RAG
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import JSONResponse
 from typing import Dict, Any, Optional
+import bisect
 import logging
 from datetime import datetime
 
-from ..services.text_extractor import TextExtractor
+from ..services.text_extractor import PAGE_SEPARATOR, TextExtractor
+from ..services.extraction_jobs import JOB_CANCELLED, ExtractionJobManager
 
 logger = logging.getLogger(__name__)
 
 # Create router with prefix
 router = APIRouter(prefix="/api/text", tags=["Text Extraction"])
 
+MAX_PAGES_PER_REQUEST = 100
+
 # Initialize text extractor
 text_extractor = TextExtractor()
 
+# Batch extract-all jobs; interrupted jobs resume when the app starts
+extraction_jobs = ExtractionJobManager(text_extractor)
+router.add_event_handler("startup", extraction_jobs.resume_jobs)
+router.add_event_handler("shutdown", extraction_jobs.stop)
+
+# Stop extraction worker processes with the app
+router.add_event_handler("shutdown", text_extractor.extraction_pool.shutdown)
+
 # CRITICAL FIX: Put specific routes BEFORE parameterized routes
 # Statistics endpoint MUST come before /{document_id} route
 
@@ -53,7 +65,7 @@ async def get_text_extraction_stats() -> Dict[str, Any]:
                 "Text extraction enables search and AI analysis"
             ],
             "capabilities": {
-                "formats_supported": ["TXT", "PDF (if PyPDF2 installed)", "DOCX (if python-docx installed)"],
+                "formats_supported": ["TXT", "RTF", "PDF (if PyMuPDF or PyPDF2 installed)", "DOCX"],
                 "features": [
                     "Automatic text cleaning and normalization",
                     "Word and character counting",
@@ -72,29 +84,72 @@ async def get_text_extraction_stats() -> Dict[str, Any]:
             detail=f"🔧 Couldn't get extraction stats: {str(e)}"
         )
 
-@router.post("/extract-all")
-async def extract_all_documents() -> Dict[str, Any]:
+@router.post("/extract-all", status_code=202)
+async def extract_all_documents(
+    concurrency: Optional[int] = Query(default=None, ge=1, le=ExtractionJobManager.MAX_CONCURRENCY,
+                                       description="Documents extracted at once (default: extraction workers)")
+) -> Dict[str, Any]:
     """
     Extract text from all documents that don't have text extracted yet
     
-    Batch process all your creative documents!
+    Starts a background job and returns its ID right away. Only one job
+    runs at a time; if one is already running, that job is returned.
     """
     logger.info("📄 Starting batch text extraction")
     
     try:
-        return {
-            "success": True,
-            "message": "🚧 Batch extraction feature coming soon!",
-            "recommendation": "For now, extract text from individual documents using POST /api/text/extract/{document_id}",
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
+        job, created = await extraction_jobs.start_job(concurrency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Batch extraction failed: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"🔧 Batch extraction failed: {str(e)}"
         )
+    
+    return {
+        "success": True,
+        "message": "📄 Batch extraction started" if created else "📄 Batch extraction already running",
+        "job_id": job["job_id"],
+        "created": created,
+        "job": job,
+        "status_url": f"/api/text/jobs/{job['job_id']}",
+        "cancel_url": f"/api/text/jobs/{job['job_id']}/cancel",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_extraction_job(job_id: str) -> Dict[str, Any]:
+    """Progress, throughput and per-document failures of a batch extraction job"""
+    job = await extraction_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Extraction job '{job_id}' not found")
+    
+    return {
+        "success": True,
+        "job": job,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_extraction_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a batch extraction job once its in-flight documents finish"""
+    try:
+        job = await extraction_jobs.cancel_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Extraction job '{job_id}' not found")
+    
+    return {
+        "success": True,
+        "message": "🛑 Batch extraction cancelled" if job["status"] == JOB_CANCELLED
+                   else "🛑 Batch extraction cancelling after in-flight documents",
+        "job": job,
+        "timestamp": datetime.utcnow().isoformat()
+    }
 
 # Document-specific routes come AFTER static routes
 
@@ -247,6 +302,38 @@ async def get_extracted_text(
             detail=f"🔧 Couldn't get extracted text: {str(e)}"
         )
 
+@router.get("/{document_id}/pages")
+async def get_document_pages(
+    document_id: str,
+    start: int = Query(default=1, ge=1, description="First page (1-based)"),
+    end: Optional[int] = Query(default=None, ge=1, description="Last page, inclusive"),
+) -> Dict[str, Any]:
+    """
+    Get the text of a range of PDF pages
+    
+    Pages are available as soon as their part of the document has been
+    extracted, before the whole document is finished.
+    """
+    end = end if end is not None else start + MAX_PAGES_PER_REQUEST - 1
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if end - start + 1 > MAX_PAGES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGES_PER_REQUEST} pages per request")
+    
+    result = await text_extractor.get_pages(document_id, start, end)
+    if not result["pages"] and not result["complete"]:
+        raise HTTPException(
+            status_code=404,
+            detail=f"📄 No extracted pages found for document '{document_id}'. Try extracting it first!"
+        )
+    
+    return {
+        "success": True,
+        "message": f"📖 {len(result['pages'])} page(s) retrieved",
+        **result,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 @router.post("/{document_id}/search")
 async def search_in_document(
     document_id: str,
@@ -264,14 +351,27 @@ async def search_in_document(
     try:
         text_data = await text_extractor.get_extracted_text(document_id)
         
-        if not text_data:
-            raise HTTPException(
-                status_code=404,
-                detail=f"📄 Document text not found. Extract text first!"
-            )
+        if text_data:
+            text = text_data["text"]
+            page_starts = await text_extractor.get_page_offsets(document_id)
+        else:
+            # A PDF still being extracted is searchable in the pages done so far
+            partial = await text_extractor.get_pages(document_id)
+            if not partial["pages"]:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"📄 Document text not found. Extract text first!"
+                )
+            pages = [page for page in partial["pages"] if page["text"]]
+            text = PAGE_SEPARATOR.join(page["text"] for page in pages)
+            page_starts = []
+            offset = 0
+            for page in pages:
+                page_starts.append((offset, page["page_number"]))
+                offset += len(page["text"]) + len(PAGE_SEPARATOR)
+        starts = [start for start, _ in page_starts]
         
         # Perform search
-        text = text_data["text"]
         search_text = text if case_sensitive else text.lower()
         search_query = query if case_sensitive else query.lower()
         
@@ -300,7 +400,8 @@ async def search_in_document(
             matches.append({
                 "position": pos,
                 "context": context,
-                "line_number": text[:pos].count('\n') + 1
+                "line_number": text[:pos].count('\n') + 1,
+                "page_number": page_starts[bisect.bisect_right(starts, pos) - 1][1] if starts else None
             })
             
             start = pos + 1
@@ -312,6 +413,7 @@ async def search_in_document(
             "query": query,
             "matches": matches[:50],  # Limit to 50 matches
             "total_matches": len(matches),
+            "partial_text": not text_data,
             "search_options": {
                 "case_sensitive": case_sensitive,
                 "whole_words": whole_words
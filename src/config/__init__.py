@@ -0,0 +1,45 @@
+from pydantic_settings import BaseSettings
+
+class Settings(BaseSettings):
+    DEBUG: bool = True
+    LOG_LEVEL: str = "INFO"
+
+    # Blob storage codec: "none", "zlib" or "zstd" (zstd needs the zstandard package)
+    STORAGE_COMPRESSION: str = "none"
+    STORAGE_COMPRESSION_LEVEL: int = 6
+
+    # Orphan reconciler: seconds between sweeps (0 disables), rows/files per batch,
+    # and how old an unreferenced file must be before it is quarantined
+    ORPHAN_RECONCILE_INTERVAL: int = 3600
+    ORPHAN_RECONCILE_BATCH_SIZE: int = 500
+    ORPHAN_GRACE_PERIOD: int = 3600
+    QUARANTINE_DIR: str = "data/quarantine"
+
+    # In-process LRU caches, bounded by approximate bytes held
+    DOCUMENT_CACHE_BYTES: int = 8 * 1024 * 1024
+    TEXT_CACHE_BYTES: int = 64 * 1024 * 1024
+
+    # Text extraction worker processes (0 = one per spare CPU, up to 4), seconds
+    # before a task is abandoned, per-worker address space limit (0 = none) and
+    # tasks before a worker is replaced
+    EXTRACTION_WORKERS: int = 0
+    EXTRACTION_TIMEOUT: float = 300.0
+    EXTRACTION_MEMORY_LIMIT_MB: int = 2048
+    EXTRACTION_TASKS_PER_CHILD: int = 50
+
+    # Resident memory a worker may use before its task is stopped (0 = no
+    # check; Linux only) and seconds one document's extraction may take in
+    # all, across its tasks (0 = no limit)
+    EXTRACTION_RSS_LIMIT_MB: int = 1024
+    EXTRACTION_DOCUMENT_TIMEOUT: float = 900.0
+
+    # PDF pages per extraction task; larger PDFs are split across workers
+    PDF_PAGES_PER_TASK: int = 16
+
+    # PDF library: "pymupdf", "pypdf2" or "auto" to calibrate both on each document
+    PDF_BACKEND: str = "auto"
+
+    # Extraction results kept by content hash and extractor version
+    EXTRACTION_CACHE_MAX_MB: int = 512
+
+settings = Settings()
@@ -0,0 +1,196 @@
+"""
+Archive Import
+Bulk library ingestion from zip and tar archives, one member at a time
+Part of knowNothing Creative RAG
+"""
+
+import asyncio
+import logging
+import lzma
+import mimetypes
+import tarfile
+import time
+import zipfile
+import zlib
+from pathlib import PurePosixPath
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .storage_manager import StorageManager
+
+logger = logging.getLogger(__name__)
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# (member name, uncompressed size, opener for its content stream)
+Member = Tuple[str, int, Callable[[], BinaryIO]]
+
+# Raised while opening or inflating one damaged member (bad local header,
+# corrupt deflate/lzma data, truncated entry, unsupported method, encrypted
+# zip member); the members after it can usually still be read
+CORRUPT_MEMBER_ERRORS = (zipfile.BadZipFile, tarfile.TarError, zlib.error, lzma.LZMAError,
+                         EOFError, NotImplementedError, RuntimeError)
+
+
+class _MemberStream:
+    """Async read() over a blocking archive member stream, for StorageManager.receive_stream"""
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+
+    async def read(self, size: int) -> bytes:
+        return await asyncio.to_thread(self._raw.read, size)
+
+
+class ArchiveImporter:
+    """
+    Imports every supported file in a zip or tar archive
+    - Members are decompressed and streamed straight into the blob store;
+      the archive is never unpacked to disk
+    - Tar archives are read as a forward-only stream; zip archives use their
+      central directory and open one member at a time
+    - Extension filter, size limit and content dedup as for single uploads
+    - Metadata inserts are gathered so they share group commits
+    """
+
+    COMMIT_BATCH = 64  # documents in flight before waiting for their commits
+
+    def __init__(self, storage: StorageManager):
+        self.storage = storage
+
+    @staticmethod
+    def archive_kind(filename: str) -> Optional[str]:
+        """'zip', 'tar' or None, judged from the archive's file name"""
+        name = filename.lower()
+        if name.endswith('.zip'):
+            return 'zip'
+        if name.endswith(TAR_SUFFIXES):
+            return 'tar'
+        return None
+
+    async def import_archive(self, archive: BinaryIO, archive_name: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Import an archive, yielding a progress event per member and a summary
+
+        Args:
+            archive: Readable binary file object (seekable for zip archives)
+            archive_name: Archive file name, used to detect the format
+
+        Yields:
+            Dict: {"event": "member", ...} for each file, then {"event": "done", ...}.
+                A member whose data is corrupt gets status "error" (counted as
+                failed) and the import moves on to the next member
+
+        Raises:
+            ValueError: If the archive format is not supported
+        """
+        kind = self.archive_kind(archive_name)
+        if kind is None:
+            raise ValueError(f"Unsupported archive {archive_name}. Use .zip or {', '.join(TAR_SUFFIXES)}")
+
+        members = self._zip_members(archive) if kind == 'zip' else self._tar_members(archive)
+        totals = {"processed": 0, "stored": 0, "deduplicated": 0, "skipped": 0, "failed": 0, "bytes": 0}
+        pending: List[Tuple[str, asyncio.Task]] = []
+        started = time.perf_counter()
+
+        try:
+            while True:
+                try:
+                    member = await asyncio.to_thread(next, members, None)
+                except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+                    yield {"event": "error", "error": f"Unreadable archive: {e}", **totals}
+                    break
+                if member is None:
+                    break
+                name, size, open_member = member
+                totals["processed"] += 1
+
+                reason = self._skip_reason(name, size)
+                if reason:
+                    totals["skipped"] += 1
+                    yield {"event": "member", "name": name, "status": "skipped", "reason": reason, **totals}
+                    continue
+
+                filename = PurePosixPath(name).name
+                try:
+                    raw = await asyncio.to_thread(open_member)
+                    with raw:
+                        received = await self.storage.receive_stream(_MemberStream(raw), filename, size)
+                except CORRUPT_MEMBER_ERRORS as e:
+                    totals["failed"] += 1
+                    logger.warning(f"⚠️ Corrupt member {name} in {archive_name}: {e}")
+                    yield {"event": "member", "name": name, "status": "error",
+                           "error": f"Corrupt archive member: {e}", **totals}
+                    continue
+                except (ValueError, OSError) as e:
+                    totals["failed"] += 1
+                    yield {"event": "member", "name": name, "status": "failed", "error": str(e), **totals}
+                    continue
+
+                mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                pending.append((name, asyncio.create_task(self.storage.commit_received(received, mime_type))))
+                totals["bytes"] += received.file_size
+
+                if len(pending) >= self.COMMIT_BATCH:
+                    for event in await self._finish(pending, totals):
+                        yield event
+                    pending = []
+
+            for event in await self._finish(pending, totals):
+                yield event
+            pending = []
+
+        finally:
+            # Never leave commits running unobserved if the client goes away
+            if pending:
+                await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+            members.close()
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"✅ Imported {archive_name}: {totals['stored']} stored, {totals['deduplicated']} deduplicated, "
+                    f"{totals['skipped']} skipped, {totals['failed']} failed in {elapsed:.1f}s")
+        yield {"event": "done", "archive": archive_name, "elapsed_s": round(elapsed, 3), **totals}
+
+    async def _finish(self, pending: List[Tuple[str, asyncio.Task]], totals: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Wait for a batch of commits and turn them into progress events"""
+        results = await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+        events = []
+        for (name, _), result in zip(pending, results):
+            if isinstance(result, Exception):
+                totals["failed"] += 1
+                events.append({"event": "member", "name": name, "status": "failed", "error": str(result), **totals})
+                continue
+            document_id, deduplicated = result
+            status = "deduplicated" if deduplicated else "stored"
+            totals[status] += 1
+            events.append({"event": "member", "name": name, "status": status, "document_id": document_id, **totals})
+        return events
+
+    def _skip_reason(self, name: str, size: int) -> Optional[str]:
+        path = PurePosixPath(name)
+        if any(part.startswith('.') or part == '__MACOSX' for part in path.parts):
+            return "hidden or system file"
+        extension = path.suffix.lower()
+        if extension not in self.storage.ALLOWED_EXTENSIONS:
+            return f"file type {extension or '(none)'} not supported"
+        if size > self.storage.MAX_FILE_SIZE:
+            return f"larger than {self.storage.MAX_FILE_SIZE // (1024 * 1024)}MB"
+        return None
+
+    @staticmethod
+    def _zip_members(archive: BinaryIO) -> Iterator[Member]:
+        """Regular files in a zip, each opened only if imported (worker thread)"""
+        with zipfile.ZipFile(archive) as zip_file:
+            for info in zip_file.infolist():
+                if info.is_dir():
+                    continue
+                yield info.filename, info.file_size, lambda info=info: zip_file.open(info)
+
+    @staticmethod
+    def _tar_members(archive: BinaryIO) -> Iterator[Member]:
+        """Regular files in a tar, read strictly front to back (worker thread)"""
+        with tarfile.open(fileobj=archive, mode="r|*") as tar_file:
+            for member in tar_file:
+                if not member.isfile():
+                    continue
+                # Only valid until the stream moves on to the next member
+                yield member.name, member.size, lambda member=member: tar_file.extractfile(member)
@@ -0,0 +1,172 @@
+"""
+Blob Storage Codec
+Optional transparent compression for stored uploads
+Part of knowNothing Creative RAG
+
+A compressed blob starts with a 5-byte header (4-byte magic plus a codec id)
+followed by a single zlib or zstd stream of the original bytes. Files without
+the header are read as-is, so uncompressed and legacy blobs need no migration.
+Content hashes and sizes recorded for documents always describe the original
+bytes.
+"""
+
+import io
+import logging
+import shutil
+import tempfile
+import zlib
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CODEC_NONE = "none"
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+MAGIC = b"\x89KNZ"
+HEADER_SIZE = len(MAGIC) + 1
+_CODEC_IDS = {CODEC_ZLIB: 1, CODEC_ZSTD: 2}
+_CODEC_NAMES = {codec_id: name for name, codec_id in _CODEC_IDS.items()}
+
+READ_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 16 * 1024 * 1024
+
+# Formats that are already deflate-compressed internally: PDF content streams
+# and DOCX (a zip archive) gain almost nothing and would pay to decompress
+INCOMPRESSIBLE_TYPES = {'.pdf', '.docx'}
+
+
+def resolve_codec(name: Optional[str]) -> str:
+    """
+    Validate a configured codec name
+
+    zstd falls back to zlib when the zstandard package is not installed.
+
+    Raises:
+        ValueError: If the codec is unknown
+    """
+    codec = (name or CODEC_NONE).strip().lower()
+    if codec not in (CODEC_NONE, CODEC_ZLIB, CODEC_ZSTD):
+        raise ValueError(f"Unknown storage codec '{name}'. Use none, zlib or zstd")
+    if codec == CODEC_ZSTD and not ZSTD_AVAILABLE:
+        logger.warning("⚠️ zstd storage codec requested but zstandard is not installed; using zlib")
+        return CODEC_ZLIB
+    return codec
+
+
+def codec_for(file_type: str, codec: str) -> str:
+    """Codec to use for one file type under the per-type policy"""
+    if file_type.lower() in INCOMPRESSIBLE_TYPES:
+        return CODEC_NONE
+    return codec
+
+
+def header(codec: str) -> bytes:
+    """Header written before a compressed stream"""
+    return MAGIC + bytes([_CODEC_IDS[codec]])
+
+
+def make_compressor(codec: str, level: int = 6):
+    """Incremental compressor exposing compress(data) and flush()"""
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    return zlib.compressobj(level)
+
+
+def _make_decompressor(codec: str):
+    if codec == CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ValueError("Blob is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj()
+
+
+def _parse_header(prefix: bytes) -> str:
+    if len(prefix) == HEADER_SIZE and prefix.startswith(MAGIC):
+        codec = _CODEC_NAMES.get(prefix[-1])
+        if codec:
+            return codec
+    return CODEC_NONE
+
+
+def read_codec(path) -> str:
+    """Codec of a stored blob, judged from its header"""
+    with open(path, "rb") as file:
+        return _parse_header(file.read(HEADER_SIZE))
+
+
+class _DecompressingReader(io.RawIOBase):
+    """Read-only raw stream that inflates a compressed blob as it is read"""
+
+    def __init__(self, raw: BinaryIO, codec: str):
+        self._raw = raw
+        self._decompressor = _make_decompressor(codec)
+        self._pending = memoryview(b"")
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._eof:
+            data = self._raw.read(READ_SIZE)
+            if data:
+                self._pending = memoryview(self._decompressor.decompress(data))
+            else:
+                tail = self._decompressor.flush() if hasattr(self._decompressor, "flush") else b""
+                self._pending = memoryview(tail)
+                self._eof = True
+
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+
+def open_blob(path) -> BinaryIO:
+    """
+    Open a stored blob for sequential reading of its original bytes
+
+    Compressed blobs are inflated on the fly; plain files are returned as-is
+    (and remain seekable).
+    """
+    raw = open(path, "rb")
+    try:
+        codec = _parse_header(raw.read(HEADER_SIZE))
+        if codec == CODEC_NONE:
+            raw.seek(0)
+            return raw
+        return io.BufferedReader(_DecompressingReader(raw, codec), READ_SIZE)
+    except Exception:
+        raw.close()
+        raise
+
+
+@contextmanager
+def open_seekable(path) -> Iterator[BinaryIO]:
+    """
+    Open a blob for parsers that need random access (PDF, DOCX)
+
+    Plain files are opened directly; compressed blobs are inflated into a
+    spooled temporary file that stays in memory up to SPOOL_MAX_MEMORY.
+    """
+    with open_blob(path) as source:
+        if source.seekable():
+            yield source
+            return
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            shutil.copyfileobj(source, spool, READ_SIZE)
+            spool.seek(0)
+            yield spool
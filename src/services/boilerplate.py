@@ -0,0 +1,130 @@
+"""
+PDF Boilerplate Removal
+Finds running headers and footers repeated across pages and strips them
+Part of knowNothing Creative RAG
+
+Only the first and last few lines of each page are considered, and each is
+keyed by its offset from the page edge: a header candidate is "the 2nd line
+from the top reads X", not "X appears somewhere near the top". Lines are
+compared with digits masked, so "Page 3 of 90" and "Page 4 of 90" count as
+the same line. A line that looks like a page number is boilerplate when it
+sits at the same offset on half the pages with text; any other running
+title must do so on nearly all of them, so dialogue cues and short lines
+that merely recur near page edges stay. Only an unbroken run of such lines
+starting at the edge is removed.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import FrozenSet, Iterable, Sequence, Tuple
+
+# Lines at each edge of a page that may be a header or footer
+EDGE_LINES = 4
+
+# A line is boilerplate when it sits at the same offset from the same edge of
+# at least MIN_PAGES pages, and at least this share of the pages with text
+MIN_PAGES = 3
+PAGE_NUMBER_SHARE = 0.5
+TITLE_SHARE = 0.9
+
+# Running heads are short; longer lines are always kept
+MAX_LINE_LENGTH = 120
+
+_DIGITS = re.compile(r'\d+')
+_SPACES = re.compile(r'\s+')
+
+# Page number keys after digit masking: "#", "#.", "page #", "page # of #", "- # -", "#/#", "(#)"
+_PAGE_NUMBER = re.compile(r'(page |p\. ?)?#(\.| of #| / #|/#)?|- ?# ?-|\(#\)|\[#\]')
+
+# (top-of-page keys from the top down, bottom-of-page keys from the bottom up) of one page
+EdgeKeys = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+# (offset from the edge, key) of lines repeated across pages
+EdgeLines = FrozenSet[Tuple[int, str]]
+
+
+def line_key(line: str) -> str:
+    """A line as compared across pages: digits masked, spacing and case ignored; "" if too long to match"""
+    if len(line) > MAX_LINE_LENGTH:
+        return ""
+    return _SPACES.sub(' ', _DIGITS.sub('#', line)).strip().lower()
+
+
+def looks_like_page_number(key: str) -> bool:
+    """True for keys such as "#", "page # of #" or "- # -\""""
+    return bool(_PAGE_NUMBER.fullmatch(key))
+
+
+def edge_keys(text: str) -> EdgeKeys:
+    """Keys of the first and last EDGE_LINES non-empty lines of a page, each counted from its edge"""
+    keys = [line_key(line) for line in text.split('\n') if line.strip()]
+    return tuple(keys[:EDGE_LINES]), tuple(reversed(keys[-EDGE_LINES:]))
+
+
+def find_repeated(pages: Iterable[EdgeKeys]) -> Tuple[EdgeLines, EdgeLines]:
+    """
+    Header and footer lines repeated across a document's pages
+
+    Args:
+        pages: edge_keys() of every page with text
+
+    Returns:
+        Tuple of header and footer (offset, key) pairs (both empty for short documents)
+    """
+    page_count = 0
+    tops: Counter = Counter()
+    bottoms: Counter = Counter()
+    for top, bottom in pages:
+        page_count += 1
+        tops.update(enumerate(top))
+        bottoms.update(enumerate(bottom))
+
+    def repeated(counts: Counter) -> EdgeLines:
+        return frozenset(
+            (offset, key) for (offset, key), count in counts.items()
+            if key and count >= max(
+                MIN_PAGES,
+                math.ceil(page_count * (PAGE_NUMBER_SHARE if looks_like_page_number(key) else TITLE_SHARE))
+            )
+        )
+
+    return repeated(tops), repeated(bottoms)
+
+
+def edge_run(keys: Sequence[str], repeated: EdgeLines) -> int:
+    """How many lines from the edge, keys listed from the edge inward, are repeated lines in place"""
+    run = 0
+    for offset, key in enumerate(keys[:EDGE_LINES]):
+        if (offset, key) not in repeated:
+            break
+        run += 1
+    return run
+
+
+def has_repeated(edges: EdgeKeys, headers: EdgeLines, footers: EdgeLines) -> bool:
+    """True if strip_repeated may remove something from the page with these edge keys"""
+    top, bottom = edges
+    return bool(edge_run(top, headers) or edge_run(bottom, footers))
+
+
+def strip_repeated(text: str, headers: EdgeLines, footers: EdgeLines) -> Tuple[str, int]:
+    """
+    Remove the run of header lines at the top of a page and of footer lines at its bottom
+
+    A page made of nothing but such lines is left as it is, so a document
+    whose pages all look alike does not lose its content.
+
+    Returns:
+        Tuple of the page text and the number of lines removed
+    """
+    lines = text.split('\n')
+    filled = [index for index, line in enumerate(lines) if line.strip()]
+    keys = [line_key(lines[index]) for index in filled]
+    top = edge_run(keys, headers)
+    bottom = edge_run(keys[::-1], footers)
+
+    if not (top or bottom) or top + bottom >= len(filled):
+        return text, 0
+    removed = set(filled[:top]) | set(filled[len(filled) - bottom:])
+    return '\n'.join(line for index, line in enumerate(lines) if index not in removed), len(removed)
@@ -0,0 +1,147 @@
+"""
+Byte-Budgeted Cache
+In-process LRU caches bounded by approximate memory use rather than entry count
+Part of knowNothing Creative RAG
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+from ..config import settings
+
+# Caches shared by every service in the process, by name
+_caches: Dict[str, "ByteBudgetLRU"] = {}
+_caches_lock = threading.Lock()
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory held by a value: strings, bytes and simple containers"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class ByteBudgetLRU:
+    """
+    Least-recently-used cache holding at most max_bytes of values
+    - Entries larger than the whole budget are never stored
+    - A generation counter lets readers drop results that raced an invalidation:
+      take generation before reading the source, pass it to put()
+    - Hit, miss and eviction counters for sizing the budget
+    """
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._generation = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._rejected = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value (or None) and mark it most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None, size: Optional[int] = None):
+        """
+        Cache a value, evicting least recently used entries to stay in budget
+
+        Args:
+            key: Cache key
+            value: Value to cache; callers must treat it as immutable
+            generation: generation read before the value was loaded; the put is
+                skipped if an invalidation happened since
+            size: Size in bytes if already known
+        """
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if size > self.max_bytes:
+                self._rejected += 1
+                return
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        """Drop entries whose source changed"""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry[1]
+                    self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Occupancy and effectiveness counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "rejected_too_large": self._rejected
+            }
+
+
+def get_cache(name: str, max_bytes: int) -> ByteBudgetLRU:
+    """Get the process-wide cache with this name, creating it on first use"""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = ByteBudgetLRU(name, max_bytes)
+            _caches[name] = cache
+        return cache
+
+
+def document_cache() -> ByteBudgetLRU:
+    """documents rows keyed by (db_path, document_id)"""
+    return get_cache("documents", settings.DOCUMENT_CACHE_BYTES)
+
+
+def text_cache() -> ByteBudgetLRU:
+    """document_text results keyed by (db_path, document_id)"""
+    return get_cache("extracted_text", settings.TEXT_CACHE_BYTES)
@@ -14,6 +14,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import hashlib
 
+from . import vector_store
+
 # Embedding libraries (with graceful fallbacks)
 try:
     from sentence_transformers import SentenceTransformer
@@ -23,8 +25,7 @@ except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
 
 try:
-    import chromadb
-    from chromadb.config import Settings
+    import chromadb  # noqa: F401
     CHROMADB_AVAILABLE = True
 except ImportError:
     CHROMADB_AVAILABLE = False
@@ -47,7 +48,7 @@ class CreativeEmbeddingService:
         self, 
         model_name: str = "all-MiniLM-L6-v2",
         db_path: str = "data/documents.db",
-        chroma_path: str = "data/chroma_db"
+        chroma_path: str = vector_store.DEFAULT_CHROMA_PATH
     ):
         self.model_name = model_name
         self.db_path = db_path
@@ -82,19 +83,9 @@ class CreativeEmbeddingService:
             # Initialize ChromaDB
             if CHROMADB_AVAILABLE:
                 logger.info("🗄️ Initializing ChromaDB vector database")
-                self.chroma_client = chromadb.PersistentClient(
-                    path=str(self.chroma_path),
-                    settings=Settings(
-                        anonymized_telemetry=False,
-                        allow_reset=True
-                    )
-                )
-                
-                # Create or get collection for creative documents
-                self.collection = self.chroma_client.get_or_create_collection(
-                    name="creative_documents",
-                    metadata={"description": "Creative documents with semantic embeddings"}
-                )
+                # Shared with the other services so they see the same store
+                self.chroma_client = vector_store.get_client(str(self.chroma_path))
+                self.collection = vector_store.get_collection(str(self.chroma_path))
                 logger.info("✅ ChromaDB collection ready")
             else:
                 logger.warning("⚠️ ChromaDB not available. Install with: poetry add chromadb")
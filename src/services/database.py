@@ -0,0 +1,214 @@
+"""
+Shared SQLite Connection Manager
+Pooled, WAL-mode connections to the documents database
+Part of knowNothing Creative RAG
+"""
+
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, Callable, List, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "data/documents.db"
+
+T = TypeVar("T")
+
+
+class ConnectionPool:
+    """
+    Bounded pool of tuned SQLite connections for one database file
+    - WAL journaling so readers never block the writer
+    - synchronous=NORMAL, mmap and a larger page cache
+    - busy_timeout instead of immediate "database is locked" errors
+    - Tracks how long callers wait for a free connection
+    - run()/fetchone()/fetchall() keep blocking SQLite calls off the event loop
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        pool_size: int = 8,
+        busy_timeout_ms: int = 5000,
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size_kb: int = 64 * 1024
+    ):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._in_use = 0
+
+        # Wait-time metrics
+        self._acquisitions = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection with the shared pragmas applied"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        # Lets INSERT OR REPLACE fire delete triggers that keep counters exact
+        conn.execute("PRAGMA recursive_triggers = ON")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, open a new one, or wait for one to be returned"""
+        started = time.perf_counter()
+        conn = None
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.pool_size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._in_use += 1
+            self._acquisitions += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            if waited > 0.001:
+                self._waits += 1
+
+        return conn
+
+    def _release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, discarding any unfinished transaction"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            conn = self._connect()
+
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; uncommitted work is rolled back on return"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection and commit on success, roll back on error"""
+        with self.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Reader threads, one fewer than connections so the writer never starves"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.pool_size - 1),
+                    thread_name_prefix="sqlite-reader"
+                )
+            return self._executor
+
+    def _run_sync(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        with self.connection() as conn:
+            return operation(conn)
+
+    async def run(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        """Run operation(conn) on a reader thread and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self._run_sync, operation)
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
+        """Run a query off the event loop and return its first row"""
+        return await self.run(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        """Run a query off the event loop and return all rows"""
+        return await self.run(lambda conn: conn.execute(sql, params).fetchall())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Pool utilisation and wait-time statistics"""
+        with self._lock:
+            return {
+                "database_path": self.db_path,
+                "pool_size": self.pool_size,
+                "connections_open": self._opened,
+                "connections_in_use": self._in_use,
+                "acquisitions": self._acquisitions,
+                "waits": self._waits,
+                "total_wait_ms": round(self._total_wait * 1000, 3),
+                "avg_wait_ms": round(self._total_wait * 1000 / self._acquisitions, 3) if self._acquisitions else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 3)
+            }
+
+    def close_all(self):
+        """Close every idle connection (in-use connections close when returned)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = DEFAULT_DB_PATH) -> ConnectionPool:
+    """Get the process-wide connection pool for a database file"""
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[key] = pool
+            logger.info(f"🗄️ SQLite connection pool ready: {db_path}")
+        return pool
@@ -0,0 +1,170 @@
+"""
+Streaming DOCX Reader
+Paragraph and table-row text from a DOCX, read straight out of the zip with bounded memory
+Part of knowNothing Creative RAG
+
+The main document part is parsed with iterparse and every top-level
+paragraph or table row is dropped from the tree as soon as its text is
+taken, so a long manuscript never exists as a full object model. The text
+rules follow python-docx: a paragraph is its runs and hyperlink runs, a
+cell is its paragraphs joined by newlines, and merged cells repeat the
+text of the cell they merge into.
+"""
+
+import posixpath
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+from xml.etree import ElementTree
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY = _W + "body"
+_P = _W + "p"
+_R = _W + "r"
+_HYPERLINK = _W + "hyperlink"
+_TBL = _W + "tbl"
+_TR = _W + "tr"
+_TC = _W + "tc"
+_VAL = _W + "val"
+
+# Run content and its text equivalent; w:br depends on its break type
+_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+_T = _W + "t"
+_BR = _W + "br"
+_BR_TYPE = _W + "type"
+
+# Bump when the text rules change, so cached DOCX extractions are redone
+READER_VERSION = "1"
+
+_RELATIONSHIPS = "_rels/.rels"
+_OFFICE_DOCUMENT = "/officeDocument"
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+
+# Block kinds yielded by iter_blocks
+PARAGRAPH = "paragraph"
+TABLE_ROW = "row"
+TABLE_END = "table"
+
+
+def paragraph_text(paragraph: ElementTree.Element) -> str:
+    """Text of a w:p: its runs, including runs inside hyperlinks"""
+    parts = []
+    for child in paragraph:
+        if child.tag == _R:
+            _append_run_text(child, parts)
+        elif child.tag == _HYPERLINK:
+            for run in child:
+                if run.tag == _R:
+                    _append_run_text(run, parts)
+    return "".join(parts)
+
+
+def _append_run_text(run: ElementTree.Element, parts: List[str]):
+    for element in run:
+        tag = element.tag
+        if tag == _T:
+            parts.append(element.text or "")
+        elif tag == _BR:
+            # Page and column breaks have no text equivalent
+            if element.get(_BR_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag in _RUN_TEXT:
+            parts.append(_RUN_TEXT[tag])
+
+
+# Cells of a table row by starting layout-grid offset, as (text, columns covered)
+RowCells = Dict[int, Tuple[str, int]]
+
+
+def row_cells(row: ElementTree.Element, above: RowCells) -> Tuple[List[str], RowCells]:
+    """
+    Cell texts of a w:tr, one per layout-grid column it covers
+
+    Args:
+        row: The row element
+        above: The previous row's cells, for vertically merged cells
+
+    Returns:
+        The cell texts, and this row's cells for the next row
+    """
+    offset = 0
+    row_properties = row.find(_W + "trPr")
+    if row_properties is not None:
+        grid_before = row_properties.find(_W + "gridBefore")
+        if grid_before is not None:
+            offset = int(grid_before.get(_VAL, 0))
+
+    cells: List[str] = []
+    current: RowCells = {}
+    for cell in row:
+        if cell.tag != _TC:
+            continue
+        span, merge = 1, None
+        cell_properties = cell.find(_W + "tcPr")
+        if cell_properties is not None:
+            grid_span = cell_properties.find(_W + "gridSpan")
+            if grid_span is not None:
+                span = int(grid_span.get(_VAL, 1))
+            vertical_merge = cell_properties.find(_W + "vMerge")
+            if vertical_merge is not None:
+                merge = vertical_merge.get(_VAL, "continue")
+
+        if merge == "continue" and offset in above:
+            # Continues a vertical merge: the cell above holds the content
+            text, columns = above[offset]
+        else:
+            text = "\n".join(paragraph_text(child) for child in cell if child.tag == _P)
+            columns = span
+        current[offset] = (text, columns)
+        cells.extend([text] * columns)
+        offset += span
+    return cells, current
+
+
+def document_part(archive: zipfile.ZipFile) -> str:
+    """Name of the main document part, from the package relationships"""
+    try:
+        with archive.open(_RELATIONSHIPS) as rels:
+            for relationship in ElementTree.parse(rels).getroot():
+                if relationship.get("Type", "").endswith(_OFFICE_DOCUMENT):
+                    return posixpath.normpath(relationship.get("Target", "").lstrip("/"))
+    except KeyError:
+        pass
+    return DEFAULT_DOCUMENT_PART
+
+
+def iter_blocks(file: BinaryIO) -> Iterator[Tuple[str, str]]:
+    """
+    Top-level paragraphs and table rows of a DOCX, in document order
+
+    Yields:
+        (PARAGRAPH, text), (TABLE_ROW, cell texts joined by " | ") and
+        (TABLE_END, "") after each top-level table's last row
+
+    Raises:
+        zipfile.BadZipFile: If the file is not a zip archive
+        KeyError: If the document part is missing
+        ElementTree.ParseError: If the document XML is malformed
+    """
+    with zipfile.ZipFile(file) as archive, archive.open(document_part(archive)) as xml:
+        stack: List[ElementTree.Element] = []
+        above: RowCells = {}
+        for event, element in ElementTree.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                continue
+            stack.pop()
+            parent = stack[-1] if stack else None
+            if parent is None:
+                continue
+
+            if parent.tag == _BODY:
+                if element.tag == _P:
+                    yield PARAGRAPH, paragraph_text(element)
+                elif element.tag == _TBL:
+                    above = {}
+                    yield TABLE_END, ""
+                parent.remove(element)  # body-level content is done with
+            elif element.tag == _TR and parent.tag == _TBL and len(stack) >= 2 and stack[-2].tag == _BODY:
+                cells, above = row_cells(element, above)
+                yield TABLE_ROW, " | ".join(cell.strip() for cell in cells)
+                parent.remove(element)
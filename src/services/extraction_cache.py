@@ -0,0 +1,195 @@
+"""
+Extraction Result Cache
+Extracted text keyed by (content hash, extractor backend, extractor version)
+Part of knowNothing Creative RAG
+
+A document whose content was already extracted by the same extractor version
+gets its text copied from the cache inside SQLite, without parsing the file.
+The cache outlives the documents it came from and is trimmed least recently
+used first once it holds more than its byte budget. Bumping a backend's
+version makes its old entries unreachable; they age out through eviction.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+# Text columns copied between document_text and the cache
+_TEXT_COLUMNS = ("extracted_text, extraction_method, word_count, character_count, "
+                 "page_count, processing_notes, text_metadata")
+_PAGE_COLUMNS = "page_number, text, word_count, character_count, char_offset"
+
+
+class CacheKey(NamedTuple):
+    content_hash: str
+    backend: str
+    version: str
+
+
+def install(conn: sqlite3.Connection):
+    """Create the cache tables (called from TextExtractor's schema setup)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS extraction_cache (
+            content_hash TEXT NOT NULL,
+            backend TEXT NOT NULL,
+            version TEXT NOT NULL,
+            extracted_text TEXT NOT NULL,
+            extraction_method TEXT NOT NULL,
+            word_count INTEGER,
+            character_count INTEGER,
+            page_count INTEGER,
+            processing_notes TEXT,
+            text_metadata JSONB,
+            size_bytes INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            last_used_at TEXT NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (content_hash, backend, version)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS extraction_cache_pages (
+            content_hash TEXT NOT NULL,
+            backend TEXT NOT NULL,
+            version TEXT NOT NULL,
+            page_number INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            word_count INTEGER NOT NULL,
+            character_count INTEGER NOT NULL,
+            char_offset INTEGER,
+            PRIMARY KEY (content_hash, backend, version, page_number)
+        )
+    """)
+    try:
+        conn.execute("ALTER TABLE extraction_cache_pages ADD COLUMN char_offset INTEGER")
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" not in str(e):
+            raise
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_lru ON extraction_cache (last_used_at)")
+
+
+class ExtractionCache:
+    """
+    Byte-budgeted LRU of extraction results in SQLite
+    - link() and store() take the writer's connection and run inside its transaction
+    - Hit and miss counters are per process, for /api/text/stats
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+
+    def link(self, conn: sqlite3.Connection, document_id: str, key: CacheKey) -> Optional[sqlite3.Row]:
+        """
+        Give a document the cached text for its content, if there is any
+
+        Returns:
+            The cache entry's metadata with a 500 character preview, or None on a miss
+        """
+        row = conn.execute("""
+            SELECT extraction_method, word_count, character_count, page_count, processing_notes,
+                   substr(extracted_text, 1, 500) AS preview
+            FROM extraction_cache WHERE content_hash = ? AND backend = ? AND version = ?
+        """, key).fetchone()
+        if row is None:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        now = datetime.utcnow().isoformat()
+        conn.execute(f"""
+            INSERT OR REPLACE INTO document_text (document_id, extraction_date, {_TEXT_COLUMNS})
+            SELECT ?, ?, {_TEXT_COLUMNS} FROM extraction_cache
+            WHERE content_hash = ? AND backend = ? AND version = ?
+        """, (document_id, now, *key))
+        conn.execute("DELETE FROM document_pages WHERE document_id = ?", (document_id,))
+        conn.execute(f"""
+            INSERT INTO document_pages (document_id, {_PAGE_COLUMNS})
+            SELECT ?, {_PAGE_COLUMNS} FROM extraction_cache_pages
+            WHERE content_hash = ? AND backend = ? AND version = ?
+        """, (document_id, *key))
+        conn.execute("UPDATE documents SET text_extracted = TRUE WHERE id = ?", (document_id,))
+        conn.execute("""
+            UPDATE extraction_cache SET last_used_at = ?, hit_count = hit_count + 1
+            WHERE content_hash = ? AND backend = ? AND version = ?
+        """, (now, *key))
+
+        with self._lock:
+            self._hits += 1
+        return row
+
+    def store(self, conn: sqlite3.Connection, document_id: str, key: CacheKey):
+        """Copy a document's freshly extracted text and pages into the cache, then trim it"""
+        size = conn.execute("""
+            SELECT length(CAST(extracted_text AS BLOB)) + COALESCE((
+                SELECT SUM(length(CAST(text AS BLOB))) FROM document_pages WHERE document_id = ?
+            ), 0)
+            FROM document_text WHERE document_id = ?
+        """, (document_id, document_id)).fetchone()
+        if size is None or size[0] > self.max_bytes:
+            return
+
+        self._delete(conn, key)
+        conn.execute(f"""
+            INSERT INTO extraction_cache_pages (content_hash, backend, version, {_PAGE_COLUMNS})
+            SELECT ?, ?, ?, {_PAGE_COLUMNS} FROM document_pages WHERE document_id = ?
+        """, (*key, document_id))
+        now = datetime.utcnow().isoformat()
+        conn.execute(f"""
+            INSERT INTO extraction_cache
+            (content_hash, backend, version, size_bytes, created_at, last_used_at, {_TEXT_COLUMNS})
+            SELECT ?, ?, ?, ?, ?, ?, {_TEXT_COLUMNS} FROM document_text WHERE document_id = ?
+        """, (*key, size[0], now, now, document_id))
+
+        with self._lock:
+            self._stores += 1
+        self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the cache fits its budget"""
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM extraction_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for row in conn.execute("""
+            SELECT content_hash, backend, version, size_bytes FROM extraction_cache ORDER BY last_used_at
+        """).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._delete(conn, CacheKey(row["content_hash"], row["backend"], row["version"]))
+            total -= row["size_bytes"]
+            evicted += 1
+
+        with self._lock:
+            self._evictions += evicted
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, key: CacheKey):
+        conn.execute("DELETE FROM extraction_cache WHERE content_hash = ? AND backend = ? AND version = ?", key)
+        conn.execute(
+            "DELETE FROM extraction_cache_pages WHERE content_hash = ? AND backend = ? AND version = ?", key
+        )
+
+    def get_metrics(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Occupancy from the database plus this process's hit rate"""
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM extraction_cache"
+        ).fetchone()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": entries,
+                "size_mb": round(size / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "stores": self._stores,
+                "evictions": self._evictions
+            }
@@ -0,0 +1,317 @@
+"""
+Batch Extraction Jobs
+Extracts text from every document still waiting for it, as a resumable background job
+Part of knowNothing Creative RAG
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .text_extractor import TextExtractor
+
+logger = logging.getLogger(__name__)
+
+JOB_RUNNING = "running"
+# Reported while a cancelled job drains its in-flight extractions; stored as running
+JOB_CANCELLING = "cancelling"
+JOB_COMPLETED = "completed"
+JOB_CANCELLED = "cancelled"
+JOB_FAILED = "failed"
+
+
+class ExtractionJobManager:
+    """
+    Runs extract-all jobs for one TextExtractor
+    - Documents with text_extracted = FALSE are walked in rowid order, one
+      batch at a time, with at most `concurrency` extractions in flight
+    - Per-document results and failures are recorded as they finish; the
+      rowid cursor is checkpointed after each batch
+    - A job still marked running at startup was interrupted and is resumed
+      from its cursor; documents extracted since are skipped by the filter
+    - Only one job runs at a time
+    """
+
+    BATCH_SIZE = 64  # documents fetched and checkpointed together
+    MAX_CONCURRENCY = 32
+    FAILURES_SHOWN = 100
+
+    def __init__(self, extractor: TextExtractor):
+        self.extractor = extractor
+        self.pool = extractor.pool
+        self.writer = extractor.writer
+        self.default_concurrency = extractor.extraction_pool.workers
+
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: Set[str] = set()
+        # job_id -> (elapsed seconds before this run, perf_counter when this run started)
+        self._clocks: Dict[str, Tuple[float, float]] = {}
+        self._init_job_storage()
+
+    def _init_job_storage(self):
+        """Create the job tables"""
+        try:
+            with self.pool.transaction() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS extraction_jobs (
+                        id TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        concurrency INTEGER NOT NULL,
+                        total_documents INTEGER NOT NULL,
+                        succeeded INTEGER NOT NULL DEFAULT 0,
+                        bytes_processed INTEGER NOT NULL DEFAULT 0,
+                        last_rowid INTEGER NOT NULL DEFAULT 0,
+                        elapsed_seconds REAL NOT NULL DEFAULT 0,
+                        created_at TEXT NOT NULL,
+                        finished_at TEXT,
+                        error TEXT
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS extraction_job_failures (
+                        job_id TEXT NOT NULL,
+                        document_id TEXT NOT NULL,
+                        error TEXT NOT NULL,
+                        failed_at TEXT NOT NULL,
+                        PRIMARY KEY (job_id, document_id)
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_jobs_status ON extraction_jobs (status)")
+            logger.info("✅ Extraction job storage initialized")
+
+        except Exception as e:
+            logger.error(f"❌ Extraction job storage initialization failed: {e}")
+            raise
+
+    async def start_job(self, concurrency: Optional[int] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Start an extract-all job, or return the one already running
+
+        Args:
+            concurrency: Extractions in flight at once (default: extraction pool workers)
+
+        Returns:
+            Tuple[Dict, bool]: Job status, and whether a new job was created
+
+        Raises:
+            ValueError: If concurrency is out of range
+        """
+        concurrency = concurrency or self.default_concurrency
+        if not 1 <= concurrency <= self.MAX_CONCURRENCY:
+            raise ValueError(f"concurrency must be between 1 and {self.MAX_CONCURRENCY}")
+
+        job_id, created = await self.writer.submit(lambda conn: self._create_job(conn, concurrency))
+        self._launch(job_id)
+        if created:
+            logger.info(f"📄 Started extraction job {job_id} (concurrency {concurrency})")
+        return await self.get_job(job_id), created
+
+    @staticmethod
+    def _create_job(conn, concurrency: int) -> Tuple[str, bool]:
+        """Insert a job unless one is running; inside the write transaction, so two callers cannot both start one"""
+        row = conn.execute(
+            "SELECT id FROM extraction_jobs WHERE status = ? ORDER BY created_at DESC LIMIT 1", (JOB_RUNNING,)
+        ).fetchone()
+        if row:
+            return row["id"], False
+
+        total = conn.execute("SELECT COUNT(*) FROM documents WHERE NOT COALESCE(text_extracted, 0)").fetchone()[0]
+        job_id = str(uuid.uuid4())
+        conn.execute("""
+            INSERT INTO extraction_jobs (id, status, concurrency, total_documents, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (job_id, JOB_RUNNING, concurrency, total, datetime.utcnow().isoformat()))
+        return job_id, True
+
+    def _launch(self, job_id: str):
+        """Run the job on the current event loop unless it already is"""
+        task = self._tasks.get(job_id)
+        if task and not task.done():
+            return
+        self._tasks[job_id] = asyncio.get_running_loop().create_task(self._run(job_id))
+
+    async def _run(self, job_id: str):
+        job = await self.pool.fetchone("SELECT * FROM extraction_jobs WHERE id = ?", (job_id,))
+        if not job or job["status"] != JOB_RUNNING:
+            return
+        self._clocks[job_id] = (job["elapsed_seconds"], time.perf_counter())
+        last_rowid = job["last_rowid"]
+        semaphore = asyncio.Semaphore(job["concurrency"])
+
+        try:
+            while job_id not in self._cancel_requested:
+                rows = await self.pool.fetchall("""
+                    SELECT rowid, id, file_size FROM documents
+                    WHERE rowid > ? AND NOT COALESCE(text_extracted, 0)
+                    ORDER BY rowid
+                    LIMIT ?
+                """, (last_rowid, self.BATCH_SIZE))
+                if not rows:
+                    break
+
+                await asyncio.gather(*(self._extract_one(job_id, row, semaphore) for row in rows))
+                last_rowid = rows[-1]["rowid"]
+                elapsed = self._elapsed(job_id)
+                await self.writer.execute(
+                    "UPDATE extraction_jobs SET last_rowid = ?, elapsed_seconds = ? WHERE id = ?",
+                    (last_rowid, elapsed, job_id)
+                )
+
+            status = JOB_CANCELLED if job_id in self._cancel_requested else JOB_COMPLETED
+            await self._finish(job_id, status)
+
+        except asyncio.CancelledError:
+            # Shutdown: the job stays marked running and resumes on the next start
+            raise
+        except Exception as e:
+            logger.error(f"❌ Extraction job {job_id} failed: {e}")
+            await self._finish(job_id, JOB_FAILED, str(e))
+        finally:
+            self._cancel_requested.discard(job_id)
+            self._clocks.pop(job_id, None)
+            self._tasks.pop(job_id, None)
+
+    async def _extract_one(self, job_id: str, row, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            if job_id in self._cancel_requested:
+                return
+            result = await self.extractor.extract_text_from_document(row["id"])
+            await self.writer.submit(lambda conn: self._record_result(conn, job_id, row, result))
+
+    @staticmethod
+    def _record_result(conn, job_id: str, row, result: Dict[str, Any]):
+        if result.get("success"):
+            conn.execute("""
+                UPDATE extraction_jobs SET succeeded = succeeded + 1, bytes_processed = bytes_processed + ?
+                WHERE id = ?
+            """, (row["file_size"] or 0, job_id))
+            # A document that failed before an interruption may succeed on resume
+            conn.execute(
+                "DELETE FROM extraction_job_failures WHERE job_id = ? AND document_id = ?", (job_id, row["id"])
+            )
+            return
+
+        conn.execute("""
+            INSERT OR REPLACE INTO extraction_job_failures (job_id, document_id, error, failed_at)
+            VALUES (?, ?, ?, ?)
+        """, (job_id, row["id"], result.get("error") or "Unknown error", datetime.utcnow().isoformat()))
+        conn.execute(
+            "UPDATE extraction_jobs SET bytes_processed = bytes_processed + ? WHERE id = ?",
+            (row["file_size"] or 0, job_id)
+        )
+
+    async def _finish(self, job_id: str, status: str, error: Optional[str] = None):
+        await self.writer.execute("""
+            UPDATE extraction_jobs
+            SET status = ?, elapsed_seconds = COALESCE(?, elapsed_seconds), finished_at = ?, error = ?
+            WHERE id = ?
+        """, (status, self._elapsed(job_id), datetime.utcnow().isoformat(), error, job_id))
+        logger.info(f"✅ Extraction job {job_id} {status}")
+
+    def _elapsed(self, job_id: str) -> Optional[float]:
+        """Run time across restarts, or None if the job is not running here"""
+        clock = self._clocks.get(job_id)
+        if clock is None:
+            return None
+        before, started = clock
+        return before + time.perf_counter() - started
+
+    async def cancel_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Stop a running job after the extractions already in flight
+
+        Returns without waiting for them; the job reports "cancelling" until
+        they finish and it is marked cancelled.
+
+        Returns:
+            Job status, or None if the job does not exist
+
+        Raises:
+            ValueError: If the job is not running
+        """
+        job = await self.get_job(job_id)
+        if job is None:
+            return None
+        if job["status"] != JOB_RUNNING:
+            raise ValueError(f"Job {job_id} is already {job['status']}")
+
+        task = self._tasks.get(job_id)
+        if task and not task.done():
+            self._cancel_requested.add(job_id)
+            logger.info(f"🛑 Cancelling extraction job {job_id}")
+        else:
+            await self._finish(job_id, JOB_CANCELLED)
+            logger.info(f"🛑 Extraction job {job_id} cancelled")
+        return await self.get_job(job_id)
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Progress, throughput and failures for a job
+
+        Returns:
+            Job status, or None if the job does not exist
+        """
+        job = await self.pool.fetchone("SELECT * FROM extraction_jobs WHERE id = ?", (job_id,))
+        if not job:
+            return None
+
+        failures_total = (await self.pool.fetchone(
+            "SELECT COUNT(*) FROM extraction_job_failures WHERE job_id = ?", (job_id,)
+        ))[0]
+        failures = await self.pool.fetchall("""
+            SELECT document_id, error, failed_at FROM extraction_job_failures
+            WHERE job_id = ? ORDER BY failed_at DESC LIMIT ?
+        """, (job_id, self.FAILURES_SHOWN))
+
+        elapsed = self._elapsed(job_id)
+        if elapsed is None:
+            elapsed = job["elapsed_seconds"]
+        processed = job["succeeded"] + failures_total
+        total = max(job["total_documents"], processed)
+        status = job["status"]
+        if status == JOB_RUNNING and job_id in self._cancel_requested:
+            status = JOB_CANCELLING
+
+        return {
+            "job_id": job["id"],
+            "status": status,
+            "active": job_id in self._tasks,
+            "concurrency": job["concurrency"],
+            "created_at": job["created_at"],
+            "finished_at": job["finished_at"],
+            "error": job["error"],
+            "progress": {
+                "total_documents": total,
+                "processed": processed,
+                "succeeded": job["succeeded"],
+                "failed": failures_total,
+                "remaining": total - processed,
+                "percentage": round(processed / total * 100, 1) if total else 100.0
+            },
+            "throughput": {
+                "elapsed_seconds": round(elapsed, 3),
+                "documents_per_second": round(processed / elapsed, 3) if elapsed else 0.0,
+                "mb_per_second": round(job["bytes_processed"] / (1024 * 1024) / elapsed, 3) if elapsed else 0.0,
+                "mb_processed": round(job["bytes_processed"] / (1024 * 1024), 3)
+            },
+            "failures": [dict(row) for row in failures],
+            "failures_truncated": failures_total > len(failures)
+        }
+
+    async def resume_jobs(self):
+        """Restart jobs left running by a previous process"""
+        rows = await self.pool.fetchall("SELECT id FROM extraction_jobs WHERE status = ?", (JOB_RUNNING,))
+        for row in rows:
+            if row["id"] not in self._tasks:
+                logger.info(f"♻️ Resuming extraction job {row['id']}")
+                self._launch(row["id"])
+
+    async def stop(self):
+        """Stop running jobs without finishing them, so they resume on the next start"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,397 @@
+"""
+Extraction Process Pool
+Runs CPU-heavy document parsing in worker processes, off the event loop
+Part of knowNothing Creative RAG
+"""
+
+import asyncio
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: no per-process address space limit
+    resource = None
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Workers are spawned, not forked: the parent runs SQLite writer and pool threads
+START_METHOD = "spawn"
+
+# Extra time the parent allows beyond the task timeout (worker start-up, IPC)
+# before it gives up on a worker that ignores its own deadline
+KILL_GRACE = 30.0
+
+# How often worker resident memory is checked, and how long a worker may
+# stay over the limit after its task was interrupted before it is killed
+RSS_CHECK_INTERVAL = 0.1
+RSS_KILL_GRACE = 2.0
+
+_pool: Optional["ExtractionPool"] = None
+_pool_lock = threading.Lock()
+
+
+class ExtractionKilledError(ValueError):
+    """Raised when the pool stopped a task: it hit a limit or its worker died"""
+
+
+class ExtractionTimeoutError(ExtractionKilledError):
+    """Raised when an extraction runs longer than the pool's timeout"""
+
+
+class ExtractionMemoryError(ExtractionKilledError):
+    """Raised when an extraction exceeds the worker memory limit"""
+
+
+class _DeadlineExceeded(BaseException):
+    """Raised in a worker by its timer; BaseException so parsers' except Exception cannot swallow it"""
+
+
+class _MemoryLimitExceeded(BaseException):
+    """Raised in a worker by its memory watchdog"""
+
+
+# Worker process state, set up by _init_worker
+_task_running = threading.Event()
+_rss_limit_mb = 0
+
+
+def _on_deadline(signum, frame):
+    raise _DeadlineExceeded()
+
+
+def _on_memory_limit(signum, frame):
+    if _task_running.is_set():
+        raise _MemoryLimitExceeded()
+
+
+def resident_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """Resident memory of a process (default: this one), or None where /proc is not available"""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _memory_message(limit_mb: int) -> str:
+    return f"Extraction used more than the {limit_mb}MB worker memory limit and was stopped"
+
+
+def _watch_memory(limit: int):
+    """
+    Worker thread interrupting a task once the worker's resident memory passes limit
+
+    This stops parsers running Python code, and the worker lives on. One
+    stuck in C code holds the GIL and never sees the interruption; the pool
+    kills that worker from outside.
+    """
+    while True:
+        time.sleep(RSS_CHECK_INTERVAL)
+        if not _task_running.is_set() or resident_bytes() <= limit:
+            continue
+        os.kill(os.getpid(), signal.SIGUSR1)
+        while _task_running.is_set():  # once per task
+            time.sleep(RSS_CHECK_INTERVAL)
+
+
+def _init_worker(memory_limit: int, rss_limit: int):
+    """
+    Set up a worker's limits: a task timer, a resident memory watchdog and
+    an address space cap, so one huge document cannot exhaust the host
+    """
+    global _rss_limit_mb
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _on_deadline)
+    if rss_limit > 0 and hasattr(signal, "SIGUSR1") and resident_bytes() is not None:
+        _rss_limit_mb = rss_limit // (1024 * 1024)
+        signal.signal(signal.SIGUSR1, _on_memory_limit)
+        threading.Thread(target=_watch_memory, args=(rss_limit,), name="rss-watchdog", daemon=True).start()
+    if memory_limit <= 0 or resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        memory_limit = min(memory_limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard))
+
+
+def _run_task(timeout: float, timeout_message: str, function: Callable[..., Any], args: tuple) -> Any:
+    """Run a task in the worker, interrupting it once its own run time passes timeout"""
+    timer = bool(timeout) and hasattr(signal, "setitimer")
+    try:
+        if timer:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        _task_running.set()
+        try:
+            return function(*args)
+        finally:
+            # Disarm before anything else; an alarm or memory signal that
+            # lands after the task returned is still caught below
+            if timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            _task_running.clear()
+    except _DeadlineExceeded:
+        raise ExtractionTimeoutError(timeout_message)
+    except _MemoryLimitExceeded:
+        gc.collect()
+        raise ExtractionMemoryError(_memory_message(_rss_limit_mb))
+
+
+class ExtractionPool:
+    """
+    Process pool for document parsers
+    - At most `workers` tasks run at once; the rest wait their turn on the event loop
+    - A task running longer than `timeout` seconds, or past the deadline of
+      the document it belongs to, is interrupted by a timer in its worker;
+      if the worker does not respond (stuck in C code) the pool is killed
+      and restarted
+    - A task whose worker's resident memory passes `rss_limit_mb` is stopped
+      the same way; a worker still over it RSS_KILL_GRACE later is killed
+    - Workers get an address space limit and are replaced after
+      `tasks_per_child` tasks, so leaks in parser libraries do not accumulate
+    - Stopped tasks raise an ExtractionKilledError carrying the reason
+    - Tasks must be module-level functions with picklable arguments and results
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None,
+        tasks_per_child: Optional[int] = None,
+        rss_limit_mb: Optional[int] = None
+    ):
+        self.workers = workers or settings.EXTRACTION_WORKERS or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.timeout = settings.EXTRACTION_TIMEOUT if timeout is None else timeout
+        self.memory_limit_mb = settings.EXTRACTION_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self.tasks_per_child = tasks_per_child or settings.EXTRACTION_TASKS_PER_CHILD
+        self.rss_limit_mb = settings.EXTRACTION_RSS_LIMIT_MB if rss_limit_mb is None else rss_limit_mb
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_generation = 0
+        self._lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._memory_errors = 0
+        self._restarts = 0
+        self._timeout_kills = 0
+        self._memory_kills = 0
+        self._monitor: Optional[threading.Thread] = None
+        self._task_time = 0.0
+        self._max_task_time = 0.0
+
+    def _get_executor(self):
+        """Current executor and its generation, starting the workers on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_mb * 1024 * 1024, self.rss_limit_mb * 1024 * 1024),
+                    max_tasks_per_child=self.tasks_per_child
+                )
+                self._executor_generation += 1
+                if self._monitor is None and self.rss_limit_mb > 0 and resident_bytes() is not None:
+                    self._monitor = threading.Thread(
+                        target=self._watch_workers, name="extraction-rss-monitor", daemon=True
+                    )
+                    self._monitor.start()
+            return self._executor, self._executor_generation
+
+    def _watch_workers(self):
+        """Kill workers whose resident memory stays over rss_limit_mb for RSS_KILL_GRACE"""
+        limit = self.rss_limit_mb * 1024 * 1024
+        over_since: Dict[int, float] = {}
+        while True:
+            time.sleep(RSS_CHECK_INTERVAL)
+            executor = self._executor
+            try:
+                processes = list((executor._processes or {}).items()) if executor else []
+            except RuntimeError:  # changed by the executor while copying
+                continue
+
+            now = time.monotonic()
+            over = {}
+            for pid, process in processes:
+                if (resident_bytes(pid) or 0) <= limit:
+                    continue
+                over[pid] = over_since.get(pid, now)
+                if now - over[pid] >= RSS_KILL_GRACE:
+                    logger.warning(f"⚠️ Killing extraction worker {pid}: over the {self.rss_limit_mb}MB memory limit")
+                    with self._lock:
+                        self._memory_kills += 1
+                    process.kill()
+                    over[pid] = float("inf")  # counted once while it dies
+            over_since = over
+
+    def _restart(self, generation: int, reason: str):
+        """Kill the workers of the given executor generation; the next task starts fresh ones"""
+        with self._lock:
+            if self._executor is None or generation != self._executor_generation:
+                return  # already replaced
+            executor, self._executor = self._executor, None
+            self._restarts += 1
+
+        logger.warning(f"⚠️ Restarting extraction workers: {reason}")
+        kill_workers = getattr(executor, "kill_workers", None)  # Python 3.14+
+        if kill_workers:
+            kill_workers()
+        else:
+            for process in list((executor._processes or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """Per-event-loop semaphore limiting tasks handed to the workers"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._slots is None or self._slots_loop is not loop:
+                self._slots = asyncio.Semaphore(self.workers)
+                self._slots_loop = loop
+            return self._slots
+
+    async def run(self, function: Callable[..., Any], *args: Any, deadline: Optional[float] = None) -> Any:
+        """
+        Run function(*args) in a worker process and return its result
+
+        Args:
+            function: Module-level function to run
+            *args: Its picklable arguments
+            deadline: time.monotonic() by which the task must finish, for a
+                wall-clock limit shared by all tasks of one document
+
+        Raises:
+            ExtractionTimeoutError: If the task exceeds the timeout or deadline
+            ExtractionMemoryError: If the task exceeds a memory limit
+            ExtractionKilledError: If the worker died
+            ValueError: As raised by the function
+        """
+        slots = self._get_slots()
+        self._waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        started = time.perf_counter()
+        try:
+            # A worker crash fails every task in the pool; retry once so
+            # only the task that caused it fails for good
+            for attempt in range(2):
+                # Measured per attempt, so a retry only gets what is left of the deadline
+                timeout, timeout_message = self._task_timeout(deadline)
+                if deadline is not None and timeout <= 0:
+                    self._timeouts += 1
+                    raise ExtractionTimeoutError(timeout_message)
+
+                executor, generation = self._get_executor()
+                memory_kills = self._memory_kills
+                try:
+                    future = asyncio.wrap_future(
+                        executor.submit(_run_task, timeout, timeout_message, function, args)
+                    )
+                    result = await asyncio.wait_for(future, timeout + KILL_GRACE if timeout else None)
+                except ExtractionTimeoutError:
+                    self._timeouts += 1
+                    raise
+                except ExtractionMemoryError:
+                    self._memory_errors += 1
+                    raise
+                except asyncio.TimeoutError:
+                    self._timeouts += 1
+                    self._timeout_kills += 1
+                    self._restart(generation, f"task ignored its {timeout:.0f}s timeout")
+                    raise ExtractionTimeoutError(timeout_message)
+                except MemoryError:
+                    self._memory_errors += 1
+                    raise ExtractionMemoryError(
+                        f"Extraction needed more than the {self.memory_limit_mb}MB worker address space limit"
+                    )
+                except BrokenProcessPool:
+                    over_memory = self._memory_kills > memory_kills
+                    reason = "worker exceeded its memory limit" if over_memory else "worker process died"
+                    self._restart(generation, reason)
+                    if attempt == 0 and (deadline is None or deadline > time.monotonic()):
+                        continue
+                    if over_memory:
+                        self._memory_errors += 1
+                        raise ExtractionMemoryError(_memory_message(self.rss_limit_mb))
+                    raise ExtractionKilledError("Extraction worker process died")
+
+                self._completed += 1
+                return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._task_time += elapsed
+            self._max_task_time = max(self._max_task_time, elapsed)
+            self._running -= 1
+            slots.release()
+
+    def _task_timeout(self, deadline: Optional[float]) -> Tuple[float, str]:
+        """Timeout for one attempt at a task, and the message for exceeding it"""
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if not self.timeout or remaining < self.timeout:
+                return remaining, "Extraction ran past the document's time limit and was stopped"
+        return self.timeout, f"Extraction took longer than {self.timeout}s and was stopped"
+
+    def shutdown(self):
+        """Stop the workers; a later run() starts new ones"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Limits and counters for the stats endpoints"""
+        finished = self._completed + self._failed
+        return {
+            "workers": self.workers,
+            "workers_started": self._executor is not None,
+            "timeout_seconds": self.timeout,
+            "memory_limit_mb": self.memory_limit_mb if resource is not None else None,
+            "rss_limit_mb": self.rss_limit_mb if resident_bytes() is not None else None,
+            "tasks_per_child": self.tasks_per_child,
+            "running": self._running,
+            "queue_depth": self._waiting,
+            "completed": self._completed,
+            "failed": self._failed,
+            "timeouts": self._timeouts,
+            "memory_errors": self._memory_errors,
+            "timeout_kills": self._timeout_kills,
+            "memory_kills": self._memory_kills,
+            "worker_restarts": self._restarts,
+            "avg_task_ms": round(self._task_time / finished * 1000, 3) if finished else 0.0,
+            "max_task_ms": round(self._max_task_time * 1000, 3)
+        }
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Get the process-wide extraction pool, created with the configured limits"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool()
+        return _pool
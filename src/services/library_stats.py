@@ -0,0 +1,272 @@
+"""
+Library Statistics
+Incrementally maintained counters so stats endpoints never scan the library
+Part of knowNothing Creative RAG
+
+Counters live in the library_stats table and are kept current by triggers on
+documents, blobs and document_text. Embedded chunk counts are adjusted by the
+embedding code path. Rebuild everything from scratch with:
+
+    python -m src.services.library_stats reconcile [--db data/documents.db] [--with-vectors]
+"""
+
+import argparse
+import logging
+import sqlite3
+from typing import Dict, Optional, Sequence
+
+from . import vector_store
+
+logger = logging.getLogger(__name__)
+
+# Counter keys
+DOCUMENTS = "documents"
+DOCUMENT_BYTES = "document_bytes"
+DISK_BYTES = "disk_bytes"
+BLOB_BYTES = "blob_bytes"
+BLOB_STORED_BYTES = "blob_stored_bytes"
+EXTRACTED_DOCUMENTS = "extracted_documents"
+TEXT_DOCUMENTS = "text_documents"
+EMBEDDED_CHUNKS = "embedded_chunks"
+FILE_TYPE_PREFIX = "file_type:"
+METHOD_COUNT_PREFIX = "method_count:"
+METHOD_WORDS_PREFIX = "method_words:"
+
+_UPSERT = """
+    INSERT INTO library_stats (stat_key, value) VALUES ({key}, {delta})
+    ON CONFLICT (stat_key) DO UPDATE SET value = value + excluded.value;
+"""
+
+
+def _adjust(key: str, delta: str) -> str:
+    return _UPSERT.format(key=key, delta=delta)
+
+
+# Triggers on documents and blobs, installed by StorageManager
+_DOCUMENT_TRIGGERS = {
+    "trg_stats_documents_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_documents_insert AFTER INSERT ON documents
+        BEGIN
+            {_adjust(f"'{DOCUMENTS}'", "1")}
+            {_adjust(f"'{DOCUMENT_BYTES}'", "NEW.file_size")}
+            {_adjust(f"'{FILE_TYPE_PREFIX}' || NEW.file_type", "1")}
+            {_adjust(f"'{DISK_BYTES}'", "CASE WHEN EXISTS (SELECT 1 FROM blobs WHERE file_path = NEW.file_path) THEN 0 ELSE NEW.file_size END")}
+        END
+    """,
+    "trg_stats_documents_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_documents_delete AFTER DELETE ON documents
+        BEGIN
+            {_adjust(f"'{DOCUMENTS}'", "-1")}
+            {_adjust(f"'{DOCUMENT_BYTES}'", "-OLD.file_size")}
+            {_adjust(f"'{FILE_TYPE_PREFIX}' || OLD.file_type", "-1")}
+            {_adjust(f"'{DISK_BYTES}'", "CASE WHEN EXISTS (SELECT 1 FROM blobs WHERE file_path = OLD.file_path) THEN 0 ELSE -OLD.file_size END")}
+        END
+    """,
+    "trg_stats_blobs_insert_v2": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_blobs_insert_v2 AFTER INSERT ON blobs
+        BEGIN
+            {_adjust(f"'{DISK_BYTES}'", "COALESCE(NEW.stored_size, NEW.file_size)")}
+            {_adjust(f"'{BLOB_BYTES}'", "NEW.file_size")}
+            {_adjust(f"'{BLOB_STORED_BYTES}'", "COALESCE(NEW.stored_size, NEW.file_size)")}
+        END
+    """,
+    "trg_stats_blobs_delete_v2": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_blobs_delete_v2 AFTER DELETE ON blobs
+        BEGIN
+            {_adjust(f"'{DISK_BYTES}'", "-COALESCE(OLD.stored_size, OLD.file_size)")}
+            {_adjust(f"'{BLOB_BYTES}'", "-OLD.file_size")}
+            {_adjust(f"'{BLOB_STORED_BYTES}'", "-COALESCE(OLD.stored_size, OLD.file_size)")}
+        END
+    """,
+}
+
+# Superseded trigger versions, dropped when the replacement is installed
+_RETIRED_TRIGGERS = ["trg_stats_blobs_insert", "trg_stats_blobs_delete"]
+
+# Triggers that need documents.text_extracted and document_text, installed by TextExtractor
+_TEXT_TRIGGERS = {
+    "trg_stats_documents_extracted": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_documents_extracted
+        AFTER UPDATE OF text_extracted ON documents
+        WHEN (COALESCE(OLD.text_extracted, 0) != 0) != (COALESCE(NEW.text_extracted, 0) != 0)
+        BEGIN
+            {_adjust(f"'{EXTRACTED_DOCUMENTS}'", "CASE WHEN COALESCE(NEW.text_extracted, 0) != 0 THEN 1 ELSE -1 END")}
+        END
+    """,
+    "trg_stats_documents_extracted_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_documents_extracted_delete AFTER DELETE ON documents
+        WHEN COALESCE(OLD.text_extracted, 0) != 0
+        BEGIN
+            {_adjust(f"'{EXTRACTED_DOCUMENTS}'", "-1")}
+        END
+    """,
+    "trg_stats_text_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_text_insert AFTER INSERT ON document_text
+        BEGIN
+            {_adjust(f"'{TEXT_DOCUMENTS}'", "1")}
+            {_adjust(f"'{METHOD_COUNT_PREFIX}' || NEW.extraction_method", "1")}
+            {_adjust(f"'{METHOD_WORDS_PREFIX}' || NEW.extraction_method", "COALESCE(NEW.word_count, 0)")}
+        END
+    """,
+    "trg_stats_text_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_text_delete AFTER DELETE ON document_text
+        BEGIN
+            {_adjust(f"'{TEXT_DOCUMENTS}'", "-1")}
+            {_adjust(f"'{METHOD_COUNT_PREFIX}' || OLD.extraction_method", "-1")}
+            {_adjust(f"'{METHOD_WORDS_PREFIX}' || OLD.extraction_method", "-COALESCE(OLD.word_count, 0)")}
+        END
+    """,
+}
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return row is not None
+
+
+def _column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def install_document_triggers(conn: sqlite3.Connection):
+    """Create the stats table and document/blob triggers (StorageManager schema)"""
+    _install(conn, _DOCUMENT_TRIGGERS, _RETIRED_TRIGGERS)
+
+
+def install_text_triggers(conn: sqlite3.Connection):
+    """Create the stats table and extraction triggers (TextExtractor schema)"""
+    _install(conn, _TEXT_TRIGGERS)
+
+
+def _install(conn: sqlite3.Connection, triggers: Dict[str, str], retired: Sequence[str] = ()):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS library_stats (
+            stat_key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    for name in retired:
+        if name in existing:
+            conn.execute(f"DROP TRIGGER {name}")
+
+    missing = [name for name in triggers if name not in existing]
+    for name in missing:
+        conn.execute(triggers[name])
+
+    # Counters are only trustworthy from the moment their triggers exist
+    if missing:
+        reconcile_stats(conn)
+
+
+def reconcile_stats(conn: sqlite3.Connection, embedded_chunks: Optional[int] = None) -> Dict[str, int]:
+    """
+    Rebuild every counter from the source tables
+
+    Args:
+        conn: Connection inside the caller's transaction
+        embedded_chunks: Authoritative vector count; the current value is kept if None
+
+    Returns:
+        Dict[str, int]: The rebuilt counters
+    """
+    previous = read_stats(conn)
+    stats: Dict[str, int] = {}
+
+    if _table_exists(conn, "documents"):
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(file_size), 0) FROM documents").fetchone()
+        stats[DOCUMENTS] = count
+        stats[DOCUMENT_BYTES] = total
+        for file_type, type_count in conn.execute("SELECT file_type, COUNT(*) FROM documents GROUP BY file_type"):
+            stats[FILE_TYPE_PREFIX + file_type] = type_count
+
+        if _table_exists(conn, "blobs"):
+            stored_size = "COALESCE(stored_size, file_size)" if _column_exists(conn, "blobs", "stored_size") else "file_size"
+            blob_bytes, stored_bytes = conn.execute(
+                f"SELECT COALESCE(SUM(file_size), 0), COALESCE(SUM({stored_size}), 0) FROM blobs"
+            ).fetchone()
+            loose_bytes = conn.execute("""
+                SELECT COALESCE(SUM(file_size), 0) FROM documents
+                WHERE file_path NOT IN (SELECT file_path FROM blobs)
+            """).fetchone()[0]
+            stats[DISK_BYTES] = stored_bytes + loose_bytes
+            stats[BLOB_BYTES] = blob_bytes
+            stats[BLOB_STORED_BYTES] = stored_bytes
+        else:
+            stats[DISK_BYTES] = total
+
+        if _column_exists(conn, "documents", "text_extracted"):
+            stats[EXTRACTED_DOCUMENTS] = conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE COALESCE(text_extracted, 0) != 0"
+            ).fetchone()[0]
+
+    if _table_exists(conn, "document_text"):
+        stats[TEXT_DOCUMENTS] = conn.execute("SELECT COUNT(*) FROM document_text").fetchone()[0]
+        for method, method_count, words in conn.execute("""
+            SELECT extraction_method, COUNT(*), COALESCE(SUM(word_count), 0)
+            FROM document_text GROUP BY extraction_method
+        """):
+            stats[METHOD_COUNT_PREFIX + method] = method_count
+            stats[METHOD_WORDS_PREFIX + method] = words
+
+    stats[EMBEDDED_CHUNKS] = embedded_chunks if embedded_chunks is not None else previous.get(EMBEDDED_CHUNKS, 0)
+
+    conn.execute("DELETE FROM library_stats")
+    conn.executemany("INSERT INTO library_stats (stat_key, value) VALUES (?, ?)", stats.items())
+    logger.info(f"📊 Library statistics reconciled ({len(stats)} counters)")
+    return stats
+
+
+def adjust_stat(conn: sqlite3.Connection, key: str, delta: int):
+    """Add delta to a counter (for counters maintained outside triggers)"""
+    conn.execute(_UPSERT.format(key="?", delta="?"), (key, delta))
+
+
+def read_stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Read every counter; returns an empty dict before the table exists"""
+    if not _table_exists(conn, "library_stats"):
+        return {}
+    return {key: value for key, value in conn.execute("SELECT stat_key, value FROM library_stats")}
+
+
+def prefixed(stats: Dict[str, int], prefix: str) -> Dict[str, int]:
+    """Non-zero counters under a prefix, keyed by the remainder of their name"""
+    return {key[len(prefix):]: value for key, value in stats.items() if key.startswith(prefix) and value}
+
+
+def _count_vectors(chroma_path: str) -> Optional[int]:
+    try:
+        if not vector_store.chromadb_available():
+            return None
+        collection = vector_store.get_collection(chroma_path, create=False)
+        return collection.count() if collection is not None else 0
+    except Exception as e:
+        logger.warning(f"⚠️ Could not count vectors in {chroma_path}: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain knowNothing library statistics")
+    parser.add_argument("command", choices=["reconcile", "show"])
+    parser.add_argument("--db", default="data/documents.db", help="documents database path")
+    parser.add_argument("--with-vectors", action="store_true", help="also recount embedded chunks from ChromaDB")
+    parser.add_argument("--chroma-path", default=vector_store.DEFAULT_CHROMA_PATH)
+    args = parser.parse_args()
+
+    from .database import get_pool
+
+    with get_pool(args.db).transaction() as conn:
+        if args.command == "reconcile":
+            embedded = _count_vectors(args.chroma_path) if args.with_vectors else None
+            stats = reconcile_stats(conn, embedded_chunks=embedded)
+        else:
+            stats = read_stats(conn)
+
+    for key in sorted(stats):
+        print(f"{key:40s} {stats[key]}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,454 @@
+"""
+Orphan Reconciler
+Background sweep that keeps data/uploads and the documents table consistent
+Part of knowNothing Creative RAG
+
+Failed uploads or deletes can leave files without rows and rows without
+files. The reconciler walks both sides in bounded batches and:
+
+- hashes documents uploaded before content addressing and folds them into
+  blobs, so identical legacy copies share one file
+- records documents.file_present, so listings never stat files per row
+- repoints a row at its blob when the blob lives elsewhere
+- recounts blob references and drops blob rows nothing uses
+- moves files no row references into the quarantine directory (never deletes)
+
+Run a single sweep by hand with:
+
+    python -m src.services.orphan_reconciler [--db data/documents.db] [--uploads data/uploads]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config import settings
+from . import blob_codec, library_stats
+from .storage_manager import StorageManager
+from .upload_layout import _link_or_copy, sharded_path
+
+logger = logging.getLogger(__name__)
+
+
+class OrphanReconciler:
+    """
+    Incremental consistency sweep for one StorageManager
+    - Rows, blobs and files are each scanned in keyset-ordered batches
+    - Each batch's fixes go through the group-commit writer in one operation
+    - Files younger than the grace period are left alone (uploads in flight)
+    """
+
+    def __init__(
+        self,
+        storage: StorageManager,
+        quarantine_dir: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        grace_period: Optional[int] = None,
+        interval: Optional[int] = None
+    ):
+        self.storage = storage
+        self.quarantine_dir = Path(quarantine_dir or settings.QUARANTINE_DIR)
+        self.batch_size = batch_size or settings.ORPHAN_RECONCILE_BATCH_SIZE
+        self.grace_period = settings.ORPHAN_GRACE_PERIOD if grace_period is None else grace_period
+        self.interval = settings.ORPHAN_RECONCILE_INTERVAL if interval is None else interval
+
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self._runs = 0
+        self._last_started: Optional[str] = None
+        self._last_duration = 0.0
+        self._last_totals: Dict[str, int] = {}
+        self._last_error: Optional[str] = None
+
+    async def run_once(self) -> Dict[str, int]:
+        """
+        Sweep rows, blobs and files once
+
+        Returns:
+            Dict[str, int]: What was checked and fixed
+        """
+        totals = {
+            "legacy_rows_hashed": 0,
+            "legacy_rows_deduplicated": 0,
+            "rows_checked": 0,
+            "rows_missing_file": 0,
+            "rows_repointed": 0,
+            "blobs_checked": 0,
+            "blobs_recounted": 0,
+            "blobs_dropped": 0,
+            "files_checked": 0,
+            "files_quarantined": 0
+        }
+        started = time.perf_counter()
+        self._running = True
+        self._last_started = datetime.utcnow().isoformat()
+
+        try:
+            await self._fold_legacy_rows(totals)
+            await self._check_rows(totals)
+            await self._check_blobs(totals)
+            await self._check_files(totals)
+            self._last_error = None
+        except Exception as e:
+            self._last_error = str(e)
+            logger.error(f"❌ Orphan reconciliation failed: {e}")
+            raise
+        finally:
+            self._running = False
+            self._runs += 1
+            self._last_duration = time.perf_counter() - started
+            self._last_totals = totals
+
+        logger.info(
+            f"🧹 Orphan reconciliation: {totals['legacy_rows_hashed']} legacy rows hashed "
+            f"({totals['legacy_rows_deduplicated']} deduplicated), {totals['rows_missing_file']} missing files, "
+            f"{totals['rows_repointed']} rows repointed, {totals['blobs_dropped']} blobs dropped, "
+            f"{totals['files_quarantined']} files quarantined"
+        )
+        return totals
+
+    async def _fold_legacy_rows(self, totals: Dict[str, int]):
+        """Hash documents stored before content addressing and move them into blobs"""
+        last_rowid = 0
+        while True:
+            rows = await self.storage.pool.fetchall("""
+                SELECT rowid, id, file_path, file_size FROM documents
+                WHERE content_hash IS NULL AND rowid > ?
+                ORDER BY rowid
+                LIMIT ?
+            """, (last_rowid, self.batch_size))
+            if not rows:
+                return
+            last_rowid = rows[-1]["rowid"]
+
+            hashes = await asyncio.to_thread(self._hash_files, rows)
+            for row in rows:
+                content_hash = hashes.get(row["id"])
+                if content_hash is None:
+                    continue  # file missing; _check_rows records it
+                shared = await self._fold_legacy_row(row, content_hash)
+                if shared is not None:
+                    totals["legacy_rows_hashed"] += 1
+                    totals["legacy_rows_deduplicated"] += shared
+
+    @staticmethod
+    def _hash_files(rows) -> Dict[str, str]:
+        """SHA-256 of each row's file, by document ID, skipping missing files (worker thread)"""
+        hashes = {}
+        for row in rows:
+            try:
+                with open(row["file_path"], "rb") as f:
+                    hashes[row["id"]] = hashlib.file_digest(f, "sha256").hexdigest()
+            except FileNotFoundError:
+                continue
+        return hashes
+
+    async def _fold_legacy_row(self, row, content_hash: str) -> Optional[bool]:
+        """
+        Point a legacy document at the blob for its content, creating the blob if needed
+
+        Returns:
+            Optional[bool]: Whether an existing blob was shared, or None if
+            the row changed meanwhile and was left alone
+        """
+        old_path = Path(row["file_path"])
+        async with self.storage._blob_guard(content_hash):
+            blob = await self.storage.pool.fetchone(
+                "SELECT file_path FROM blobs WHERE content_hash = ?", (content_hash,)
+            )
+            shared = bool(blob) and Path(blob[0]).exists()
+            if shared:
+                blob_path = Path(blob[0])
+            else:
+                # Legacy files were stored uncompressed, so they can become the blob as they are
+                if blob:
+                    blob_path = Path(blob[0])
+                else:
+                    blob_path = sharded_path(self.storage.upload_dir, content_hash, old_path.suffix)
+                await asyncio.to_thread(_link_or_copy, old_path, blob_path)
+
+            outcome = await self.storage.writer.submit(
+                lambda conn: self._apply_fold(conn, row, content_hash, blob_path)
+            )
+            if outcome is None:
+                if not shared:
+                    await asyncio.to_thread(blob_path.unlink, missing_ok=True)
+                return None
+
+        self.storage.invalidate_documents([row["id"]])
+        if outcome:
+            await asyncio.to_thread(old_path.unlink, missing_ok=True)
+        return shared
+
+    @staticmethod
+    def _apply_fold(conn, row, content_hash: str, blob_path: Path) -> Optional[bool]:
+        """
+        Repoint the row and take a blob reference (writer thread)
+
+        Returns:
+            Optional[bool]: Whether the old file is now unreferenced, or None
+            if the row was deleted or repointed since it was read
+        """
+        updated = conn.execute("""
+            UPDATE documents SET content_hash = ?, file_path = ?, stored_filename = ?, file_present = 1
+            WHERE id = ? AND file_path = ? AND content_hash IS NULL
+        """, (content_hash, str(blob_path), blob_path.name, row["id"], row["file_path"])).rowcount
+        if not updated:
+            return None
+
+        conn.execute("""
+            INSERT INTO blobs (content_hash, file_path, file_size, stored_size, codec, ref_count, created_date)
+            VALUES (?, ?, ?, ?, ?, 1, ?)
+            ON CONFLICT (content_hash) DO UPDATE SET ref_count = ref_count + 1
+        """, (content_hash, str(blob_path), row["file_size"], row["file_size"], blob_codec.CODEC_NONE,
+              datetime.utcnow().isoformat()))
+        # The document's own file no longer counts; a new blob was counted by its trigger
+        library_stats.adjust_stat(conn, library_stats.DISK_BYTES, -row["file_size"])
+
+        still_used = conn.execute("""
+            SELECT 1 FROM documents WHERE file_path = ?
+            UNION ALL
+            SELECT 1 FROM blobs WHERE file_path = ?
+            LIMIT 1
+        """, (row["file_path"], row["file_path"])).fetchone()
+        return still_used is None
+
+    async def _check_rows(self, totals: Dict[str, int]):
+        """Refresh file_present for every document, repointing rows whose blob moved"""
+        last_rowid = 0
+        while True:
+            rows = await self.storage.pool.fetchall("""
+                SELECT d.rowid, d.id, d.file_path, d.file_present, b.file_path AS blob_path
+                FROM documents d LEFT JOIN blobs b ON b.content_hash = d.content_hash
+                WHERE d.rowid > ?
+                ORDER BY d.rowid
+                LIMIT ?
+            """, (last_rowid, self.batch_size))
+            if not rows:
+                return
+            last_rowid = rows[-1]["rowid"]
+            totals["rows_checked"] += len(rows)
+
+            changes, missing = await asyncio.to_thread(self._row_changes, rows)
+            if changes:
+                await self.storage.writer.submit(lambda conn: self._apply_row_changes(conn, changes))
+                self.storage.invalidate_documents([change["id"] for change in changes])
+            totals["rows_missing_file"] += missing
+            totals["rows_repointed"] += sum(1 for change in changes if change["new_path"] != change["old_path"])
+
+    @staticmethod
+    def _row_changes(rows) -> Tuple[List[Dict[str, Any]], int]:
+        """Stat a batch of rows; returns the updates they need and how many lack a file (worker thread)"""
+        changes = []
+        missing = 0
+        for row in rows:
+            path = row["file_path"]
+            present = os.path.exists(path)
+            if not present and row["blob_path"] and row["blob_path"] != path and os.path.exists(row["blob_path"]):
+                path, present = row["blob_path"], True
+            missing += not present
+            if present != bool(row["file_present"]) or row["file_present"] is None or path != row["file_path"]:
+                changes.append({"id": row["id"], "old_path": row["file_path"], "new_path": path, "present": present})
+        return changes, missing
+
+    @staticmethod
+    def _apply_row_changes(conn, changes: List[Dict[str, Any]]):
+        for change in changes:
+            # Guarded on the old path so a concurrent layout migration wins
+            conn.execute("""
+                UPDATE documents SET file_path = ?, stored_filename = ?, file_present = ?
+                WHERE id = ? AND file_path = ?
+            """, (change["new_path"], Path(change["new_path"]).name, 1 if change["present"] else 0,
+                  change["id"], change["old_path"]))
+
+    async def _check_blobs(self, totals: Dict[str, int]):
+        """Recount blob references and drop blob rows no document uses"""
+        last_hash = ""
+        while True:
+            rows = await self.storage.pool.fetchall("""
+                SELECT b.content_hash, b.ref_count,
+                       (SELECT COUNT(*) FROM documents d
+                        WHERE d.content_hash = b.content_hash AND d.file_path = b.file_path) AS actual
+                FROM blobs b
+                WHERE b.content_hash > ?
+                ORDER BY b.content_hash
+                LIMIT ?
+            """, (last_hash, self.batch_size))
+            if not rows:
+                return
+            last_hash = rows[-1]["content_hash"]
+            totals["blobs_checked"] += len(rows)
+
+            suspects = [row["content_hash"] for row in rows if row["ref_count"] != row["actual"]]
+            if suspects:
+                recounted, dropped = await self.storage.writer.submit(
+                    lambda conn: self._recount_blobs(conn, suspects)
+                )
+                totals["blobs_recounted"] += recounted
+                totals["blobs_dropped"] += dropped
+
+    @staticmethod
+    def _recount_blobs(conn, content_hashes: List[str]):
+        """Recount inside the write transaction so concurrent uploads are seen"""
+        recounted = dropped = 0
+        for content_hash in content_hashes:
+            actual = conn.execute("""
+                SELECT COUNT(*) FROM documents d JOIN blobs b ON b.content_hash = d.content_hash
+                WHERE d.content_hash = ? AND d.file_path = b.file_path
+            """, (content_hash,)).fetchone()[0]
+            if actual:
+                recounted += conn.execute(
+                    "UPDATE blobs SET ref_count = ? WHERE content_hash = ? AND ref_count != ?",
+                    (actual, content_hash, actual)
+                ).rowcount
+            else:
+                dropped += conn.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,)).rowcount
+        return recounted, dropped
+
+    def _walk_uploads(self) -> Iterator[List[os.DirEntry]]:
+        """Yield batches of files under the upload directory, one directory listing at a time"""
+        pending = [str(self.storage.upload_dir)]
+        batch: List[os.DirEntry] = []
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            batch.append(entry)
+                            if len(batch) >= self.batch_size:
+                                yield batch
+                                batch = []
+            except FileNotFoundError:
+                continue
+        if batch:
+            yield batch
+
+    async def _check_files(self, totals: Dict[str, int]):
+        """Quarantine files in the upload directory that no row references"""
+        walker = self._walk_uploads()
+        cutoff = time.time() - self.grace_period
+
+        while True:
+            batch = await asyncio.to_thread(next, walker, None)
+            if batch is None:
+                return
+            totals["files_checked"] += len(batch)
+
+            paths = [entry.path for entry in batch]
+            placeholders = ",".join("?" * len(paths))
+            referenced = {row[0] for row in await self.storage.pool.fetchall(f"""
+                SELECT file_path FROM documents WHERE file_path IN ({placeholders})
+                UNION
+                SELECT file_path FROM blobs WHERE file_path IN ({placeholders})
+            """, (*paths, *paths))}
+
+            for entry in batch:
+                if entry.path in referenced:
+                    continue
+                try:
+                    if entry.stat().st_mtime > cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                if await self._quarantine(Path(entry.path)):
+                    totals["files_quarantined"] += 1
+
+    async def _quarantine(self, path: Path) -> bool:
+        """Move an unreferenced file aside, re-checking under its blob lock"""
+        # Blob files are named by hash; the lock excludes an upload deduplicating onto this file
+        async with self.storage._blob_guard(path.stem):
+            row = await self.storage.pool.fetchone("""
+                SELECT 1 FROM documents WHERE file_path = ?
+                UNION ALL
+                SELECT 1 FROM blobs WHERE file_path = ?
+                LIMIT 1
+            """, (str(path), str(path)))
+            if row:
+                return False
+
+            try:
+                relative = path.relative_to(self.storage.upload_dir)
+            except ValueError:
+                relative = Path(path.name)
+            target = self.quarantine_dir / relative
+            await asyncio.to_thread(self._move, path, target)
+
+        logger.warning(f"⚠️ Quarantined orphan file {path} -> {target}")
+        return True
+
+    @staticmethod
+    def _move(source: Path, target: Path):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            target = target.with_name(f"{target.stem}.{int(time.time())}{target.suffix}")
+        shutil.move(str(source), str(target))
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                pass  # already logged; try again next interval
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start periodic sweeps on the running event loop (no-op if disabled)"""
+        if self.interval <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run_forever())
+        logger.info(f"✅ Orphan reconciler scheduled every {self.interval}s")
+
+    async def stop(self):
+        """Cancel the periodic sweep"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Sweep status for the stats endpoints"""
+        return {
+            "scheduled": self._task is not None and not self._task.done(),
+            "running": self._running,
+            "interval_seconds": self.interval,
+            "runs": self._runs,
+            "last_started": self._last_started,
+            "last_duration_s": round(self._last_duration, 3),
+            "last_totals": self._last_totals,
+            "last_error": self._last_error,
+            "quarantine_directory": str(self.quarantine_dir)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile knowNothing uploads with the documents table")
+    parser.add_argument("--db", default="data/documents.db", help="documents database path")
+    parser.add_argument("--uploads", default="data/uploads", help="upload directory")
+    parser.add_argument("--quarantine", default=settings.QUARANTINE_DIR, help="where orphan files are moved")
+    parser.add_argument("--grace-period", type=int, default=settings.ORPHAN_GRACE_PERIOD,
+                        help="seconds an unreferenced file is left alone")
+    args = parser.parse_args()
+
+    storage = StorageManager(upload_dir=args.uploads, db_path=args.db)
+    reconciler = OrphanReconciler(storage, quarantine_dir=args.quarantine, grace_period=args.grace_period)
+    totals = asyncio.run(reconciler.run_once())
+    for key, value in totals.items():
+        print(f"{key:20s} {value}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,215 @@
+"""
+PDF Extraction Backends
+Interchangeable PDF libraries behind one page-text interface, chosen per document
+Part of knowNothing Creative RAG
+
+PyMuPDF is much faster on large PDFs; PyPDF2 is pure Python and sometimes
+recovers text PyMuPDF does not. With PDF_BACKEND = "auto" every document is
+calibrated on its first few pages: each installed backend extracts them, and
+the fastest backend that found close to the most text extracts the rest.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+from . import blob_codec
+
+try:
+    import pymupdf as fitz
+except ImportError:
+    try:
+        import fitz  # PyMuPDF before 1.24
+    except ImportError:
+        fitz = None
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND_AUTO = "auto"
+
+# Calibration: pages each backend extracts on trial, and the share of the
+# best text yield a faster backend must reach to be chosen
+PROBE_PAGES = 3
+MIN_TEXT_RATIO = 0.9
+
+
+class PdfBackend:
+    """
+    One PDF library
+    - open() yields a library document for a stored blob, compressed or not
+    - page_text() may raise for a damaged page; callers note it and go on
+    """
+
+    name = ""
+
+    @property
+    def available(self) -> bool:
+        raise NotImplementedError
+
+    @property
+    def version(self) -> str:
+        raise NotImplementedError
+
+    def open(self, file_path: Path):
+        raise NotImplementedError
+
+    def page_count(self, document: Any) -> int:
+        raise NotImplementedError
+
+    def page_text(self, document: Any, index: int) -> str:
+        raise NotImplementedError
+
+
+class PyMuPDFBackend(PdfBackend):
+    name = "PyMuPDF"
+
+    @property
+    def available(self) -> bool:
+        return fitz is not None
+
+    @property
+    def version(self) -> str:
+        return getattr(fitz, "__version__", None) or fitz.VersionBind
+
+    @contextmanager
+    def open(self, file_path: Path) -> Iterator[Any]:
+        # Plain blobs are opened by path so MuPDF reads only what it needs;
+        # compressed ones are inflated into memory first
+        if blob_codec.read_codec(file_path) == blob_codec.CODEC_NONE:
+            document = fitz.open(str(file_path), filetype="pdf")
+        else:
+            with blob_codec.open_seekable(file_path) as file:
+                document = fitz.open(stream=file.read(), filetype="pdf")
+        try:
+            yield document
+        finally:
+            document.close()
+
+    def page_count(self, document: Any) -> int:
+        return document.page_count
+
+    def page_text(self, document: Any, index: int) -> str:
+        return document.load_page(index).get_text()
+
+
+class PyPDF2Backend(PdfBackend):
+    name = "PyPDF2"
+
+    @property
+    def available(self) -> bool:
+        return PyPDF2 is not None
+
+    @property
+    def version(self) -> str:
+        return PyPDF2.__version__
+
+    @contextmanager
+    def open(self, file_path: Path) -> Iterator[Any]:
+        with blob_codec.open_seekable(file_path) as file:
+            yield PyPDF2.PdfReader(file)
+
+    def page_count(self, document: Any) -> int:
+        return len(document.pages)
+
+    def page_text(self, document: Any, index: int) -> str:
+        return document.pages[index].extract_text()
+
+
+# In order of preference when only one is wanted
+BACKENDS = [PyMuPDFBackend(), PyPDF2Backend()]
+
+
+def available_backends() -> List[PdfBackend]:
+    return [backend for backend in BACKENDS if backend.available]
+
+
+def get_backend(name: str) -> PdfBackend:
+    """
+    Backend by name, case-insensitive
+
+    Raises:
+        ValueError: If no installed backend has that name
+    """
+    for backend in available_backends():
+        if backend.name.lower() == name.lower():
+            return backend
+    raise ValueError(f"PDF backend {name} is not installed")
+
+
+def resolve_backend(name: Optional[str]) -> Optional[str]:
+    """
+    Validate a configured backend name: "auto", "pymupdf" or "pypdf2"
+
+    A named backend that is not installed falls back to auto. Returns None
+    when no PDF library is installed at all.
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    requested = (name or BACKEND_AUTO).strip().lower()
+    known = [backend.name.lower() for backend in BACKENDS]
+    if requested != BACKEND_AUTO and requested not in known:
+        raise ValueError(f"Unknown PDF backend '{name}'. Use auto, {' or '.join(known)}")
+
+    installed = available_backends()
+    if not installed:
+        return None
+    if requested == BACKEND_AUTO:
+        return BACKEND_AUTO if len(installed) > 1 else installed[0].name
+    if requested not in [backend.name.lower() for backend in installed]:
+        logger.warning(f"⚠️ PDF backend {name} requested but not installed; choosing per document")
+        return BACKEND_AUTO if len(installed) > 1 else installed[0].name
+    return get_backend(requested).name
+
+
+def backend_identity(name: str) -> Tuple[str, str]:
+    """(backend, version) for extraction cache keys; auto depends on every installed library"""
+    if name == BACKEND_AUTO:
+        return BACKEND_AUTO, "+".join(f"{backend.name}-{backend.version}" for backend in available_backends())
+    backend = get_backend(name)
+    return backend.name, backend.version
+
+
+def calibrate(file_path: Path, start: int) -> Tuple[PdfBackend, str]:
+    """
+    Choose the backend for one document from a timed trial on a few of its pages
+
+    Returns:
+        Tuple[PdfBackend, str]: The backend, and a processing note explaining the choice
+    """
+    candidates = available_backends()
+    trials = []
+    for backend in candidates:
+        started = time.perf_counter()
+        try:
+            with backend.open(file_path) as document:
+                stop = min(start + PROBE_PAGES, backend.page_count(document))
+                characters = 0
+                for index in range(start, stop):
+                    try:
+                        characters += sum(len(word) for word in (backend.page_text(document, index) or "").split())
+                    except Exception:
+                        pass  # a page this backend cannot read counts as no text
+        except Exception as e:
+            logger.debug(f"PDF backend {backend.name} failed calibration: {e}")
+            continue
+        trials.append((backend, time.perf_counter() - started, characters, stop - start))
+
+    if not trials:
+        # Nothing could open it; let the first backend report the error
+        return candidates[0], f"PDF backend {candidates[0].name}: no backend could open the file for calibration"
+
+    most_text = max(characters for _, _, characters, _ in trials)
+    good_enough = [trial for trial in trials if trial[2] >= most_text * MIN_TEXT_RATIO]
+    backend, elapsed, characters, pages = min(good_enough, key=lambda trial: trial[1])
+    others = ", ".join(f"{other.name} {seconds * 1000:.0f}ms/{found} chars"
+                       for other, seconds, found, _ in trials if other is not backend)
+    return backend, (f"PDF backend {backend.name} chosen on {pages} trial page(s): "
+                     f"{elapsed * 1000:.0f}ms/{characters} chars" + (f" vs {others}" if others else ""))
@@ -0,0 +1,310 @@
+"""
+Streaming RTF Decoder
+Plain text from RTF bytes in one pass, without control words, font tables or pictures
+Part of knowNothing Creative RAG
+
+Bytes are fed in chunks of any size; a control word cut off at the end of a
+chunk is held back until the next one. Groups carry their own font, \\uc
+skip count and skip flag. Destinations that are not body text (font and
+colour tables, stylesheets, document info, pictures, field instructions,
+headers and footers, anything marked ignorable with \\*) produce no output.
+Text bytes, literal or \\'hh escaped, are decoded in the code page of the
+current font's charset, falling back to the document's \\ansicpg; \\uN
+escapes give the character directly and skip their \\ucN fallback.
+"""
+
+import codecs
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+# Bump when decoding rules change, so cached RTF extractions are redone
+DECODER_VERSION = "1"
+
+DEFAULT_CODEPAGE = "cp1252"
+
+_TOKEN = re.compile(
+    rb"\\([a-zA-Z]{1,32})(-?\d{1,10})? ?"  # control word with optional parameter
+    rb"|\\'([0-9a-fA-F]{2})"  # hex-escaped byte
+    rb"|\\([^a-zA-Z'])"  # control symbol
+    rb"|\\'?"  # escape cut off at the end of a chunk
+    rb"|([{}])"
+    rb"|[\r\n]+"  # raw line breaks are not text in RTF
+    rb"|[^\\{}\r\n]+"
+)
+
+# Destinations whose content is never document text
+SKIP_DESTINATIONS = frozenset("""
+    aftncn aftnsep aftnsepc annotation atnauthor atndate atnicn atnid atnparent atnref atntime
+    atrfend atrfstart author background bkmkend bkmkstart blipuid buptim category
+    colorschememapping colortbl comment company creatim datafield datastore defchp defpap do
+    doccomm docvar dptxbxtext ebcend ebcstart factoidname falt fchars ffdeftext ffentrymcr
+    ffexitmcr ffformat ffhelptext ffl ffname ffstattext file filetbl fldinst fldtype fname
+    fontemb fontfile footer footerf footerl footerr footnote formfield ftncn ftnsep ftnsepc
+    generator gridtbl header headerf headerl headerr hl hlfr hlinkbase hlloc hlsrc hsv htmltag
+    info keycode keywords latentstyles lchars levelnumbers leveltext lfolevel linkval list
+    listlevel listname listoverride listoverridetable listpicture liststylename listtable
+    listtext lsdlockedexcept mailmerge manager mmathPr nesttableprops nextfile nonesttables
+    nonshppict objalias objclass objdata object objname objsect objtime oldcprops oldpprops
+    oldsprops oldtprops oleclsid operator panose password passwordhash pgp pgptbl picprop pict
+    pn pnseclvl pntext pntxta pntxtb printim private propname protend protstart protusertbl
+    pxe revtbl revtim rsidtbl rxe shp shpgrp shpinst shppict shprslt shptxt sn sp staticval
+    stylesheet subject sv svb tc template themedata title txe ud upr userprops wgrffmtfilter
+    windowcaption writereservation writereservhash xe xform xmlattrname xmlattrvalue xmlclose
+    xmlname xmlnstbl xmlopen
+""".split())
+
+# Control words that stand for text
+_WORD_TEXT = {
+    "par": "\n", "line": "\n", "sect": "\n", "page": "\n", "tab": "\t",
+    "emdash": "\u2014", "endash": "\u2013", "bullet": "\u2022",
+    "lquote": "\u2018", "rquote": "\u2019", "ldblquote": "\u201c", "rdblquote": "\u201d",
+    "emspace": " ", "enspace": " ", "qmspace": " ",
+}
+_SYMBOL_TEXT = {b"~": " ", b"_": "-", b"\n": "\n", b"\r": "\n"}
+_LITERAL_SYMBOLS = {b"\\", b"{", b"}"}
+
+# Character sets that fonts declare with \fcharsetN
+_CHARSET_CODEPAGES = {
+    77: "mac_roman", 128: "cp932", 129: "cp949", 134: "gbk", 136: "cp950", 161: "cp1253",
+    162: "cp1254", 163: "cp1258", 177: "cp1255", 178: "cp1256", 186: "cp1257", 204: "cp1251",
+    222: "cp874", 238: "cp1250",
+}
+_CHARSET_WORDS = {"ansi": "cp1252", "mac": "mac_roman", "pc": "cp437", "pca": "cp850"}
+
+
+class _Group(NamedTuple):
+    skip: bool  # inside a destination that produces no text
+    font_table: bool
+    font: Optional[int]
+    uc: int  # fallback characters after each \uN
+
+
+def codepage_name(codepage: int) -> Optional[str]:
+    """Python codec for a Windows code page number, or None if there is none"""
+    name = f"cp{codepage}"
+    try:
+        codecs.lookup(name)
+    except LookupError:
+        return None
+    return name
+
+
+class RtfDecoder:
+    """
+    Incremental RTF to plain text
+    - feed() returns the text decoded so far; finish() flushes the rest
+    - "".join(feed results + finish()) is the same however the bytes are split
+    - is_rtf tells whether the input started like an RTF document
+    """
+
+    def __init__(self):
+        self.codepage = DEFAULT_CODEPAGE
+        self.is_rtf: Optional[bool] = None
+        self.unicode_escapes = 0
+        self.skipped_groups = 0
+
+        self._pending = b""
+        self._stack: List[_Group] = []
+        self._group = _Group(skip=False, font_table=False, font=None, uc=1)
+        self._group_start = False  # no control word seen yet in the current group
+        self._font_codepages: Dict[int, str] = {}
+        self._defining_font: Optional[int] = None
+        self._default_font: Optional[int] = None
+
+        self._bytes = bytearray()  # text bytes awaiting decoding in the current code page
+        self._out: List[str] = []
+        self._fallback_left = 0  # \uN fallback characters still to skip
+        self._high_surrogate: Optional[int] = None
+        self._cell_open = False  # a \cell waits for a separator before the next text
+        self._binary_left = 0  # \binN raw bytes still to skip
+
+    def feed(self, data: bytes) -> str:
+        if self.is_rtf is None:
+            head = (self._pending + data).lstrip()
+            if len(head) >= 5 or not data:
+                self.is_rtf = head.startswith(b"{\\rtf")
+        self._pending = self._process(self._pending + data, final=False)
+        return self._take()
+
+    def finish(self) -> str:
+        """Decode whatever is still held back, ignoring a control word cut off at the end"""
+        self._process(self._pending, final=True)
+        self._pending = b""
+        self._flush_bytes()
+        return self._take()
+
+    def _take(self) -> str:
+        text = "".join(self._out)
+        self._out = []
+        return text
+
+    def _process(self, data: bytes, final: bool) -> bytes:
+        """Consume tokens from data; returns the unconsumed tail when not final"""
+        position = 0
+        end = len(data)
+        while position < end:
+            if self._binary_left:
+                taken = min(self._binary_left, end - position)
+                self._binary_left -= taken
+                position += taken
+                continue
+
+            match = _TOKEN.match(data, position)
+            if data[position] == 0x5C and not final and match.end() >= end - 1:
+                # The escape may continue in the next chunk
+                return data[position:]
+            position = match.end()
+
+            word, parameter, hex_byte, symbol, brace = match.groups()
+            if word is not None:
+                self._control_word(word.decode("ascii"), int(parameter) if parameter is not None else None)
+            elif hex_byte is not None:
+                self._text_bytes(bytes([int(hex_byte, 16)]))
+            elif symbol is not None:
+                self._control_symbol(symbol)
+            elif brace == b"{":
+                self._open_group()
+            elif brace == b"}":
+                self._close_group()
+            elif data[match.start()] not in b"\\\r\n":
+                self._text_bytes(match.group())
+        return b""
+
+    def _open_group(self):
+        self._fallback_left = 0
+        self._flush_bytes()
+        self._stack.append(self._group)
+        self._group_start = True
+
+    def _close_group(self):
+        self._fallback_left = 0
+        self._flush_bytes()
+        self._group_start = False
+        if self._group.font_table:
+            self._defining_font = None
+        if self._stack:
+            self._group = self._stack.pop()
+
+    def _skip_group(self):
+        if not self._group.skip:
+            self.skipped_groups += 1
+        self._group = self._group._replace(skip=True)
+
+    def _control_symbol(self, symbol: bytes):
+        if symbol == b"*":
+            if self._group_start:
+                self._skip_group()  # ignorable destination
+            return
+        self._group_start = False
+        if self._skip_fallback():
+            return
+        if symbol in _LITERAL_SYMBOLS:
+            self._text_bytes(symbol)
+        elif symbol in _SYMBOL_TEXT:
+            self._emit(_SYMBOL_TEXT[symbol])
+
+    def _control_word(self, word: str, parameter: Optional[int]):
+        starts_group = self._group_start
+        self._group_start = False
+
+        if word == "bin":
+            self._flush_bytes()
+            self._binary_left = max(parameter or 0, 0)
+            return
+        if self._skip_fallback():
+            return
+
+        if starts_group:
+            if word == "fonttbl":
+                self._group = self._group._replace(skip=True, font_table=True)
+                return
+            if word in SKIP_DESTINATIONS:
+                self._skip_group()
+                return
+
+        if word == "u" and parameter is not None:
+            self._unicode(parameter)
+        elif word == "uc" and parameter is not None:
+            self._group = self._group._replace(uc=max(parameter, 0))
+        elif word == "f" and parameter is not None:
+            self._flush_bytes()
+            if self._group.font_table:
+                self._defining_font = parameter
+            else:
+                self._group = self._group._replace(font=parameter)
+        elif word in ("fcharset", "cpg") and self._defining_font is not None and parameter is not None:
+            codepage = _CHARSET_CODEPAGES.get(parameter) if word == "fcharset" else codepage_name(parameter)
+            if codepage:
+                self._font_codepages[self._defining_font] = codepage
+        elif word == "ansicpg" and parameter is not None:
+            self._flush_bytes()
+            self.codepage = codepage_name(parameter) or self.codepage
+        elif word in _CHARSET_WORDS:
+            self._flush_bytes()
+            self.codepage = _CHARSET_WORDS[word]
+        elif word == "deff" and parameter is not None:
+            self._default_font = parameter
+        elif word in ("cell", "nestcell"):
+            self._flush_bytes()
+            if not self._group.skip:
+                self._cell_open = True
+        elif word in ("row", "nestrow"):
+            self._cell_open = False
+            self._emit("\n")
+        elif word in _WORD_TEXT:
+            self._emit(_WORD_TEXT[word])
+
+    def _skip_fallback(self) -> bool:
+        """Count one token against the fallback characters of the last \\uN"""
+        if self._fallback_left:
+            self._fallback_left -= 1
+            return True
+        return False
+
+    def _unicode(self, value: int):
+        self._flush_bytes()
+        if value < 0:
+            value += 0x10000
+        self._fallback_left = self._group.uc
+        if self._group.skip:
+            return
+        self.unicode_escapes += 1
+
+        if 0xD800 <= value < 0xDC00:
+            self._high_surrogate = value
+            return
+        if 0xDC00 <= value < 0xE000 and self._high_surrogate is not None:
+            value = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (value - 0xDC00)
+        self._high_surrogate = None
+        self._emit(chr(value) if not 0xD800 <= value < 0xE000 else "\ufffd")
+
+    def _text_bytes(self, data: bytes):
+        self._group_start = False
+        if self._fallback_left:
+            skipped = min(self._fallback_left, len(data))
+            self._fallback_left -= skipped
+            data = data[skipped:]
+        if data and not self._group.skip:
+            self._bytes += data
+
+    def _flush_bytes(self):
+        if not self._bytes:
+            return
+        font = self._group.font if self._group.font is not None else self._default_font
+        codepage = self._font_codepages.get(font, self.codepage)
+        text = bytes(self._bytes).decode(codepage, errors="replace")
+        self._bytes.clear()
+        self._emit(text)
+
+    def _emit(self, text: str):
+        if self._group.skip:
+            return
+        if self._bytes:
+            self._flush_bytes()
+        if self._high_surrogate is not None:
+            self._high_surrogate = None
+            self._out.append("\ufffd")
+        if self._cell_open and text != "\n":
+            self._out.append(" | ")
+            self._cell_open = False
+        self._out.append(text)
@@ -5,137 +5,443 @@ Part of knowNothing Creative RAG
 """
 
 import os
-import sqlite3
+import asyncio
+import base64
+import hashlib
+import json
 import uuid
 import aiofiles
 import aiofiles.os
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
 from fastapi import UploadFile
 
+from ..config import settings
+from . import blob_codec, byte_cache, library_stats, vector_store
+from .database import get_pool
+from .upload_layout import sharded_path
+from .write_queue import get_writer
+
 logger = logging.getLogger(__name__)
 
+
+class DocumentTooLargeError(ValueError):
+    """Raised when an upload exceeds the maximum allowed size"""
+
+
+@dataclass
+class ReceivedUpload:
+    """A file streamed to a temporary path, not yet in the blob store"""
+    document_id: str
+    original_filename: str
+    file_extension: str
+    temp_path: Path
+    file_size: int
+    content_hash: str
+    stored_size: int
+    codec: str
+
+
 class StorageManager:
     """
     Manages document storage and metadata
-    - Stores files in data/uploads/
-    - Tracks metadata in SQLite
+    - Stores files in data/uploads/ab/cd/, one blob per unique SHA-256
+    - Tracks metadata in SQLite, many documents per blob
+    - Optionally compresses blobs (zlib/zstd) by file type, transparently to readers
     - Returns document IDs for future reference
     """
     
-    def __init__(self, upload_dir: str = "data/uploads", db_path: str = "data/documents.db"):
+    ALLOWED_EXTENSIONS = {'.pdf', '.txt', '.docx', '.doc', '.rtf'}
+    MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+    CHUNK_SIZE = 1024 * 1024  # 1MB streaming chunks
+    MAX_BULK_DELETE = 1000
+    LOOKUP_BATCH_SIZE = 500  # IDs per IN (...) query
+    
+    # Tables whose rows belong to a document and are deleted with it
+    DEPENDENT_TABLES = ('document_text', 'document_pages', 'document_embeddings', 'text_chunks')
+    
+    def __init__(self, upload_dir: str = "data/uploads", db_path: str = "data/documents.db",
+                 compression: Optional[str] = None, chroma_path: str = vector_store.DEFAULT_CHROMA_PATH):
         self.upload_dir = Path(upload_dir)
         self.db_path = db_path
+        self.chroma_path = chroma_path
+        self.compression = blob_codec.resolve_codec(
+            settings.STORAGE_COMPRESSION if compression is None else compression
+        )
+        self.compression_level = settings.STORAGE_COMPRESSION_LEVEL
+        self.pool = get_pool(db_path)
+        self.writer = get_writer(db_path)
+        
+        # Shared with TextExtractor: document rows and extracted text
+        self.document_cache = byte_cache.document_cache()
+        self.text_cache = byte_cache.text_cache()
         
         # Create directories if they don't exist
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         Path("data").mkdir(exist_ok=True)
         
+        # Per-hash locks serialize blob reference changes with the file moves they imply
+        self._blob_locks: Dict[str, list] = {}
+        
         # Initialize database
         self._init_database()
     
     def _init_database(self):
         """Initialize SQLite database with documents table"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS documents (
-                    id TEXT PRIMARY KEY,
-                    original_filename TEXT NOT NULL,
-                    stored_filename TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    file_size INTEGER NOT NULL,
-                    file_type TEXT NOT NULL,
-                    mime_type TEXT,
-                    upload_date TEXT NOT NULL,
-                    status TEXT DEFAULT 'stored'
-                )
-            """)
-            
-            conn.commit()
-            conn.close()
+            with self.pool.transaction() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS documents (
+                        id TEXT PRIMARY KEY,
+                        original_filename TEXT NOT NULL,
+                        stored_filename TEXT NOT NULL,
+                        file_path TEXT NOT NULL,
+                        file_size INTEGER NOT NULL,
+                        file_type TEXT NOT NULL,
+                        mime_type TEXT,
+                        upload_date TEXT NOT NULL,
+                        status TEXT DEFAULT 'stored'
+                    )
+                """)
+                
+                # Add content hash column to databases created before streaming uploads
+                cursor.execute("PRAGMA table_info(documents)")
+                columns = {row[1] for row in cursor.fetchall()}
+                if 'content_hash' not in columns:
+                    cursor.execute("ALTER TABLE documents ADD COLUMN content_hash TEXT")
+                
+                # Cached file presence kept current by the orphan reconciler (NULL = never checked)
+                if 'file_present' not in columns:
+                    cursor.execute("ALTER TABLE documents ADD COLUMN file_present INTEGER")
+                
+                # Content-addressed blobs shared by documents with identical bytes
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS blobs (
+                        content_hash TEXT PRIMARY KEY,
+                        file_path TEXT NOT NULL,
+                        file_size INTEGER NOT NULL,
+                        ref_count INTEGER NOT NULL DEFAULT 0,
+                        created_date TEXT NOT NULL
+                    )
+                """)
+                
+                # Stored size and codec of blobs written since compression support
+                cursor.execute("PRAGMA table_info(blobs)")
+                blob_columns = {row[1] for row in cursor.fetchall()}
+                if 'stored_size' not in blob_columns:
+                    cursor.execute("ALTER TABLE blobs ADD COLUMN stored_size INTEGER")
+                if 'codec' not in blob_columns:
+                    cursor.execute("ALTER TABLE blobs ADD COLUMN codec TEXT")
+                
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_documents_content_hash
+                    ON documents (content_hash)
+                """)
+                
+                # Keyset pagination: newest first, optionally within one file type
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_documents_upload_date
+                    ON documents (upload_date DESC, id DESC)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_documents_type_upload_date
+                    ON documents (file_type, upload_date DESC, id DESC)
+                """)
+                
+                # Counters behind get_storage_stats
+                library_stats.install_document_triggers(conn)
             logger.info("✅ Document database initialized")
             
         except Exception as e:
             logger.error(f"❌ Database initialization failed: {e}")
             raise
     
-    async def store_document(self, file: UploadFile) -> str:
+    async def store_document(self, file: UploadFile, content_length: Optional[int] = None) -> str:
         """
         Store uploaded document and return document ID
         
+        The upload is streamed to a temporary file in fixed-size chunks while
+        its size and SHA-256 are computed. Content already in the store is
+        not written twice: the new document just references the existing blob.
+        When a storage codec is configured, compressible types are written
+        compressed; size and hash always describe the original bytes.
+        
         Args:
-            file: FastAPI UploadFile object
+            file: FastAPI UploadFile, or any object with filename,
+                content_type and an async read(size)
+            content_length: Declared upload size in bytes, if known
             
         Returns:
             str: Unique document ID
         """
         try:
-            # Generate unique document ID
-            document_id = str(uuid.uuid4())
-            
-            # Get file info
-            original_filename = file.filename or "unknown_file"
-            file_extension = Path(original_filename).suffix.lower()
-            mime_type = file.content_type or "application/octet-stream"
-            
-            # Create stored filename (ID + extension)
-            stored_filename = f"{document_id}{file_extension}"
-            file_path = self.upload_dir / stored_filename
-            
-            # Read file content
-            file_content = await file.read()
-            file_size = len(file_content)
-            
-            # Validate file type
-            allowed_extensions = {'.pdf', '.txt', '.docx', '.doc', '.rtf'}
-            if file_extension not in allowed_extensions:
-                raise ValueError(f"File type {file_extension} not supported. Allowed: {', '.join(allowed_extensions)}")
-            
-            # Validate file size (50MB limit)
-            max_size = 50 * 1024 * 1024  # 50MB
-            if file_size > max_size:
-                raise ValueError(f"File too large ({file_size / (1024*1024):.1f}MB). Maximum size: 50MB")
-            
-            # Store file
-            async with aiofiles.open(file_path, 'wb') as f:
-                await f.write(file_content)
-            
-            # Store metadata in database
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO documents 
-                (id, original_filename, stored_filename, file_path, file_size, file_type, mime_type, upload_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                document_id,
-                original_filename,
-                stored_filename,
-                str(file_path),
-                file_size,
-                file_extension,
-                mime_type,
-                datetime.utcnow().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"✅ Document stored: {original_filename} -> {document_id}")
+            received = await self.receive_stream(file, file.filename or "unknown_file", content_length)
+            document_id, _ = await self.commit_received(received, file.content_type or "application/octet-stream")
             return document_id
             
         except Exception as e:
             logger.error(f"❌ Document storage failed: {e}")
+            raise
+    
+    async def receive_stream(self, stream, original_filename: str,
+                             content_length: Optional[int] = None) -> ReceivedUpload:
+        """
+        Validate and stream one file into a temporary upload file
+        
+        Args:
+            stream: Object with an async read(size) method (e.g. UploadFile)
+            original_filename: Name the document will be listed under
+            content_length: Declared size in bytes, if known
+            
+        Returns:
+            ReceivedUpload: Temporary file plus size and hash, ready for commit_received
+        
+        Raises:
+            ValueError: Unsupported type; DocumentTooLargeError if over MAX_FILE_SIZE
+        """
+        document_id = str(uuid.uuid4())
+        file_extension = Path(original_filename).suffix.lower()
+        
+        # Validate before touching the body
+        self._validate_upload(file_extension, content_length)
+        
+        temp_path = self.upload_dir / f".{document_id}{file_extension}.part"
+        codec = blob_codec.codec_for(file_extension, self.compression)
+        try:
+            file_size, content_hash, stored_size = await self._stream_to_file(stream, temp_path, codec)
+        except Exception:
             # Clean up partial file if it exists
-            if 'file_path' in locals() and Path(file_path).exists():
-                await aiofiles.os.remove(file_path)
+            if temp_path.exists():
+                await aiofiles.os.remove(temp_path)
             raise
+        
+        return ReceivedUpload(
+            document_id=document_id,
+            original_filename=original_filename,
+            file_extension=file_extension,
+            temp_path=temp_path,
+            file_size=file_size,
+            content_hash=content_hash,
+            stored_size=stored_size,
+            codec=codec
+        )
+    
+    async def commit_received(self, received: ReceivedUpload, mime_type: str) -> Tuple[str, bool]:
+        """
+        Move a received file into the blob store and record its document
+        
+        Concurrent calls share group commits, so callers with many files can
+        start several and gather them.
+        
+        Returns:
+            Tuple[str, bool]: Document ID and whether the content was already stored
+        """
+        temp_path: Optional[Path] = received.temp_path
+        try:
+            async with self._blob_guard(received.content_hash):
+                blob_path, deduplicated = await self._claim_blob(
+                    temp_path, received.content_hash, received.file_extension, received.file_size
+                )
+                temp_path = None
+                
+                try:
+                    # Store metadata and take a blob reference in one transaction
+                    await self.writer.submit(lambda conn: self._insert_document(conn, (
+                        received.document_id,
+                        received.original_filename,
+                        blob_path.name,
+                        str(blob_path),
+                        received.file_size,
+                        received.file_extension,
+                        mime_type,
+                        datetime.utcnow().isoformat(),
+                        received.content_hash
+                    ), received.stored_size, received.codec))
+                    
+                except Exception:
+                    # A freshly written blob nobody references must not linger
+                    if not deduplicated and blob_path.exists():
+                        await aiofiles.os.remove(blob_path)
+                    raise
+            
+        except Exception:
+            if temp_path is not None and temp_path.exists():
+                await aiofiles.os.remove(temp_path)
+            raise
+        
+        if deduplicated:
+            logger.info(f"♻️ Document deduplicated: {received.original_filename} -> {received.document_id} "
+                        f"(blob {received.content_hash[:12]})")
+        else:
+            logger.info(f"✅ Document stored: {received.original_filename} -> {received.document_id}")
+        return received.document_id, deduplicated
+    
+    @asynccontextmanager
+    async def _blob_guard(self, content_hash: str):
+        """Hold the lock for one blob; locks are dropped once nobody waits on them"""
+        entry = self._blob_locks.get(content_hash)
+        if entry is None:
+            entry = self._blob_locks[content_hash] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._blob_locks[content_hash]
+    
+    @staticmethod
+    def _insert_document(conn, values: Tuple, stored_size: int, codec: str):
+        """Insert a document row and take a reference on its blob (writer thread)"""
+        document_id, original_filename, _, file_path, file_size, file_type, mime_type, upload_date, content_hash = values
+        
+        # Blob first, so the stats triggers see the document's file as shared
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO blobs (content_hash, file_path, file_size, stored_size, codec, ref_count, created_date)
+            VALUES (?, ?, ?, ?, ?, 1, ?)
+            ON CONFLICT (content_hash) DO UPDATE SET ref_count = ref_count + 1
+        """, (content_hash, file_path, file_size, stored_size, codec, upload_date))
+        
+        # Point at wherever the blob lives now; a layout migration may have moved it
+        cursor.execute("SELECT file_path FROM blobs WHERE content_hash = ?", (content_hash,))
+        file_path = cursor.fetchone()[0]
+        cursor.execute("""
+            INSERT INTO documents 
+            (id, original_filename, stored_filename, file_path, file_size, file_type, mime_type, upload_date,
+             content_hash, file_present)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+        """, (document_id, original_filename, Path(file_path).name, file_path, file_size, file_type,
+              mime_type, upload_date, content_hash))
+    
+    @staticmethod
+    def _delete_document_row(conn, doc: Dict) -> Optional[str]:
+        """
+        Delete a document row and drop its blob reference (writer thread)
+        
+        Returns:
+            Optional[str]: Path of the file to remove now that nothing
+            references it, or None if it is still shared (or already gone)
+        """
+        cursor = conn.cursor()
+        
+        # Re-read the path: a layout migration may have moved the file since doc was loaded
+        cursor.execute("SELECT file_path FROM documents WHERE id = ?", (doc['id'],))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        file_path = row[0]
+        cursor.execute("DELETE FROM documents WHERE id = ?", (doc['id'],))
+        
+        # The blob goes away with its last document
+        content_hash = doc.get('content_hash')
+        if not content_hash:
+            return file_path
+        
+        cursor.execute("""
+            UPDATE blobs SET ref_count = ref_count - 1
+            WHERE content_hash = ? AND file_path = ?
+        """, (content_hash, file_path))
+        if not cursor.rowcount:
+            return file_path
+        
+        cursor.execute("SELECT ref_count FROM blobs WHERE content_hash = ?", (content_hash,))
+        if cursor.fetchone()[0] > 0:
+            return None
+        
+        cursor.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,))
+        return file_path
+    
+    async def _claim_blob(self, temp_path: Path, content_hash: str, file_extension: str,
+                          file_size: int) -> Tuple[Path, bool]:
+        """
+        Move a freshly streamed upload into the blob store
+        
+        Must be called inside _blob_guard for the same hash.
+        
+        Returns:
+            Tuple[Path, bool]: Blob path and whether the content already existed
+        """
+        row = await self.pool.fetchone(
+            "SELECT file_path FROM blobs WHERE content_hash = ?", (content_hash,)
+        )
+        
+        if row and Path(row[0]).exists():
+            await aiofiles.os.remove(temp_path)
+            return Path(row[0]), True
+        
+        blob_path = Path(row[0]) if row else sharded_path(self.upload_dir, content_hash, file_extension)
+        await aiofiles.os.makedirs(blob_path.parent, exist_ok=True)
+        await aiofiles.os.replace(temp_path, blob_path)
+        return blob_path, False
+    
+    def _validate_upload(self, file_extension: str, content_length: Optional[int]):
+        """Reject unsupported types and oversized uploads before any body is read"""
+        if file_extension not in self.ALLOWED_EXTENSIONS:
+            raise ValueError(
+                f"File type {file_extension} not supported. "
+                f"Allowed: {', '.join(sorted(self.ALLOWED_EXTENSIONS))}"
+            )
+        
+        if content_length is not None and content_length > self.MAX_FILE_SIZE:
+            raise DocumentTooLargeError(
+                f"File too large ({content_length / (1024*1024):.1f}MB). "
+                f"Maximum size: {self.MAX_FILE_SIZE // (1024*1024)}MB"
+            )
+    
+    async def _stream_to_file(self, file: UploadFile, target_path: Path,
+                              codec: str = blob_codec.CODEC_NONE) -> Tuple[int, str, int]:
+        """
+        Copy an upload to disk chunk by chunk, compressing it if a codec is given
+        
+        Returns:
+            Tuple[int, str, int]: Original size, SHA-256 hex digest of the
+            original bytes, and bytes written to disk
+        """
+        hasher = hashlib.sha256()
+        file_size = 0
+        stored_size = 0
+        compressor = None
+        if codec != blob_codec.CODEC_NONE:
+            compressor = blob_codec.make_compressor(codec, self.compression_level)
+        
+        async with aiofiles.open(target_path, 'wb') as f:
+            if compressor:
+                header = blob_codec.header(codec)
+                await f.write(header)
+                stored_size += len(header)
+            
+            while True:
+                chunk = await file.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                
+                file_size += len(chunk)
+                if file_size > self.MAX_FILE_SIZE:
+                    raise DocumentTooLargeError(
+                        f"File too large. Maximum size: {self.MAX_FILE_SIZE // (1024*1024)}MB"
+                    )
+                
+                hasher.update(chunk)
+                if compressor:
+                    # Compression is CPU-bound; keep it off the event loop
+                    chunk = await asyncio.to_thread(compressor.compress, chunk)
+                await f.write(chunk)
+                stored_size += len(chunk)
+            
+            if compressor:
+                tail = compressor.flush()
+                await f.write(tail)
+                stored_size += len(tail)
+        
+        return file_size, hasher.hexdigest(), stored_size
     
     async def get_document(self, document_id: str) -> Optional[Dict]:
         """
@@ -148,81 +454,217 @@ class StorageManager:
             Dict: Document metadata or None if not found
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Enable dict-like access
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM documents WHERE id = ?", (document_id,))
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                # Convert row to dict and add computed fields
-                doc = dict(row)
-                doc['file_exists'] = Path(doc['file_path']).exists()
-                doc['file_size_mb'] = round(doc['file_size'] / (1024 * 1024), 2)
-                return doc
-            
-            return None
+            key = (self.db_path, document_id)
+            row = self.document_cache.get(key)
+            if row is None:
+                generation = self.document_cache.generation
+                fetched = await self.pool.fetchone("SELECT * FROM documents WHERE id = ?", (document_id,))
+                if not fetched:
+                    return None
+                row = dict(fetched)
+                self.document_cache.put(key, row, generation)
+            
+            # Copy the cached row and add computed fields
+            return self._row_to_document(row, include_file_status=True)
             
         except Exception as e:
             logger.error(f"❌ Failed to get document {document_id}: {e}")
             return None
     
-    async def list_documents(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+    async def get_document_file(self, document_id: str) -> Optional[Dict]:
+        """
+        Locate a document's stored file for download
+        
+        Args:
+            document_id: Document ID to serve
+            
+        Returns:
+            Dict: path, original size, mtime, etag, mime type, original filename
+            and whether the file is stored compressed, or None if the document
+            or its file is missing
+        """
+        for attempt in range(2):
+            doc = await self.get_document(document_id)
+            if not doc:
+                return None
+            
+            try:
+                stat_result = await aiofiles.os.stat(doc['file_path'])
+                compressed = await asyncio.to_thread(blob_codec.read_codec, doc['file_path']) != blob_codec.CODEC_NONE
+                break
+            except FileNotFoundError:
+                # A cached row can predate a layout migration; look again before giving up
+                self.invalidate_documents([document_id])
+        else:
+            await self.mark_file_present(document_id, False)
+            return None
+        
+        # Content hashes make strong validators; legacy files fall back to mtime/size
+        if doc.get('content_hash'):
+            etag = f'"{doc["content_hash"]}"'
+        else:
+            etag = f'W/"{int(stat_result.st_mtime)}-{stat_result.st_size}"'
+        
+        return {
+            'path': doc['file_path'],
+            # Compressed blobs are served inflated, at their original size
+            'file_size': doc['file_size'] if compressed else stat_result.st_size,
+            'compressed': compressed,
+            'last_modified': stat_result.st_mtime,
+            'etag': etag,
+            'mime_type': doc.get('mime_type') or 'application/octet-stream',
+            'filename': doc['original_filename']
+        }
+    
+    async def list_documents(self, limit: int = 100, offset: int = 0,
+                             include_file_status: bool = False) -> List[Dict]:
         """
         List all stored documents
         
+        Prefer list_documents_page for browsing; OFFSET gets slower with depth.
+        
         Args:
             limit: Maximum number of documents to return
             offset: Number of documents to skip
+            include_file_status: Add file_exists from the cached file presence
             
         Returns:
             List[Dict]: List of document metadata
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("""
+            rows = await self.pool.fetchall("""
                 SELECT * FROM documents 
-                ORDER BY upload_date DESC 
+                ORDER BY upload_date DESC, id DESC 
                 LIMIT ? OFFSET ?
             """, (limit, offset))
             
-            rows = cursor.fetchall()
-            conn.close()
+            return [self._row_to_document(row, include_file_status) for row in rows]
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to list documents: {e}")
+            return []
+    
+    async def list_documents_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        file_type: Optional[str] = None,
+        text_extracted: Optional[bool] = None,
+        include_file_status: bool = False
+    ) -> Dict:
+        """
+        List documents newest first using keyset pagination
+        
+        Each page seeks straight to (upload_date, id) of the previous page's
+        last row, so page cost does not grow with depth.
+        
+        Args:
+            limit: Maximum number of documents to return
+            cursor: next_cursor from the previous page, or None for the first page
+            file_type: Only documents with this extension (e.g. ".pdf")
+            text_extracted: Only documents with (True) or without (False) extracted text
+            include_file_status: Add file_exists from the cached file presence
+            
+        Returns:
+            Dict: documents, next_cursor (None on the last page) and has_more
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        conditions = []
+        params: List = []
+        
+        if cursor:
+            upload_date, document_id = self._decode_cursor(cursor)
+            conditions.append("(upload_date, id) < (?, ?)")
+            params.extend([upload_date, document_id])
+        if file_type:
+            conditions.append("file_type = ?")
+            params.append(file_type.lower() if file_type.startswith('.') else f".{file_type.lower()}")
+        if text_extracted is not None:
+            conditions.append("text_extracted = ?")
+            params.append(1 if text_extracted else 0)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        try:
+            # One extra row tells us whether another page exists
+            rows = await self.pool.fetchall(f"""
+                SELECT * FROM documents 
+                {where}
+                ORDER BY upload_date DESC, id DESC 
+                LIMIT ?
+            """, (*params, limit + 1))
             
-            documents = []
-            for row in rows:
-                doc = dict(row)
-                doc['file_exists'] = Path(doc['file_path']).exists()
-                doc['file_size_mb'] = round(doc['file_size'] / (1024 * 1024), 2)
-                documents.append(doc)
+            has_more = len(rows) > limit
+            rows = rows[:limit]
             
-            return documents
+            return {
+                "documents": [self._row_to_document(row, include_file_status) for row in rows],
+                "next_cursor": self._encode_cursor(rows[-1]) if has_more else None,
+                "has_more": has_more
+            }
             
         except Exception as e:
             logger.error(f"❌ Failed to list documents: {e}")
-            return []
+            return {"documents": [], "next_cursor": None, "has_more": False, "error": str(e)}
+    
+    async def mark_file_present(self, document_id: str, present: bool):
+        """Update the cached file presence after noticing a file appear or vanish"""
+        await self.writer.execute(
+            "UPDATE documents SET file_present = ? WHERE id = ? AND COALESCE(file_present, -1) != ?",
+            (int(present), document_id, int(present))
+        )
+        self.invalidate_documents([document_id])
+    
+    def invalidate_documents(self, document_ids: List[str]):
+        """Drop cached rows and text for documents that changed or went away"""
+        keys = [(self.db_path, document_id) for document_id in document_ids]
+        self.document_cache.invalidate(keys)
+        self.text_cache.invalidate(keys)
+    
+    @staticmethod
+    def _row_to_document(row, include_file_status: bool) -> Dict:
+        """Convert a documents row to a dict with computed fields"""
+        doc = dict(row)
+        if include_file_status:
+            # Cached by the orphan reconciler; only rows it has never seen are checked on disk
+            present = doc.get('file_present')
+            doc['file_exists'] = Path(doc['file_path']).exists() if present is None else bool(present)
+        doc['file_size_mb'] = round(doc['file_size'] / (1024 * 1024), 2)
+        return doc
+    
+    @staticmethod
+    def _encode_cursor(row) -> str:
+        raw = json.dumps([row['upload_date'], row['id']]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, str]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            upload_date, document_id = json.loads(raw)
+            return str(upload_date), str(document_id)
+        except Exception:
+            raise ValueError("Invalid pagination cursor")
     
     async def get_document_count(self) -> int:
         """Get total number of stored documents"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM documents")
-            count = cursor.fetchone()[0]
-            conn.close()
-            return count
+            row = await self.pool.fetchone(
+                "SELECT value FROM library_stats WHERE stat_key = ?", (library_stats.DOCUMENTS,)
+            )
+            return row[0] if row else 0
         except Exception as e:
             logger.error(f"❌ Failed to count documents: {e}")
             return 0
     
     async def delete_document(self, document_id: str) -> bool:
         """
-        Delete document and its file
+        Delete document and release its file
+        
+        Blob-backed files are only removed once no other document references them.
+        Extracted text and vector chunks go with the document.
         
         Args:
             document_id: Document ID to delete
@@ -231,59 +673,167 @@ class StorageManager:
             bool: True if deleted successfully
         """
         try:
-            # Get document info first
-            doc = await self.get_document(document_id)
-            if not doc:
-                return False
-            
-            # Delete file if it exists
-            file_path = Path(doc['file_path'])
-            if file_path.exists():
-                await aiofiles.os.remove(file_path)
-            
-            # Delete from database
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM documents WHERE id = ?", (document_id,))
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"✅ Document deleted: {document_id}")
-            return True
+            result = await self.delete_documents([document_id])
+            return bool(result['deleted'])
             
         except Exception as e:
             logger.error(f"❌ Failed to delete document {document_id}: {e}")
             return False
     
+    async def delete_documents(self, document_ids: List[str]) -> Dict:
+        """
+        Delete many documents together with everything derived from them
+        
+        Document rows, dependent rows (extracted text, chunk records) and blob
+        references go in one transaction. Files are removed once nothing
+        references them, then the documents' chunks are removed from the
+        vector index in batches.
+        
+        Args:
+            document_ids: Document IDs to delete
+            
+        Returns:
+            Dict: deleted and not_found IDs, files_removed, bytes_reclaimed,
+            text_rows_deleted and vectors_removed
+        
+        Raises:
+            ValueError: If more than MAX_BULK_DELETE IDs are given
+        """
+        ids = list(dict.fromkeys(document_ids))
+        if len(ids) > self.MAX_BULK_DELETE:
+            raise ValueError(f"Too many documents ({len(ids)}). Maximum per request: {self.MAX_BULK_DELETE}")
+        
+        docs = []
+        for start in range(0, len(ids), self.LOOKUP_BATCH_SIZE):
+            batch = ids[start:start + self.LOOKUP_BATCH_SIZE]
+            rows = await self.pool.fetchall(
+                f"SELECT * FROM documents WHERE id IN ({','.join('?' * len(batch))})", batch
+            )
+            docs.extend(dict(row) for row in rows)
+        
+        found = {doc['id'] for doc in docs}
+        result = {
+            'deleted': [],
+            'not_found': [document_id for document_id in ids if document_id not in found],
+            'files_removed': 0,
+            'bytes_reclaimed': 0,
+            'text_rows_deleted': 0,
+            'vectors_removed': 0
+        }
+        if not docs:
+            return result
+        
+        # Lock every affected blob (in a fixed order) so no upload dedups onto a file being removed
+        async with AsyncExitStack() as stack:
+            for key in sorted({doc.get('content_hash') or doc['id'] for doc in docs}):
+                await stack.enter_async_context(self._blob_guard(key))
+            
+            deleted, released_paths, text_rows = await self.writer.submit(
+                lambda conn: self._delete_document_rows(conn, docs)
+            )
+            self.invalidate_documents(deleted)
+            
+            for released_path in released_paths:
+                try:
+                    stored_size = (await aiofiles.os.stat(released_path)).st_size
+                    await aiofiles.os.remove(released_path)
+                except FileNotFoundError:
+                    continue
+                result['files_removed'] += 1
+                result['bytes_reclaimed'] += stored_size
+        
+        result['deleted'] = deleted
+        result['text_rows_deleted'] = text_rows
+        
+        # Vector chunks are keyed by document_id metadata in the Chroma collection
+        try:
+            removed = await asyncio.to_thread(vector_store.delete_document_vectors, deleted, self.chroma_path)
+            if removed is None:
+                result['vector_index'] = 'unavailable'
+            elif removed:
+                result['vectors_removed'] = removed
+                await self.writer.submit(
+                    lambda conn: library_stats.adjust_stat(conn, library_stats.EMBEDDED_CHUNKS, -removed)
+                )
+        except Exception as e:
+            logger.error(f"❌ Failed to remove vectors for deleted documents: {e}")
+            result['vector_error'] = str(e)
+        
+        logger.info(
+            f"✅ Deleted {len(deleted)} documents: {result['files_removed']} files, "
+            f"{result['bytes_reclaimed']} bytes, {result['vectors_removed']} vectors reclaimed"
+        )
+        return result
+    
+    def _delete_document_rows(self, conn, docs: List[Dict]) -> Tuple[List[str], List[str], int]:
+        """
+        Delete documents, their dependent rows and blob references (writer thread)
+        
+        Returns:
+            Tuple: Deleted IDs, file paths nothing references any more,
+            and the number of extracted text rows removed
+        """
+        present = set()
+        ids = [doc['id'] for doc in docs]
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        text_rows = 0
+        
+        for start in range(0, len(ids), self.LOOKUP_BATCH_SIZE):
+            batch = ids[start:start + self.LOOKUP_BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            present.update(row[0] for row in conn.execute(
+                f"SELECT id FROM documents WHERE id IN ({placeholders})", batch
+            ))
+            
+            # Dependent rows first, so their counters see the document go with them
+            for table in self.DEPENDENT_TABLES:
+                if table in tables:
+                    deleted = conn.execute(
+                        f"DELETE FROM {table} WHERE document_id IN ({placeholders})", batch
+                    ).rowcount
+                    if table == 'document_text':
+                        text_rows += deleted
+        
+        released_paths = []
+        for doc in docs:
+            if doc['id'] not in present:
+                continue
+            released_path = self._delete_document_row(conn, doc)
+            if released_path:
+                released_paths.append(released_path)
+        
+        return [document_id for document_id in ids if document_id in present], released_paths, text_rows
+    
+    async def reconcile_stats(self) -> Dict[str, int]:
+        """Rebuild the library counters from the documents tables"""
+        return await self.writer.submit(library_stats.reconcile_stats)
+    
     async def get_storage_stats(self) -> Dict:
         """Get storage statistics"""
         try:
-            total_count = await self.get_document_count()
-            documents = await self.list_documents(limit=1000)  # Get all for stats
-            
-            total_size = sum(doc['file_size'] for doc in documents)
-            total_size_mb = round(total_size / (1024 * 1024), 2)
-            
-            # Count by file type
-            type_counts = {}
-            for doc in documents:
-                file_type = doc['file_type']
-                type_counts[file_type] = type_counts.get(file_type, 0) + 1
-            
-            # Check disk usage
-            upload_dir_size = 0
-            if self.upload_dir.exists():
-                for file_path in self.upload_dir.rglob('*'):
-                    if file_path.is_file():
-                        upload_dir_size += file_path.stat().st_size
+            stats = await self.pool.run(library_stats.read_stats)
+            blob_bytes = stats.get(library_stats.BLOB_BYTES, 0)
+            blob_stored_bytes = stats.get(library_stats.BLOB_STORED_BYTES, 0)
             
             return {
-                'total_documents': total_count,
-                'total_size_mb': total_size_mb,
-                'disk_usage_mb': round(upload_dir_size / (1024 * 1024), 2),
-                'file_types': type_counts,
+                'total_documents': stats.get(library_stats.DOCUMENTS, 0),
+                'total_size_mb': round(stats.get(library_stats.DOCUMENT_BYTES, 0) / (1024 * 1024), 2),
+                'disk_usage_mb': round(stats.get(library_stats.DISK_BYTES, 0) / (1024 * 1024), 2),
+                'file_types': library_stats.prefixed(stats, library_stats.FILE_TYPE_PREFIX),
+                'text_extracted_documents': stats.get(library_stats.EXTRACTED_DOCUMENTS, 0),
+                'embedded_chunks': stats.get(library_stats.EMBEDDED_CHUNKS, 0),
+                'compression': {
+                    'codec': self.compression,
+                    'level': self.compression_level,
+                    'blob_size_mb': round(blob_bytes / (1024 * 1024), 2),
+                    'stored_size_mb': round(blob_stored_bytes / (1024 * 1024), 2),
+                    'compression_ratio': round(blob_bytes / blob_stored_bytes, 3) if blob_stored_bytes else 1.0
+                },
                 'upload_directory': str(self.upload_dir),
-                'database_path': self.db_path
+                'database_path': self.db_path,
+                'database_pool': self.pool.get_metrics(),
+                'write_queue': self.writer.get_metrics(),
+                'document_cache': self.document_cache.get_metrics()
             }
             
         except Exception as e:
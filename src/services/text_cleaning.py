@@ -0,0 +1,153 @@
+"""
+Text Cleaning
+Whitespace and control character normalization for extracted text, whole or streamed
+Part of knowNothing Creative RAG
+"""
+
+import re
+from typing import Tuple
+
+_BLANK_LINES = re.compile(r'\n\s*\n\s*\n')
+_TABS = re.compile(r'\t+')
+_SPACES = re.compile(r' +')
+_SPACE_RUNS = re.compile(r'[ \t]{2,}|\t')  # tabs to spaces and multiple spaces to single, at once
+_CONTROL = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x84\x86-\x9f]')
+
+# Slice size for counting words without splitting a whole document at once
+WORD_COUNT_CHUNK = 1024 * 1024
+
+# Every cleaning rule only matches runs of whitespace or control characters,
+# so text split right after any other character cleans exactly as it would
+# in one piece. These are the characters a split must not follow.
+_UNSAFE_CHARS = "".join(
+    char for char in map(chr, range(0x10000)) if char.isspace() or _CONTROL.match(char)
+)
+_UNSAFE_SET = frozenset(_UNSAFE_CHARS)
+_UNSAFE_RUN = re.compile(r'[\s\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x84\x86-\x9f]*')
+
+
+def _collapse(text: str) -> str:
+    """The cleaning rules for text without control characters, in two passes"""
+    # With no control character to remove, a blank-line match never splits
+    # or joins a run of spaces and tabs, so both space rules run as one pass
+    return _SPACE_RUNS.sub(' ', _BLANK_LINES.sub('\n\n', text))
+
+
+def _normalize_run(text: str) -> str:
+    """The cleaning rules in their original order, for a run holding control characters"""
+    # Removing a control character can join whitespace the earlier rules already saw
+    text = _BLANK_LINES.sub('\n\n', text)  # Multiple newlines to double
+    text = _TABS.sub(' ', text)  # Tabs to spaces
+    text = _SPACES.sub(' ', text)  # Multiple spaces to single
+
+    # Remove weird characters but keep creative content
+    return _CONTROL.sub('', text)
+
+
+def _normalize(text: str) -> str:
+    """Every cleaning rule except the final strip"""
+    # Only the whitespace/control run around each control character needs the
+    # original rule order; everything between those runs is collapsed directly
+    pieces = []
+    done = 0
+    for match in _CONTROL.finditer(text):
+        start = match.start()
+        if start < done:
+            continue  # part of the run just handled
+        while start > done and text[start - 1] in _UNSAFE_SET:
+            start -= 1
+        end = _UNSAFE_RUN.match(text, match.end()).end()
+        pieces.append(_collapse(text[done:start]))
+        pieces.append(_normalize_run(text[start:end]))
+        done = end
+
+    if not pieces:
+        return _collapse(text)
+    pieces.append(_collapse(text[done:]))
+    return "".join(pieces)
+
+
+def clean_extracted_text(text: str) -> str:
+    """Clean and normalize extracted text"""
+    if not text:
+        return ""
+    return _normalize(text).strip()
+
+
+def count_words(text: str) -> int:
+    """len(text.split()), counted a slice at a time instead of building one list of every word"""
+    if len(text) <= WORD_COUNT_CHUNK:
+        return len(text.split())
+
+    words = 0
+    in_word = False
+    for start in range(0, len(text), WORD_COUNT_CHUNK):
+        piece = text[start:start + WORD_COUNT_CHUNK]
+        words += len(piece.split())
+        if in_word and not piece[0].isspace():
+            words -= 1  # the previous slice ended inside this word
+        in_word = not piece[-1].isspace()
+    return words
+
+
+def clean_and_count(text: str) -> Tuple[str, int, int]:
+    """clean_extracted_text plus the cleaned text's word and character counts"""
+    cleaned = clean_extracted_text(text)
+    return cleaned, count_words(cleaned), len(cleaned)
+
+
+class StreamingCleaner:
+    """
+    clean_extracted_text for text arriving in chunks
+    - feed() returns the cleaned text that is final so far; a trailing run
+      that a later chunk could still change is held back
+    - Word and character counts are kept as text is emitted, so callers
+      need not hold the whole result to count it
+    - "".join(all feed() results + finish()) == clean_extracted_text(whole text)
+    """
+
+    # Held-back text longer than this is cleaned anyway; only a pathological
+    # run of whitespace this long can make the output differ
+    MAX_PENDING = 1024 * 1024
+
+    def __init__(self):
+        self._pending = ""
+        self._started = False  # leading whitespace already stripped
+        self._in_word = False
+        self.word_count = 0
+        self.character_count = 0
+
+    def feed(self, chunk: str) -> str:
+        text = self._pending + chunk
+        cut = self._safe_cut(text)
+        if cut == 0 and len(text) <= self.MAX_PENDING:
+            self._pending = text
+            return ""
+        cut = cut or len(text)
+        self._pending = text[cut:]
+        return self._emit(_normalize(text[:cut]))
+
+    def finish(self) -> str:
+        """Clean and return whatever is still held back"""
+        text, self._pending = self._pending, ""
+        return self._emit(_normalize(text).rstrip())
+
+    @staticmethod
+    def _safe_cut(text: str) -> int:
+        """Position just after the last character no cleaning rule can touch, or 0"""
+        return len(text.rstrip(_UNSAFE_CHARS))
+
+    def _emit(self, cleaned: str) -> str:
+        if not self._started:
+            cleaned = cleaned.lstrip()
+            self._started = bool(cleaned)
+        if not cleaned:
+            return ""
+
+        words = count_words(cleaned)
+        if self._in_word and not cleaned[0].isspace():
+            words -= 1  # the previous piece ended inside this word
+        self._in_word = not cleaned[-1].isspace()
+        self.word_count += words
+        self.character_count += len(cleaned)
+        return cleaned
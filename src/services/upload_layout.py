@@ -0,0 +1,141 @@
+"""
+Sharded Upload Layout
+Two-level fan-out directories for stored files, plus an online migration
+Part of knowNothing Creative RAG
+
+Files live at data/uploads/ab/cd/<name><ext>, where "abcd" are the first four
+characters of the name (a SHA-256 for blobs, a UUID for older uploads), so no
+directory grows past a few thousand entries. Move a flat legacy directory into
+this layout while the server keeps running with:
+
+    python -m src.services.upload_layout migrate [--db data/documents.db] [--uploads data/uploads]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+FANOUT_WIDTH = 2
+FANOUT_LEVELS = 2
+
+
+def sharded_path(upload_dir: Path, name: str, extension: str) -> Path:
+    """Location of a stored file in the fan-out layout"""
+    parts = [name[level * FANOUT_WIDTH:(level + 1) * FANOUT_WIDTH] for level in range(FANOUT_LEVELS)]
+    return Path(upload_dir).joinpath(*parts, f"{name}{extension}")
+
+
+def is_flat(upload_dir: Path, path: Path) -> bool:
+    """True if path sits directly in upload_dir (the pre-sharding layout)"""
+    return Path(path).parent.resolve() == Path(upload_dir).resolve()
+
+
+def _link_or_copy(source: Path, target: Path):
+    """Give target the same content as source without disturbing source"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        # Filesystems without hard links: copy to a temp name, then publish atomically
+        partial = target.with_name(f".{target.name}.part")
+        shutil.copy2(source, partial)
+        os.replace(partial, target)
+
+
+def migrate_uploads(db_path: str, upload_dir: str, batch_size: int = 500,
+                    dry_run: bool = False) -> Dict[str, int]:
+    """
+    Move flat files into the sharded layout in small batches
+
+    Each batch links the files at their new location, repoints documents and
+    blobs in one short transaction, and only then unlinks the old names, so
+    every row always points at an existing file and the server can keep
+    serving and writing throughout. Safe to interrupt and re-run.
+
+    Args:
+        db_path: Documents database
+        upload_dir: Upload directory to migrate
+        batch_size: Documents examined per transaction
+        dry_run: Only count what would move
+
+    Returns:
+        Dict[str, int]: Files moved, rows updated, files missing, rows skipped
+    """
+    from .database import get_pool
+
+    pool = get_pool(db_path)
+    uploads = Path(upload_dir)
+    totals = {"files_moved": 0, "rows_updated": 0, "files_missing": 0, "rows_skipped": 0}
+    last_rowid = 0
+
+    while True:
+        with pool.connection() as conn:
+            rows = conn.execute("""
+                SELECT rowid, file_path FROM documents
+                WHERE rowid > ? ORDER BY rowid LIMIT ?
+            """, (last_rowid, batch_size)).fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1]["rowid"]
+
+        moves: List[Tuple[Path, Path]] = []
+        seen = set()
+        for row in rows:
+            old_path = Path(row["file_path"])
+            if old_path in seen:
+                continue
+            seen.add(old_path)
+            if not is_flat(uploads, old_path):
+                totals["rows_skipped"] += 1
+                continue
+            if not old_path.exists():
+                totals["files_missing"] += 1
+                continue
+            moves.append((old_path, sharded_path(uploads, old_path.stem, old_path.suffix)))
+
+        if dry_run or not moves:
+            totals["files_moved"] += len(moves)
+            continue
+
+        for old_path, new_path in moves:
+            _link_or_copy(old_path, new_path)
+
+        with pool.transaction() as conn:
+            for old_path, new_path in moves:
+                totals["rows_updated"] += conn.execute(
+                    "UPDATE documents SET file_path = ? WHERE file_path = ?", (str(new_path), str(old_path))
+                ).rowcount
+                conn.execute("UPDATE blobs SET file_path = ? WHERE file_path = ?", (str(new_path), str(old_path)))
+
+        for old_path, _ in moves:
+            old_path.unlink(missing_ok=True)
+        totals["files_moved"] += len(moves)
+        logger.info(f"📦 Migrated {totals['files_moved']} files to the sharded layout")
+
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the knowNothing upload directory layout")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("--db", default="data/documents.db", help="documents database path")
+    parser.add_argument("--uploads", default="data/uploads", help="upload directory")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="report what would move without changing anything")
+    args = parser.parse_args()
+
+    totals = migrate_uploads(args.db, args.uploads, batch_size=args.batch_size, dry_run=args.dry_run)
+    for key, value in totals.items():
+        print(f"{key:20s} {value}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
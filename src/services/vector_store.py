@@ -0,0 +1,125 @@
+"""
+Vector Store Maintenance
+Shared ChromaDB client and housekeeping that needs no embedding model
+Part of knowNothing Creative RAG
+
+Chroma refuses a second client on the same directory with other settings,
+and two clients on one directory can miss each other's writes, so every
+service opens the store through get_client()/get_collection() here.
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHROMA_PATH = "data/chroma_db"
+COLLECTION_NAME = "creative_documents"
+COLLECTION_METADATA = {"description": "Creative documents with semantic embeddings"}
+DELETE_BATCH_SIZE = 100
+
+# Keyed by absolute path, so "data/chroma_db" and "./data/chroma_db" share a client
+_clients: Dict[str, object] = {}
+_collections: Dict[str, object] = {}
+_clients_lock = threading.Lock()
+
+
+def chromadb_available() -> bool:
+    """True if ChromaDB can be imported"""
+    return importlib.util.find_spec("chromadb") is not None
+
+
+def get_client(chroma_path: str = DEFAULT_CHROMA_PATH):
+    """
+    The process-wide persistent client for a vector store directory
+
+    Returns:
+        The client, or None if ChromaDB is not installed
+    """
+    key = os.path.abspath(chroma_path)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            try:
+                import chromadb
+                from chromadb.config import Settings
+            except ImportError:
+                return None
+            client = chromadb.PersistentClient(
+                path=key,
+                settings=Settings(anonymized_telemetry=False, allow_reset=True)
+            )
+            _clients[key] = client
+        return client
+
+
+def get_collection(chroma_path: str = DEFAULT_CHROMA_PATH, create: bool = True):
+    """
+    Open the document chunk collection without loading an embedding model
+
+    Args:
+        chroma_path: Vector store directory
+        create: Create the store and collection if they do not exist yet
+
+    Returns:
+        The collection, or None if ChromaDB is not installed or, with
+        create=False, nothing has been embedded yet
+    """
+    key = os.path.abspath(chroma_path)
+    collection = _collections.get(key)
+    if collection is not None:
+        return collection
+
+    if not create and not os.path.isdir(key):
+        return None
+    client = get_client(key)
+    if client is None:
+        return None
+    if create:
+        collection = client.get_or_create_collection(name=COLLECTION_NAME, metadata=COLLECTION_METADATA)
+    else:
+        try:
+            collection = client.get_collection(name=COLLECTION_NAME)
+        except Exception:
+            # The missing-collection error type differs between Chroma releases
+            return None
+
+    with _clients_lock:
+        return _collections.setdefault(key, collection)
+
+
+def delete_document_vectors(
+    document_ids: Sequence[str],
+    chroma_path: str = DEFAULT_CHROMA_PATH,
+    batch_size: int = DELETE_BATCH_SIZE
+) -> Optional[int]:
+    """
+    Remove every chunk belonging to the given documents
+
+    Chunks are matched on their document_id metadata, batch_size documents
+    per request, so IDs copied from duplicates are caught as well.
+
+    Returns:
+        Optional[int]: Chunks removed, or None if ChromaDB is not installed
+    """
+    if not chromadb_available():
+        return None
+    collection = get_collection(chroma_path, create=False)
+    if collection is None:
+        return 0
+
+    removed = 0
+    ids: List[str] = list(dict.fromkeys(document_ids))
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        where = {"document_id": batch[0]} if len(batch) == 1 else {"document_id": {"$in": batch}}
+        chunk_ids = collection.get(where=where, include=[])["ids"]
+        if chunk_ids:
+            collection.delete(ids=chunk_ids)
+            removed += len(chunk_ids)
+
+    logger.info(f"🗑️ Removed {removed} vector chunks for {len(ids)} documents")
+    return removed
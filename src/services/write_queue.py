@@ -0,0 +1,179 @@
+"""
+Group-Commit Write Queue
+Batches metadata writes into shared SQLite transactions
+Part of knowNothing Creative RAG
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .database import ConnectionPool, DEFAULT_DB_PATH, get_pool
+
+logger = logging.getLogger(__name__)
+
+WriteOperation = Callable[[sqlite3.Connection], Any]
+
+
+@dataclass
+class _PendingWrite:
+    operation: WriteOperation
+    future: asyncio.Future
+
+
+class GroupCommitWriter:
+    """
+    Single writer that commits queued operations in batches
+    - Callers await submit() and resume once their batch has committed
+    - A batch closes after max_batch operations or max_delay_ms, whichever first
+    - Each operation runs in its own savepoint, so one failure only fails its caller
+    """
+
+    def __init__(self, pool: ConnectionPool, max_batch: int = 256, max_delay_ms: float = 5.0):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+
+        # One thread keeps commits ordered and off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._batches = 0
+        self._operations = 0
+        self._failed_operations = 0
+        self._max_batch_seen = 0
+        self._commit_time = 0.0
+
+    def _ensure_running(self) -> asyncio.Queue:
+        """Start the writer task on the current event loop if needed"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._loop is not loop or self._task is None or self._task.done():
+                self._loop = loop
+                self._queue = asyncio.Queue()
+                self._task = loop.create_task(self._run())
+            return self._queue
+
+    async def submit(self, operation: WriteOperation) -> Any:
+        """
+        Queue a write and wait until its batch commits
+
+        Args:
+            operation: Callable receiving the writer's connection; runs inside
+                the batch transaction and must not commit itself
+
+        Returns:
+            Whatever the operation returned
+        """
+        queue = self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put(_PendingWrite(operation, future))
+        return await future
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Queue a single statement and return its rowcount once committed"""
+        return await self.submit(lambda conn: conn.execute(sql, params).rowcount)
+
+    async def _run(self):
+        """Collect pending writes into batches and commit them"""
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                outcomes = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._commit_batch, batch
+                )
+            except Exception as e:
+                logger.error(f"❌ Metadata batch commit failed: {e}")
+                outcomes = [(False, e)] * len(batch)
+
+            for pending, (ok, value) in zip(batch, outcomes):
+                if pending.future.done():
+                    continue
+                if ok:
+                    pending.future.set_result(value)
+                else:
+                    pending.future.set_exception(value)
+
+    def _commit_batch(self, batch: List[_PendingWrite]) -> List[tuple]:
+        """Run every operation of a batch in one transaction (writer thread)"""
+        started = time.perf_counter()
+        outcomes = []
+
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for pending in batch:
+                    conn.execute("SAVEPOINT pending_write")
+                    try:
+                        result = pending.operation(conn)
+                        conn.execute("RELEASE pending_write")
+                        outcomes.append((True, result))
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO pending_write")
+                        conn.execute("RELEASE pending_write")
+                        outcomes.append((False, e))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        failed = sum(1 for ok, _ in outcomes if not ok)
+        with self._lock:
+            self._batches += 1
+            self._operations += len(batch)
+            self._failed_operations += failed
+            self._max_batch_seen = max(self._max_batch_seen, len(batch))
+            self._commit_time += time.perf_counter() - started
+
+        return outcomes
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Batching statistics for the stats endpoints"""
+        with self._lock:
+            return {
+                "batches_committed": self._batches,
+                "operations_committed": self._operations - self._failed_operations,
+                "operations_failed": self._failed_operations,
+                "avg_batch_size": round(self._operations / self._batches, 2) if self._batches else 0.0,
+                "max_batch_size": self._max_batch_seen,
+                "avg_commit_ms": round(self._commit_time * 1000 / self._batches, 3) if self._batches else 0.0,
+                "queue_depth": self._queue.qsize() if self._queue else 0,
+                "max_batch": self.max_batch,
+                "max_delay_ms": self.max_delay * 1000
+            }
+
+
+_writers: Dict[int, GroupCommitWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: str = DEFAULT_DB_PATH) -> GroupCommitWriter:
+    """Get the process-wide group-commit writer for a database file"""
+    pool = get_pool(db_path)
+    with _writers_lock:
+        writer = _writers.get(id(pool))
+        if writer is None:
+            writer = GroupCommitWriter(pool)
+            _writers[id(pool)] = writer
+        return writer
@@ -177,23 +177,19 @@ class CreativeRAGUI:
         """Get document library statistics"""
         try:
             response = requests.get(f"{self.api_base}/api/documents/list", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                docs = data.get('documents', [])
-                
-                # Calculate stats
-                total_docs = len(docs)
-                total_size_mb = sum(doc.get('file_size_mb', 0) for doc in docs)
+            stats_response = requests.get(f"{self.api_base}/api/documents/stats", timeout=10)
+            if response.status_code == 200 and stats_response.status_code == 200:
+                docs = response.json().get('documents', [])
+                stats = stats_response.json()
                 
                 # File type breakdown
                 file_types = {}
-                for doc in docs:
-                    file_type = doc.get('file_type', 'unknown').upper().replace('.', '')
-                    file_types[file_type] = file_types.get(file_type, 0) + 1
+                for file_type, count in stats.get('file_types', {}).items():
+                    file_types[file_type.upper().replace('.', '')] = count
                 
                 return {
-                    "total_documents": total_docs,
-                    "total_size_mb": round(total_size_mb, 2),
+                    "total_documents": stats.get('total_documents', 0),
+                    "total_size_mb": stats.get('total_size_mb', 0),
                     "file_types": file_types,
                     "documents": docs
                 }
@@ -0,0 +1,62 @@
+"""
+Archive Import Tests
+A corrupt member is reported on its own line and the rest of the archive still imports
+Part of knowNothing Creative RAG
+"""
+
+import io
+import random
+import zipfile
+
+import pytest
+
+from src.services.archive_import import ArchiveImporter
+from src.services.storage_manager import StorageManager
+
+MEMBERS = ["act1.txt", "act2.txt", "act3.txt", "act4.txt"]
+
+
+def member_text(name: str) -> str:
+    rng = random.Random(name)
+    return " ".join(f"{rng.random():.6f}" for _ in range(3000))
+
+
+def corrupted_zip() -> bytes:
+    """A zip whose act2.txt has garbled deflate data and act3.txt a broken local header"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name in MEMBERS:
+            zip_file.writestr(name, member_text(name))
+    data = bytearray(buffer.getvalue())
+
+    with zipfile.ZipFile(io.BytesIO(bytes(data))) as zip_file:
+        deflate = zip_file.getinfo("act2.txt")
+        header = zip_file.getinfo("act3.txt")
+    start = deflate.header_offset + 30 + len(deflate.filename)
+    data[start + 10:start + 60] = b"\xff" * 50
+    data[header.header_offset:header.header_offset + 4] = b"XXXX"
+    return bytes(data)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return StorageManager(upload_dir=str(tmp_path / "uploads"), db_path=str(tmp_path / "documents.db"),
+                          chroma_path=str(tmp_path / "chroma_db"))
+
+
+@pytest.mark.asyncio
+async def test_corrupt_members_are_reported_and_import_continues(storage):
+    importer = ArchiveImporter(storage)
+    events = [event async for event in importer.import_archive(io.BytesIO(corrupted_zip()), "script.zip")]
+
+    statuses = {event["name"]: event for event in events if event["event"] == "member"}
+    assert statuses["act1.txt"]["status"] == "stored"
+    assert statuses["act4.txt"]["status"] == "stored"
+    for name in ("act2.txt", "act3.txt"):
+        assert statuses[name]["status"] == "error"
+        assert statuses[name]["error"].startswith("Corrupt archive member")
+
+    done = events[-1]
+    assert done["event"] == "done"
+    assert (done["processed"], done["stored"], done["failed"]) == (4, 2, 2)
+    assert not list(storage.upload_dir.rglob("*.part"))
@@ -0,0 +1,95 @@
+"""
+Boilerplate Removal Tests
+Running heads are stripped from PDF pages while repeated dialogue near page edges survives
+Part of knowNothing Creative RAG
+"""
+
+from src.services import boilerplate
+
+PAGES = 20
+
+WORDS = "harbour canvas light brush gallery dawn crate palette window nail".split()
+
+
+def varied(number: int, text: str) -> str:
+    """Body text that differs from page to page, as real pages do"""
+    return f"{text} {WORDS[number % len(WORDS)]} {WORDS[(number * 3 + 1) % len(WORDS)]}."
+
+
+def screenplay_page(number: int) -> str:
+    """A script page: title and page number on top, copyright footer, cues near both edges"""
+    first, second = ("JOHN", "MARY") if number % 2 else ("MARY", "JOHN")
+    body = [
+        first,
+        varied(number, "We should go to the"),
+        second,
+        varied(number, "Not yet, the"),
+        varied(number, "They look at the"),
+        first,
+        varied(number, "Then when, the"),
+        second,
+        f"{number % 3 + 1}.",
+        varied(number, "When the light turns, the"),
+    ]
+    if number % 5 == 0:
+        body = ["(CONTINUED)"] + body  # shifts the cues on some pages
+    return "\n".join(["MIDNIGHT PALETTE", f"{number}."] + body + [f"Page {number} of {PAGES}", "(c) Harbour Films"])
+
+
+def strip_all(pages):
+    headers, footers = boilerplate.find_repeated(boilerplate.edge_keys(page) for page in pages)
+    return [boilerplate.strip_repeated(page, headers, footers) for page in pages]
+
+
+def test_running_heads_are_removed():
+    pages = [screenplay_page(number) for number in range(1, PAGES + 1)]
+    for number, (text, removed) in enumerate(strip_all(pages), 1):
+        assert removed == 4
+        lines = text.split("\n")
+        assert "MIDNIGHT PALETTE" not in lines
+        assert f"{number}." not in lines
+        assert f"Page {number} of {PAGES}" not in lines
+        assert "(c) Harbour Films" not in lines
+
+
+def test_dialogue_cues_and_numbered_lines_near_edges_survive():
+    pages = [screenplay_page(number) for number in range(1, PAGES + 1)]
+    for page, (text, _) in zip(pages, strip_all(pages)):
+        lines = text.split("\n")
+        assert lines.count("JOHN") == 2 and lines.count("MARY") == 2
+        assert varied(int(page.split("\n")[1][:-1]), "When the light turns, the") in lines
+        # The short numbered line sits just above the footer on every page
+        assert any(line in ("1.", "2.", "3.") for line in lines)
+
+
+def test_cue_at_the_page_edge_on_most_pages_survives():
+    # "JOHN" opens 70% of pages: above the old half-the-pages bar, below the title bar
+    pages = ["\n".join(["JOHN" if number % 10 < 7 else "MARY"]
+                       + [varied(number + line, "Line") for line in range(4)]
+                       + ["JOHN" if number % 10 > 2 else "MARY"]) for number in range(PAGES)]
+    for page, (text, removed) in zip(pages, strip_all(pages)):
+        assert removed == 0
+        assert text == page
+
+
+def test_only_a_run_touching_the_edge_is_removed():
+    # "1." repeats at the same offset from the bottom, but a changing line separates it from the footer
+    pages = ["\n".join([varied(number, "Scene"), varied(number + 1, "More"), "1.",
+                        varied(number + 2, "Closing"), f"Page {number}"])
+             for number in range(1, PAGES + 1)]
+    for page, (text, removed) in zip(pages, strip_all(pages)):
+        assert removed == 1
+        assert text == page.rsplit("\n", 1)[0]
+
+
+def test_page_number_shapes():
+    for line in ("12", "12.", "Page 3", "Page 3 of 90", "- 4 -", "3/90", "(7)"):
+        assert boilerplate.looks_like_page_number(boilerplate.line_key(line)), line
+    for line in ("JOHN", "12. INT. STUDIO - NIGHT", "Scene 4", "Chapter 3"):
+        assert not boilerplate.looks_like_page_number(boilerplate.line_key(line)), line
+
+
+def test_edge_keys_count_from_each_edge():
+    top, bottom = boilerplate.edge_keys("A\n\nB\nC\nD\nE\nF\n \nG")
+    assert top == ("a", "b", "c", "d")
+    assert bottom == ("g", "f", "e", "d")
@@ -0,0 +1,78 @@
+"""
+Connection Pool Tests
+Event-loop responsiveness while large rows are read through the pool
+Part of knowNothing Creative RAG
+"""
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from src.services.database import ConnectionPool
+
+# A feature-length script is a few MB of text; this is several of them
+LARGE_TEXT_CHARS = 20 * 1024 * 1024
+
+# Longest the event loop may go without running a tick
+STALL_BOUND = 0.1
+
+TICK = 0.001
+
+READS_PER_RUN = 40
+
+
+@pytest.fixture
+def pool(tmp_path):
+    db_path = tmp_path / "documents.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE document_text (document_id TEXT PRIMARY KEY, extracted_text TEXT)")
+    conn.execute("INSERT INTO document_text VALUES (?, ?)", ("large", "word " * (LARGE_TEXT_CHARS // 5)))
+    conn.commit()
+    conn.close()
+
+    pool = ConnectionPool(str(db_path), pool_size=2)
+    yield pool
+    pool.close_all()
+
+
+def read_large_text(conn: sqlite3.Connection) -> str:
+    return conn.execute(
+        "SELECT extracted_text FROM document_text WHERE document_id = ?", ("large",)
+    ).fetchone()[0]
+
+
+@pytest.mark.asyncio
+async def test_large_row_reads_do_not_stall_event_loop(pool):
+    gaps = []
+    done = asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(TICK)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticks = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 10)
+
+    for _ in range(3):
+        row = await pool.fetchone(
+            "SELECT extracted_text FROM document_text WHERE document_id = ?", ("large",)
+        )
+        assert len(row["extracted_text"]) == LARGE_TEXT_CHARS
+    # One operation doing many reads: on the loop this would be a single long stall
+    started = time.perf_counter()
+    lengths = await pool.run(lambda conn: [len(read_large_text(conn)) for _ in range(READS_PER_RUN)])
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    await ticks
+
+    assert lengths == [LARGE_TEXT_CHARS] * READS_PER_RUN
+    # The operation must be slow enough that running it inline would break the bound
+    assert elapsed > STALL_BOUND * 2
+    assert max(gaps) < STALL_BOUND, f"event loop stalled for {max(gaps) * 1000:.0f} ms"
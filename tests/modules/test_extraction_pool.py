@@ -0,0 +1,77 @@
+"""
+Extraction Pool Tests
+Task deadlines: late alarms, and retries after a worker crash
+Part of knowNothing Creative RAG
+"""
+
+import os
+import signal
+import time
+from pathlib import Path
+
+import pytest
+
+from src.services import extraction_pool
+from src.services.extraction_pool import ExtractionKilledError, ExtractionPool, ExtractionTimeoutError
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="needs POSIX interval timers")
+
+
+def sleep_then_die(marker: str, seconds: float):
+    """Worker task: note the attempt, sleep, then kill the worker process"""
+    with open(marker, "a") as f:
+        f.write("attempt\n")
+    time.sleep(seconds)
+    os._exit(1)
+
+
+def die_after_deadline(marker: str, seconds: float):
+    """Worker task: note the attempt, outlive the deadline with the timer blocked, then die"""
+    with open(marker, "a") as f:
+        f.write("attempt\n")
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+    time.sleep(seconds)
+    os._exit(1)
+
+
+def test_alarm_after_the_task_returns_is_a_timeout(monkeypatch):
+    real_setitimer = signal.setitimer
+
+    def alarm_on_disarm(which, seconds, *interval):
+        real_setitimer(which, seconds, *interval)
+        if seconds == 0:
+            extraction_pool._on_deadline(signal.SIGALRM, None)  # the alarm lands just as the task returns
+
+    monkeypatch.setattr(extraction_pool.signal, "setitimer", alarm_on_disarm)
+    with pytest.raises(ExtractionTimeoutError, match="too slow"):
+        extraction_pool._run_task(5.0, "too slow", len, ("done",))
+
+
+@pytest.mark.asyncio
+async def test_retry_after_crash_gets_only_the_remaining_budget(tmp_path):
+    marker = str(tmp_path / "attempts")
+    pool = ExtractionPool(workers=1, timeout=60, rss_limit_mb=0)
+    try:
+        started = time.monotonic()
+        with pytest.raises(ExtractionTimeoutError):
+            await pool.run(sleep_then_die, marker, 1.0, deadline=started + 1.6)
+        elapsed = time.monotonic() - started
+    finally:
+        pool.shutdown()
+
+    assert Path(marker).read_text().count("attempt") == 2
+    # A retry with the full original budget would sleep another second and die
+    assert elapsed < 1.6 + 0.5
+
+
+@pytest.mark.asyncio
+async def test_no_retry_once_the_deadline_has_passed(tmp_path):
+    marker = str(tmp_path / "attempts")
+    pool = ExtractionPool(workers=1, timeout=60, rss_limit_mb=0)
+    try:
+        with pytest.raises(ExtractionKilledError):
+            await pool.run(die_after_deadline, marker, 1.0, deadline=time.monotonic() + 0.5)
+    finally:
+        pool.shutdown()
+
+    assert Path(marker).read_text().count("attempt") == 1
@@ -0,0 +1,97 @@
+"""
+Streaming Multipart Upload Tests
+The file part's name is known before its bytes are read, and the bytes come through intact
+Part of knowNothing Creative RAG
+"""
+
+import pytest
+from starlette.requests import Request
+
+from src.api.multipart_upload import MultipartError, MultipartUpload
+
+BOUNDARY = "knownothingboundary"
+
+
+def multipart_body(filename: str, content: bytes, extra_field: bool = True) -> bytes:
+    parts = []
+    if extra_field:
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="note"\r\n\r\nhello\r\n'.encode())
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'.encode() + content + b"\r\n"
+    )
+    parts.append(f"--{BOUNDARY}--\r\n".encode())
+    return b"".join(parts)
+
+
+def streaming_request(body: bytes, chunk_size: int, content_type: str = None):
+    """A request whose body arrives in chunk_size pieces, with a count of pieces consumed"""
+    chunks = [body[start:start + chunk_size] for start in range(0, len(body), chunk_size)]
+    consumed = {"chunks": 0}
+
+    async def receive():
+        index = consumed["chunks"]
+        consumed["chunks"] += 1
+        return {"type": "http.request", "body": chunks[index], "more_body": index + 1 < len(chunks)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/documents/upload",
+        "headers": [(b"content-type", (content_type or f"multipart/form-data; boundary={BOUNDARY}").encode())],
+    }
+    return Request(scope, receive), consumed, len(chunks)
+
+
+@pytest.mark.asyncio
+async def test_filename_is_known_before_file_bytes_are_read():
+    body = multipart_body("draft.pdf", b"%PDF" + b"x" * 100_000)
+    request, consumed, total = streaming_request(body, 1024)
+
+    upload = MultipartUpload(request)
+    assert await upload.open() == "draft.pdf"
+    assert upload.content_type == "application/pdf"
+    assert consumed["chunks"] == 1 < total
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024, 1 << 20])
+async def test_file_bytes_come_through_for_any_chunking(chunk_size):
+    content = bytes(range(256)) * 50 + b"\r\n--almost-a-boundary\r\n"
+    request, _, _ = streaming_request(multipart_body("notes.txt", content), chunk_size)
+
+    upload = MultipartUpload(request)
+    await upload.open()
+    pieces = []
+    while True:
+        piece = await upload.read(1000)
+        if not piece:
+            break
+        assert len(piece) <= 1000
+        pieces.append(piece)
+    assert b"".join(pieces) == content
+
+
+@pytest.mark.asyncio
+async def test_body_without_a_file_part_is_rejected():
+    body = f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="note"\r\n\r\nhi\r\n--{BOUNDARY}--\r\n'.encode()
+    request, _, _ = streaming_request(body, 64)
+    with pytest.raises(MultipartError):
+        await MultipartUpload(request).open()
+
+
+@pytest.mark.asyncio
+async def test_truncated_file_part_is_rejected():
+    body = multipart_body("draft.pdf", b"y" * 5000, extra_field=False)[:3000]
+    request, _, _ = streaming_request(body, 512)
+    upload = MultipartUpload(request)
+    await upload.open()
+    with pytest.raises(MultipartError):
+        while await upload.read(1000):
+            pass
+
+
+def test_non_multipart_request_is_rejected():
+    request, _, _ = streaming_request(b"{}", 64, content_type="application/json")
+    with pytest.raises(MultipartError):
+        MultipartUpload(request)
@@ -0,0 +1,100 @@
+"""
+RTF Decoder Tests
+Control words and non-text groups stay out of extracted RTF text, however the bytes are split
+Part of knowNothing Creative RAG
+"""
+
+import random
+import re
+
+import pytest
+
+from src.api.embeddings_api import SimpleEmbeddingService
+from src.services.rtf_decoder import RtfDecoder
+from src.services.text_extractor import extract_rtf_file, extract_txt_file
+
+CONTROL_WORD = re.compile(r"\\[a-z]{2,}-?\d*")
+
+SCENE = (
+    "\\pard\\plain \\ltrpar\\s0\\ql \\li0\\ri0\\sa160\\sl259\\slmult1 \\rtlch\\fcs1 \\af0\\afs22 "
+    "\\ltrch\\fcs0 \\fs22\\insrsid{n} {n}. INT. STUDIO - NIGHT\\par\n"
+    "\\pard\\plain \\s0\\ql \\fs22 MAYA circles the canvas in the caf\\'e9 light.\\par\n"
+    "\\pard\\plain \\s0\\qc \\fs22 \\u8220?It\\rquote s never finished.\\u8221? \\u8212? she says\\par\n"
+)
+
+# Word-style RTF: tables, document info, a running header, a field, a picture and theme data
+SAMPLE_RTF = (
+    "{\\rtf1\\adeflang1025\\ansi\\ansicpg1252\\uc1\\adeff31507\\deff0\\deflang1033"
+    "{\\fonttbl{\\f0\\fbidi \\froman\\fcharset0\\fprq2{\\*\\panose 02020603050405020304}Times New Roman;}"
+    "{\\f1\\fnil\\fcharset204 Arial Cyr;}}\n"
+    "{\\colortbl;\\red0\\green0\\blue0;\\red0\\green0\\blue255;}\n"
+    "{\\stylesheet" + "".join(
+        f"{{\\s{i}\\ql \\li0\\ri0\\widctlpar\\wrapdefault\\aspalpha\\aspnum\\faauto\\adjustright "
+        f"\\f0\\fs22\\lang1033\\langfe1033\\cgrid Style {i};}}" for i in range(30)
+    ) + "}\n"
+    "{\\*\\generator Microsoft Word 16.0;}"
+    "{\\info{\\title Draft}{\\author Maya}{\\creatim\\yr2024\\mo3\\dy1\\hr9\\min5}{\\nofwords900}}\n"
+    "{\\header \\pard\\plain \\qr DRAFT - CONFIDENTIAL\\par}\n"
+    + "".join(SCENE.replace("{n}", str(n)) for n in range(1, 41))
+    + "{\\field{\\*\\fldinst {HYPERLINK \"https://example.com/notes\" }}{\\fldrslt {\\ul Director notes}}}\\par\n"
+    "\\pard {\\f1 \\'d1\\'f6\\'e5\\'ed\\'e0 2}\\par\n"
+    "{\\*\\shppict{\\pict\\picw100\\pich100\\pngblip\n" + "89504e470d0a1a0a" * 200 + "}}\n"
+    "{\\*\\themedata " + "504b030414000600" * 400 + "}\n"
+    "}\n"
+).encode("ascii")
+
+
+def decode(data: bytes, cuts) -> str:
+    """RtfDecoder output for data fed in pieces split at the given positions"""
+    decoder = RtfDecoder()
+    bounds = [0] + list(cuts) + [len(data)]
+    pieces = [decoder.feed(data[start:stop]) for start, stop in zip(bounds, bounds[1:])]
+    return "".join(pieces) + decoder.finish()
+
+
+@pytest.fixture
+def sample_path(tmp_path):
+    path = tmp_path / "draft.rtf"
+    path.write_bytes(SAMPLE_RTF)
+    return str(path)
+
+
+def test_extracted_rtf_has_body_text_only(sample_path):
+    text = extract_rtf_file(sample_path)["text"]
+
+    assert not CONTROL_WORD.findall(text)
+    assert "{" not in text and "}" not in text
+    for leftover in ("Times New Roman", "Style 3", "DRAFT - CONFIDENTIAL", "HYPERLINK", "89504e47", "504b0304"):
+        assert leftover not in text
+    assert "40. INT. STUDIO - NIGHT" in text
+    assert "caf\u00e9 light" in text
+    assert "\u201cIt\u2019s never finished.\u201d \u2014 she says" in text
+    assert "Director notes" in text
+    assert "\u0421\u0446\u0435\u043d\u0430 2" in text
+
+
+def test_decoded_rtf_needs_fewer_chunks_than_plain_text(sample_path):
+    chunker = SimpleEmbeddingService()
+    decoded = chunker.chunk_text(extract_rtf_file(sample_path)["text"])
+    plain = chunker.chunk_text(extract_txt_file(sample_path)["text"])
+    assert len(decoded) < len(plain)
+
+
+def test_decoder_output_is_the_same_for_any_split():
+    whole = decode(SAMPLE_RTF, [])
+
+    # Byte at a time puts a boundary inside every control word and \'hh escape
+    assert decode(SAMPLE_RTF, range(1, len(SAMPLE_RTF))) == whole
+
+    rng = random.Random(5)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(SAMPLE_RTF)), rng.randint(1, 20)))
+        assert decode(SAMPLE_RTF, cuts) == whole, f"differs when cut at {cuts}"
+
+
+@pytest.mark.parametrize("token", [b"\\'e9", b"\\u8220?", b"\\rquote ", b"\\ansicpg1252", b"{\\*\\themedata "])
+def test_decoder_split_inside_each_token(token):
+    whole = decode(SAMPLE_RTF, [])
+    start = SAMPLE_RTF.index(token)
+    for offset in range(1, len(token)):
+        assert decode(SAMPLE_RTF, [start + offset]) == whole, f"differs when {token!r} is cut after {offset} bytes"
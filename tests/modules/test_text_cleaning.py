@@ -0,0 +1,76 @@
+"""
+Text Cleaning Tests
+The cleaner, whole and streamed, against the original four-pass implementation
+Part of knowNothing Creative RAG
+"""
+
+import random
+import re
+
+import pytest
+
+from src.services import text_cleaning
+from src.services.text_cleaning import StreamingCleaner, clean_and_count, count_words
+
+# Inputs mix every character class the cleaning rules treat differently
+ALPHABET = list("ab c\t\n\r\x00\x0b\x0c\x1c\x7f\x85\x9f\xa0 　") + ["  ", "\n\n", "word"]
+PLAIN_ALPHABET = [char for char in ALPHABET if not re.match(r'[\x00-\x1f\x7f-\x9f]', char) or char in "\t\n\r"]
+
+CASES = 3000
+
+
+def reference_clean(text: str) -> str:
+    """The cleaner as it was before the fast path: four regex passes and a strip"""
+    if not text:
+        return ""
+    text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
+    text = re.sub(r'\t+', ' ', text)
+    text = re.sub(r' +', ' ', text)
+    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x84\x86-\x9f]', '', text)
+    return text.strip()
+
+
+def reference_clean_and_count(text: str):
+    cleaned = reference_clean(text)
+    return cleaned, len(cleaned.split()), len(cleaned)
+
+
+def random_texts(seed: int):
+    """Random strings, alternately with and without control characters"""
+    rng = random.Random(seed)
+    for case in range(CASES):
+        alphabet = ALPHABET if case % 2 else PLAIN_ALPHABET
+        yield rng, "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+
+
+def stream(text: str, cuts):
+    """Feed text to a StreamingCleaner split at the given positions"""
+    cleaner = StreamingCleaner()
+    bounds = [0] + list(cuts) + [len(text)]
+    pieces = [cleaner.feed(text[start:stop]) for start, stop in zip(bounds, bounds[1:])]
+    return "".join(pieces) + cleaner.finish(), cleaner.word_count, cleaner.character_count
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_whole_text_matches_original_cleaner(seed):
+    for _, text in random_texts(seed):
+        assert clean_and_count(text) == reference_clean_and_count(text), f"differs for {text!r}"
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_streamed_text_matches_original_cleaner_for_any_split(seed):
+    for rng, text in random_texts(seed):
+        cuts = sorted(rng.choices(range(len(text) + 1), k=rng.randint(0, 6)))
+        assert stream(text, cuts) == reference_clean_and_count(text), f"differs for {text!r} cut at {cuts}"
+
+
+def test_streamed_text_one_character_at_a_time():
+    text = " \n\n\t a\x0c \x00\n\n\nb\t\t c \x85 　word\r\n\n \x7f"
+    assert stream(text, range(1, len(text))) == reference_clean_and_count(text)
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 3, 7])
+@pytest.mark.parametrize("text", ["x" * 20, "x " * 20, " x" * 20, "ab cd\n" * 20, "", "   "])
+def test_count_words_across_slices(monkeypatch, chunk, text):
+    monkeypatch.setattr(text_cleaning, "WORD_COUNT_CHUNK", chunk)
+    assert count_words(text) == len(text.split())